@@ -0,0 +1,126 @@
+"""
+Tokens/sec of the Flan-T5 memoir generator: transformers pipeline vs int8
+CTranslate2.
+
+Each backend generates full memoirs (heading + body, same sampling
+parameters) for the first N dataset_50 sessions. Generated tokens are
+counted with the model's tokenizer, so both backends are measured the same
+way.
+
+    python benchmarks/bench_flan_backends.py --sessions 5 --max-new-tokens 400
+"""
+import argparse
+import glob
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def load_transcripts(data_dir, n):
+    transcripts = []
+    for fp in sorted(glob.glob(str(Path(data_dir) / "*.json")))[:n]:
+        with open(fp, "r", encoding="utf-8") as f:
+            session = json.load(f)
+        transcripts.append("\n".join(
+            f"{'Participant' if t.get('speaker') == 'Subject' else 'Interviewer'}: {t.get('text', '').strip()}"
+            for t in session.get("dialogue_turns", [])
+        ))
+    return transcripts
+
+
+class CountingGenerator:
+    """
+    Wraps a generator callable and records tokens and time per call. It
+    hides the pipeline's model, so MemoirGenerator takes the plain two-call
+    path on both backends and they are compared like for like.
+    """
+
+    def __init__(self, generator, tokenizer):
+        self.generator = generator
+        self.tokenizer = tokenizer
+        self.calls = []
+
+    def __call__(self, prompt, **kwargs):
+        start = time.perf_counter()
+        out = self.generator(prompt, **kwargs)
+        elapsed = time.perf_counter() - start
+        tokens = len(self.tokenizer.encode(out[0]["generated_text"], add_special_tokens=False))
+        self.calls.append({"max_new_tokens": kwargs.get("max_new_tokens"), "tokens": tokens, "elapsed_s": elapsed})
+        return out
+
+
+def load_backend(name, model):
+    if name == "ct2":
+        from flan_ct2 import CT2Text2TextGenerator
+        return CT2Text2TextGenerator(model)
+    from transformers import pipeline
+    return pipeline("text2text-generation", model=model, device_map="auto")
+
+
+def run_backend(name, model, transcripts, max_new_tokens):
+    from memoir_generator_flan import MemoirGenerator
+    from transformers import AutoTokenizer
+
+    start = time.perf_counter()
+    generator = CountingGenerator(load_backend(name, model), AutoTokenizer.from_pretrained(model))
+    load_s = time.perf_counter() - start
+    mg = MemoirGenerator(model=model, generator=generator, max_new_tokens=max_new_tokens)
+
+    # Untimed warm-up call (kernel selection, allocator).
+    generator.generator("Warm up.", max_new_tokens=4)
+
+    memoir_s = []
+    for transcript in transcripts:
+        start = time.perf_counter()
+        mg.generate_memoir(transcript)
+        memoir_s.append(time.perf_counter() - start)
+
+    tokens = sum(c["tokens"] for c in generator.calls)
+    decode_s = sum(c["elapsed_s"] for c in generator.calls)
+    return {
+        "backend": name,
+        "load_s": load_s,
+        "memoirs": len(transcripts),
+        "generated_tokens": tokens,
+        "generation_s": decode_s,
+        "tokens_per_s": tokens / decode_s if decode_s else 0.0,
+        "memoir_p50_s": float(np.percentile(memoir_s, 50)),
+        "memoir_max_s": float(max(memoir_s)),
+        "calls": generator.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Flan-T5 generation backends.")
+    parser.add_argument("--model", default="google/flan-t5-large")
+    parser.add_argument("--backends", nargs="+", default=["pipeline", "ct2"], choices=["pipeline", "ct2"])
+    parser.add_argument("--data-dir", default=str(ROOT / "data" / "dataset_50"))
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=1000)
+    parser.add_argument("--output", default="bench_results_flan.json")
+    args = parser.parse_args()
+
+    transcripts = load_transcripts(args.data_dir, args.sessions)
+    rows = [run_backend(b, args.model, transcripts, args.max_new_tokens) for b in args.backends]
+
+    print(f"\n{'backend':<10}{'load s':>8}{'tokens':>8}{'tok/s':>9}{'memoir p50 s':>14}")
+    for r in rows:
+        print(f"{r['backend']:<10}{r['load_s']:>8.1f}{r['generated_tokens']:>8}"
+              f"{r['tokens_per_s']:>9.1f}{r['memoir_p50_s']:>14.1f}")
+    if len(rows) > 1 and rows[0]["tokens_per_s"]:
+        print(f"\n{rows[-1]['backend']} vs {rows[0]['backend']}: "
+              f"{rows[-1]['tokens_per_s'] / rows[0]['tokens_per_s']:.2f}x tokens/sec")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"model": args.model, "max_new_tokens": args.max_new_tokens, "runs": rows}, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
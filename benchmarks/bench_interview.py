@@ -0,0 +1,284 @@
+"""
+Offline benchmark of the per-turn interview hot path.
+
+Replays every Subject turn in data/dataset_50 through
+NLPPipeline.analyze -> EmotionAwareQuestionGenerator.generate -> select_song,
+then each session's transcript through both memoir generators. The LLM and
+audio backends are stubbed, so only local work is measured.
+
+    python benchmarks/bench_interview.py --output bench_results.json
+    python benchmarks/bench_interview.py --compare bench_results.json
+"""
+import argparse
+import glob
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+STAGES = [
+    "nlp.analyze",
+    "question.generate",
+    "select_song",
+    "memoir.gpt",
+    "memoir.flan",
+]
+
+
+# ------------------------------ Stubs ------------------------------
+def install_audio_stub():
+    """
+    memoir_interview opens a microphone at import time; swap in an inert
+    speech_recognition module so select_song can be imported headless.
+    """
+    sr = types.ModuleType("speech_recognition")
+
+    class _Dummy:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    class _Error(Exception):
+        pass
+
+    sr.Recognizer = _Dummy
+    sr.Microphone = _Dummy
+    sr.UnknownValueError = _Error
+    sr.RequestError = _Error
+    sys.modules["speech_recognition"] = sr
+
+
+class StubChatClient:
+    """Stands in for OpenAI(): returns a canned completion after `latency_s`."""
+
+    def __init__(self, latency_s=0.0):
+        self.latency_s = latency_s
+        self.chat = types.SimpleNamespace(
+            completions=types.SimpleNamespace(create=self._create)
+        )
+
+    def _create(self, model, messages, **kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        message = types.SimpleNamespace(content="Stub memoir text.")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+class StubText2Text:
+    """Stands in for the Flan text2text-generation pipeline."""
+
+    def __init__(self, latency_s=0.0):
+        self.latency_s = latency_s
+
+    def __call__(self, prompt, **kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [{"generated_text": "Stub memoir text."}]
+
+
+# ------------------------------ Helpers ------------------------------
+def load_sessions(data_dir):
+    sessions = []
+    for fp in sorted(glob.glob(str(Path(data_dir) / "*.json"))):
+        with open(fp, "r", encoding="utf-8") as f:
+            sessions.append(json.load(f))
+    return sessions
+
+
+def session_transcript(session):
+    lines = []
+    for turn in session.get("dialogue_turns", []):
+        speaker = "Participant" if turn.get("speaker") == "Subject" else "Interviewer"
+        lines.append(f"{speaker}: {turn.get('text', '').strip()}")
+    return "\n".join(lines)
+
+
+def summarize(samples_s):
+    ms = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    if ms.size == 0:
+        return {"n": 0}
+    return {
+        "n": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "total_s": float(ms.sum() / 1000.0),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ------------------------------ Benchmark ------------------------------
+def run(args):
+    install_audio_stub()
+    from nlp_pipeline import NLPPipeline
+    from question_generator import EmotionAwareQuestionGenerator, DialogueState
+    from memoir_interview import select_song
+    from memoir_generator_gpt import MemoirGenerator as GPTMemoirGenerator
+    from memoir_generator_flan import MemoirGenerator as FlanMemoirGenerator
+
+    sessions = load_sessions(args.data_dir)
+    if args.limit:
+        sessions = sessions[:args.limit]
+
+    llm_latency = args.llm_latency_ms / 1000.0
+    nlp = NLPPipeline(joint=args.joint)
+    qg = EmotionAwareQuestionGenerator()
+    mg_gpt = GPTMemoirGenerator(client=StubChatClient(llm_latency))
+    mg_flan = FlanMemoirGenerator(generator=StubText2Text(llm_latency))
+
+    # Warm up model weights and kernels so the first turn is not an outlier.
+    for _ in range(args.warmup):
+        nlp.analyze("I remember the summer we spent by the lake.")
+
+    timings = {stage: [] for stage in STAGES}
+    n_utterances = 0
+    hot_path_s = 0.0
+    wall_start = time.perf_counter()
+
+    for session in sessions:
+        state = DialogueState()
+        for turn in session.get("dialogue_turns", []):
+            if turn.get("speaker") != "Subject":
+                continue
+            text = turn.get("text", "").strip()
+            if not text:
+                continue
+
+            t0 = time.perf_counter()
+            dominant, emo_vec, entities = nlp.analyze(text)
+            t1 = time.perf_counter()
+            qg.generate(dominant_emotion=dominant, entities=entities, state=state)
+            t2 = time.perf_counter()
+            select_song(emo_vec, dominant)
+            t3 = time.perf_counter()
+
+            timings["nlp.analyze"].append(t1 - t0)
+            timings["question.generate"].append(t2 - t1)
+            timings["select_song"].append(t3 - t2)
+            hot_path_s += t3 - t0
+            n_utterances += 1
+
+        transcript = session_transcript(session)
+        t0 = time.perf_counter()
+        mg_gpt.generate_memoir(transcript)
+        t1 = time.perf_counter()
+        mg_flan.generate_memoir(transcript)
+        t2 = time.perf_counter()
+        timings["memoir.gpt"].append(t1 - t0)
+        timings["memoir.flan"].append(t2 - t1)
+
+    wall_s = time.perf_counter() - wall_start
+    stages = {stage: summarize(samples) for stage, samples in timings.items()}
+    total = sum(s.get("total_s", 0.0) for s in stages.values()) or 1.0
+    for s in stages.values():
+        s["share"] = s.get("total_s", 0.0) / total
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sessions": len(sessions),
+            "joint_nlp": args.joint,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "stages": stages,
+        "throughput": {
+            "utterances": n_utterances,
+            "utterances_per_s": n_utterances / hot_path_s if hot_path_s else 0.0,
+            "wall_s": wall_s,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"\nSessions: {result['meta']['sessions']}  "
+          f"Utterances: {result['throughput']['utterances']}  "
+          f"Commit: {result['meta']['commit']}")
+    header = f"{'stage':<20}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'share':>8}"
+    if baseline:
+        header += f"{'Δp50':>9}{'Δp95':>9}"
+    print(header)
+    print("-" * len(header))
+
+    ranked = sorted(result["stages"].items(), key=lambda kv: -kv[1].get("share", 0.0))
+    for stage, s in ranked:
+        if not s.get("n"):
+            continue
+        row = (f"{stage:<20}{s['n']:>6}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}"
+               f"{s['p99_ms']:>10.2f}{s['share']:>8.1%}")
+        base = (baseline or {}).get("stages", {}).get(stage)
+        if base and base.get("n"):
+            row += (f"{_delta(s['p50_ms'], base['p50_ms']):>9}"
+                    f"{_delta(s['p95_ms'], base['p95_ms']):>9}")
+        print(row)
+
+    tp = result["throughput"]
+    print(f"\nHot path: {tp['utterances_per_s']:.1f} utterances/s   "
+          f"Wall: {tp['wall_s']:.1f}s   Peak RSS: {result['peak_rss_mb']:.0f} MB")
+    print(f"Dominant stage: {ranked[0][0]}")
+
+
+def _delta(new, old):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=str(ROOT / "data" / "dataset_50"))
+    parser.add_argument("--output", default="bench_results.json",
+                        help="where to write the JSON report")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    parser.add_argument("--limit", type=int, default=0, help="only replay N sessions")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                        help="simulated latency of each stubbed LLM call")
+    parser.add_argument("--joint", action="store_true",
+                        help="benchmark the single-encoder emotion+NER model")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved benchmark report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
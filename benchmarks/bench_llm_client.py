@@ -0,0 +1,104 @@
+"""
+Throughput and failure rate of concurrent chat completions against a
+rate-limited endpoint, with and without llm_client.RateLimitedClient.
+
+Starts scripts/fake_openai_server.py in-process (provider limit --rpm,
+injected 429/500 responses), then fires --calls completions from --threads
+threads through:
+
+  naive    OpenAI(max_retries=0): every 429/500 is a failed call
+  sdk      OpenAI() with the SDK's own retries, no shared limits
+  limited  RateLimitedClient(OpenAI(max_retries=0))
+
+    python benchmarks/bench_llm_client.py --rpm 600 --calls 300 --threads 32
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from openai import OpenAI
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from fake_openai_server import serve  # noqa: E402
+from llm_client import RateLimitedClient  # noqa: E402
+
+MESSAGES = [
+    {"role": "system", "content": "You turn interview transcripts into polished memoir prose."},
+    {"role": "user", "content": "Participant: I grew up by the sea with my two brothers. " * 20},
+]
+
+
+def run(name, client, calls, threads):
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, max_tokens=200)
+            ok = True
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies)
+    row = {
+        "client": name,
+        "calls": calls,
+        "ok": int(sum(results)),
+        "failed": calls - int(sum(results)),
+        "elapsed_s": round(elapsed, 2),
+        "ok_per_min": round(60 * sum(results) / elapsed, 1),
+        "p50_s": round(float(np.percentile(lat, 50)), 3),
+        "p95_s": round(float(np.percentile(lat, 95)), 3),
+    }
+    if isinstance(client, RateLimitedClient):
+        row["limiter"] = client.stats()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=600, help="fake provider requests-per-minute limit")
+    parser.add_argument("--tpm", type=int, default=200_000, help="fake provider tokens-per-minute limit")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--throttle-rate", type=float, default=0.03)
+    parser.add_argument("--clients", nargs="+", default=["naive", "sdk", "limited"])
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    for name in args.clients:
+        # A fresh server per run so each client starts with an empty provider window.
+        server = serve(rpm=args.rpm, tpm=args.tpm, latency_s=args.latency, error_rate=args.error_rate,
+                       throttle_rate=args.throttle_rate)
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+        if name == "naive":
+            client = OpenAI(base_url=base_url, max_retries=0)
+        elif name == "sdk":
+            client = OpenAI(base_url=base_url)
+        else:
+            client = RateLimitedClient(OpenAI(base_url=base_url, max_retries=0), requests_per_minute=args.rpm,
+                                       tokens_per_minute=args.tpm)
+        row = run(name, client, args.calls, args.threads)
+        row["server"] = dict(server.limits.counts)
+        print(json.dumps(row))
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
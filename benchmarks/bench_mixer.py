@@ -0,0 +1,64 @@
+"""
+CPU cost of mixing an ambience bed under the soundtrack.
+
+Renders synthetic sources offline into a NullSink (no device, faster than
+real time) and reports CPU seconds per second of audio, i.e. the fraction of
+one core the mixer thread would use when playing in real time.
+
+    python benchmarks/bench_mixer.py --seconds 120 --ambience 3
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from audio_mixer import AMBIENCE, MUSIC, Mixer, NullSink  # noqa: E402
+
+
+def synthetic_pcm(seconds, rate, channels, seed):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(-0.3, 0.3, (int(seconds * rate), channels)) * 32767).astype(np.int16)
+
+
+def run(seconds, ambience, music, rate, channels, block):
+    mixer = Mixer(sink=NullSink(), sample_rate=rate, channels=channels, block_frames=block)
+    for i in range(ambience):
+        mixer.add(synthetic_pcm(20, rate, channels, i), gain=0.6, loop=True, fade_in=2.0, role=AMBIENCE)
+    if music:
+        mixer.add(synthetic_pcm(seconds, rate, channels, 99), role=MUSIC, fade_in=0.5)
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    mixer.render_seconds(seconds)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    return {
+        "ambience_sources": ambience,
+        "music": music,
+        "audio_s": seconds,
+        "cpu_s": round(cpu, 4),
+        "wall_s": round(wall, 4),
+        "core_fraction": round(cpu / seconds, 5),
+        "block_ms": round(1000 * block / rate, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--ambience", type=int, default=1, help="looping ambience sources")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--block", type=int, default=1024)
+    args = parser.parse_args()
+
+    for music in (False, True):
+        print(json.dumps(run(args.seconds, args.ambience, music, args.rate, args.channels, args.block)))
+
+
+if __name__ == "__main__":
+    main()
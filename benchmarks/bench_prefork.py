@@ -0,0 +1,108 @@
+"""
+Throughput and memory of the pre-fork NLP workers versus worker count.
+
+Loads NLPPipeline once, then for each worker count forks a PreforkAnalyzer
+from that same parent, pushes every participant turn in data/dataset_50
+through it in fixed-size batches, and records texts/sec plus the Pss and
+private memory of each worker.
+
+    python benchmarks/bench_prefork.py --workers 1 2 4 8 --output prefork.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def load_texts(data_dir):
+    texts = []
+    for fp in sorted(glob.glob(str(Path(data_dir) / "*.json"))):
+        with open(fp, "r", encoding="utf-8") as f:
+            session = json.load(f)
+        texts.extend(
+            t["text"] for t in session.get("dialogue_turns", [])
+            if t.get("speaker") == "Subject" and t.get("text", "").strip()
+        )
+    return texts
+
+
+def run_one(nlp, texts, workers, batch_size):
+    from prefork_server import PreforkAnalyzer, process_memory_kb
+
+    with PreforkAnalyzer(workers=workers, nlp=nlp) as analyzer:
+        # One untimed batch per worker so model init / allocator warm-up is excluded.
+        warm = [analyzer.submit_batch(texts[:batch_size]) for _ in range(workers)]
+        for fut in warm:
+            fut.result()
+
+        start = time.perf_counter()
+        futures = [
+            analyzer.submit_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        for fut in futures:
+            fut.result()
+        elapsed = time.perf_counter() - start
+
+        mem = [process_memory_kb(pid) for pid in analyzer.pids]
+        pss = [m[0] for m in mem if m[0] is not None]
+        private = [m[1] for m in mem if m[1] is not None]
+        threads = analyzer.threads_per_worker
+
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "texts": len(texts),
+        "elapsed_s": elapsed,
+        "texts_per_s": len(texts) / elapsed,
+        "worker_pss_mb": [kb / 1024 for kb in pss],
+        "worker_private_mb": [kb / 1024 for kb in private],
+        "mean_private_mb": (sum(private) / len(private) / 1024) if private else None,
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark pre-fork NLP workers.")
+    parser.add_argument("--data-dir", default=str(ROOT / "data" / "dataset_50"))
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, max(1, cores // 2), cores}))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--output", default="bench_results_prefork.json")
+    args = parser.parse_args()
+
+    from nlp_pipeline import NLPPipeline
+    from prefork_server import process_memory_kb
+
+    texts = load_texts(args.data_dir)
+    nlp = NLPPipeline()
+    parent_pss, _ = process_memory_kb(os.getpid())
+
+    rows = [run_one(nlp, texts, w, args.batch_size) for w in args.workers]
+
+    base = rows[0]["texts_per_s"]
+    print(f"\n{'workers':>8}{'threads':>9}{'texts/s':>10}{'speedup':>9}{'private MB/worker':>19}")
+    for r in rows:
+        private = f"{r['mean_private_mb']:.0f}" if r["mean_private_mb"] is not None else "n/a"
+        print(f"{r['workers']:>8}{r['threads_per_worker']:>9}{r['texts_per_s']:>10.1f}"
+              f"{r['texts_per_s'] / base:>9.2f}{private:>19}")
+    if parent_pss is not None:
+        print(f"\nParent Pss after model load: {parent_pss / 1024:.0f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "cores": cores,
+            "parent_pss_mb": parent_pss / 1024 if parent_pss is not None else None,
+            "runs": rows,
+        }, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
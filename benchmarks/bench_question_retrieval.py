@@ -0,0 +1,75 @@
+"""
+Latency of one retrieval query against a large synthetic question bank.
+
+Writes a random N x D index in the build_index() layout, loads it through
+QuestionRetriever (memory-mapped) with a stub embedder, and times the
+scoring + masking + argmax step that runs on every turn.
+
+    python benchmarks/bench_question_retrieval.py --questions 50000 --dim 384
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from question_retrieval import EMBEDDINGS_FILE, META_FILE, QuestionRetriever  # noqa: E402
+
+CATEGORIES = ["introduction", "early life", "family", "education", "career",
+              "love & relationship", "passions & hobbies", "challenges", "reflections"]
+EMOTIONS = ["joy", "nostalgia", "sadness", "fear", "pride", "humor", "resilience"]
+
+
+def write_synthetic_index(out_dir, n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.save(out_dir / EMBEDDINGS_FILE, vectors)
+    meta = {
+        "embedder": "synthetic",
+        "texts": [f"question {i}?" for i in range(n)],
+        "categories": sorted(CATEGORIES),
+        "category_ids": rng.integers(0, len(CATEGORIES) + 1, n).tolist(),
+        "emotions": sorted(EMOTIONS),
+        "emotion_ids": rng.integers(0, len(EMOTIONS) + 1, n).tolist(),
+    }
+    with (out_dir / META_FILE).open("w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_index(Path(tmp), args.questions, args.dim)
+        retriever = QuestionRetriever(tmp, embedder=object(), embedder_name="synthetic")
+        state = retriever.new_state()
+        rng = np.random.default_rng(1)
+
+        samples = []
+        for i in range(args.queries):
+            q = rng.standard_normal(args.dim).astype(np.float32)
+            q /= np.linalg.norm(q)
+            start = time.perf_counter()
+            scores = retriever.scores(q, CATEGORIES[i % 9], EMOTIONS[i % 7], state)
+            state.mark(int(np.argmax(scores)))
+            samples.append(time.perf_counter() - start)
+
+    ms = np.asarray(samples) * 1000.0
+    print(f"{args.questions} questions x {args.dim} dims, {args.queries} queries")
+    print(f"p50={np.percentile(ms, 50):.2f} ms  p95={np.percentile(ms, 95):.2f} ms  "
+          f"p99={np.percentile(ms, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Gap between the end of a spoken answer and its emotion analysis, with and
+without analysing transcribed segments while the speaker is still talking.
+
+Each WAV fixture is replayed in real time through the streaming transcriber
+twice: once analysing the full transcript after the speaker stops, once
+submitting every segment to a BackgroundAnalyzer as it is transcribed.
+
+    python benchmarks/bench_speech_overlap.py answers/*.wav --backend faster-whisper
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import asr  # noqa: E402
+from streaming_analyzer import BackgroundAnalyzer, StreamingAnalyzer  # noqa: E402
+
+
+def run_sequential(transcriber, sa, wav):
+    text = transcriber.transcribe(asr.WavFileSource(wav, realtime=True))
+    stopped = time.perf_counter()
+    result = sa.analyze(text)
+    return time.perf_counter() - stopped, text, result
+
+
+def run_overlapped(transcriber, sa, wav):
+    segments = []
+    with BackgroundAnalyzer(sa) as background:
+        for seg in transcriber.iter_segments(asr.WavFileSource(wav, realtime=True)):
+            segments.append(seg.text)
+            background.submit(seg.text)
+        stopped = time.perf_counter()
+        result = background.finish()
+    return time.perf_counter() - stopped, " ".join(segments), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark overlapped transcription and analysis.")
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--backend", default=None, choices=sorted(asr.BACKENDS))
+    parser.add_argument("--joint", action="store_true", help="use the joint multi-task model")
+    parser.add_argument("--output", default="bench_results_speech.json")
+    args = parser.parse_args()
+
+    from nlp_pipeline import NLPPipeline
+
+    sa = StreamingAnalyzer(NLPPipeline(joint=args.joint))
+    transcriber = asr.StreamingTranscriber(asr.make_backend(args.backend))
+    sa.analyze("Warm-up sentence for the classifier.")
+
+    rows = []
+    for wav in args.wavs:
+        seq_gap, text, seq = run_sequential(transcriber, sa, wav)
+        ovl_gap, _, ovl = run_overlapped(transcriber, sa, wav)
+        rows.append({
+            "wav": str(wav),
+            "words": len(text.split()),
+            "sequential_gap_ms": seq_gap * 1000,
+            "overlapped_gap_ms": ovl_gap * 1000,
+            "dominant_sequential": seq[0],
+            "dominant_overlapped": ovl[0],
+        })
+        print(f"{Path(wav).name:<30} {rows[-1]['words']:>5} words  "
+              f"sequential {seq_gap * 1000:7.1f} ms  overlapped {ovl_gap * 1000:7.1f} ms  "
+              f"({seq[0]} / {ovl[0]})")
+
+    if rows:
+        print(f"\nMedian gap: sequential {np.median([r['sequential_gap_ms'] for r in rows]):.1f} ms, "
+              f"overlapped {np.median([r['overlapped_gap_ms'] for r in rows]):.1f} ms")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Build an offline ambient sound pack (see src/ambient_pack.py).
+
+Every audio file in the input directory (anything pydub/ffmpeg can read) is
+decoded once to int16 PCM at a fixed rate and channel count and saved as a
+.npy clip. Tags come from an optional JSON file
+({"rain_heavy.ogg": {"tags": [...], "description": "..."}}) or else from the
+file name ("ocean-waves_01.ogg" -> ["ocean", "waves"]); each clip's
+description is embedded for similarity search.
+
+    python scripts/build_ambient_pack.py sounds/ --tags sounds/tags.json --output data/ambient_pack
+"""
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from ambient_pack import AUDIO_DIR, EMBEDDINGS_FILE, MANIFEST_FILE, keyword_tags  # noqa: E402
+
+AUDIO_EXTENSIONS = {".wav", ".ogg", ".mp3", ".flac", ".m4a", ".aac"}
+DEFAULT_EMBEDDER = "all-MiniLM-L6-v2"
+
+
+def tags_from_name(path):
+    words = [w for w in re.split(r"[^a-z]+", path.stem.lower()) if len(w) > 1]
+    return keyword_tags(" ".join(words)) if words else []
+
+
+def decode(path, sample_rate, channels, max_seconds):
+    from pydub import AudioSegment
+
+    sound = AudioSegment.from_file(path)
+    if max_seconds:
+        sound = sound[: int(max_seconds * 1000)]
+    sound = sound.set_frame_rate(sample_rate).set_channels(channels).set_sample_width(2)
+    return np.frombuffer(sound.raw_data, dtype=np.int16).reshape(-1, channels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an offline ambient sound pack.")
+    parser.add_argument("input_dir")
+    parser.add_argument("--tags", default=None, help="JSON: file name -> {tags, description}")
+    parser.add_argument("--output", default="data/ambient_pack")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--max-seconds", type=float, default=60.0, help="truncate longer clips")
+    parser.add_argument("--no-embeddings", action="store_true")
+    args = parser.parse_args()
+
+    out = Path(args.output)
+    (out / AUDIO_DIR).mkdir(parents=True, exist_ok=True)
+    annotations = {}
+    if args.tags:
+        with open(args.tags, "r", encoding="utf-8") as f:
+            annotations = json.load(f)
+
+    clips = []
+    for path in sorted(Path(args.input_dir).iterdir()):
+        if path.suffix.lower() not in AUDIO_EXTENSIONS:
+            continue
+        note = annotations.get(path.name, {})
+        tags = [" ".join(t.lower().split()) for t in note.get("tags", [])] or tags_from_name(path)
+        if not tags:
+            print(f"Skipping {path.name}: no tags")
+            continue
+
+        pcm = decode(path, args.sample_rate, args.channels, args.max_seconds)
+        clip_id = re.sub(r"[^a-z0-9]+", "-", path.stem.lower()).strip("-")
+        np.save(out / AUDIO_DIR / f"{clip_id}.npy", pcm)
+        clips.append({
+            "id": clip_id,
+            "file": f"{clip_id}.npy",
+            "source": path.name,
+            "tags": sorted(set(tags)),
+            "description": note.get("description") or " ".join(tags),
+            "frames": len(pcm),
+        })
+        print(f"{clip_id:<30} {len(pcm) / args.sample_rate:6.1f}s  {', '.join(clips[-1]['tags'])}")
+
+    manifest = {
+        "sample_rate": args.sample_rate,
+        "channels": args.channels,
+        "embedder": None if args.no_embeddings else DEFAULT_EMBEDDER,
+        "tags": sorted({t for c in clips for t in c["tags"]}),
+        "clips": clips,
+    }
+    if not args.no_embeddings and clips:
+        from sentence_transformers import SentenceTransformer
+
+        vectors = SentenceTransformer(DEFAULT_EMBEDDER).encode(
+            [c["description"] for c in clips], normalize_embeddings=True, convert_to_numpy=True
+        )
+        np.save(out / EMBEDDINGS_FILE, vectors.astype(np.float32))
+
+    with (out / MANIFEST_FILE).open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"Saved {len(clips)} clips ({len(manifest['tags'])} tags) to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ import json
 import glob
 from pathlib import Path
 
+import pyarrow as pa
+import pyarrow.parquet as pq
+
 CANONICAL_EMOTIONS = [
     "nostalgia",
     "joy",
@@ -59,6 +62,52 @@ RAW_TO_CANONICAL = {
 }
 
 
+LIFE_STAGES = [
+    "Childhood",
+    "Youth",
+    "Young Adult",
+    "Adulthood",
+    "Middle Age",
+    "Old Age",
+]
+
+RAW_TO_LIFE_STAGE = {
+    "childhood": "Childhood",
+    "youth": "Youth",
+
+    "young adult": "Young Adult",
+    "young adulthood": "Young Adult",
+    "early adulthood": "Young Adult",
+    "early career": "Young Adult",
+    "career start": "Young Adult",
+
+    "adulthood": "Adulthood",
+    "adult": "Adulthood",
+    "career": "Adulthood",
+    "career advancement": "Adulthood",
+    "mature adult": "Adulthood",
+
+    "middle age": "Middle Age",
+    "middle adulthood": "Middle Age",
+    "mid-life": "Middle Age",
+    "midlife": "Middle Age",
+    "mid-career": "Middle Age",
+    "mid career": "Middle Age",
+    "middle career": "Middle Age",
+
+    "old age": "Old Age",
+    "late adulthood": "Old Age",
+    "later adulthood": "Old Age",
+    "late career": "Old Age",
+    "retirement": "Old Age",
+}
+
+# event_type is free text in the annotations; anything rarer than this
+# collapses into OTHER_EVENT so the classification head stays learnable.
+EVENT_TYPE_MIN_COUNT = 5
+OTHER_EVENT = "Other"
+
+
 def map_emotion_list(raw_list):
     for raw in raw_list:
         r = raw.lower()
@@ -67,9 +116,74 @@ def map_emotion_list(raw_list):
     return None
 
 
+def map_emotion_vector(raw_list):
+    """Multi-hot vector over CANONICAL_EMOTIONS (all zeros if nothing maps)."""
+    vec = [0.0] * len(CANONICAL_EMOTIONS)
+    for raw in raw_list:
+        label = RAW_TO_CANONICAL.get(raw.lower())
+        if label is not None:
+            vec[CANONICAL_EMOTIONS.index(label)] = 1.0
+    return vec
+
+
+def map_life_stage(raw):
+    if not raw:
+        return None
+    return RAW_TO_LIFE_STAGE.get(raw.strip().lower())
+
+
+def build_event_type_vocab(event_types):
+    counts = {}
+    for ev in event_types:
+        if ev:
+            counts[ev] = counts.get(ev, 0) + 1
+    kept = sorted(ev for ev, c in counts.items() if c >= EVENT_TYPE_MIN_COUNT)
+    return kept + [OTHER_EVENT]
+
+
+def write_multitask_parquet(rows, output_path):
+    """
+    Columnar corpus with every annotation field, for the multi-head trainer.
+    Label vocabularies travel in the schema metadata.
+    """
+    event_vocab = build_event_type_vocab(r["event_type_raw"] for r in rows)
+    for r in rows:
+        ev = r["event_type_raw"]
+        if not ev:
+            r["event_type"] = None
+        else:
+            r["event_type"] = ev if ev in event_vocab else OTHER_EVENT
+
+    schema = pa.schema(
+        [
+            ("session_id", pa.string()),
+            ("turn_id", pa.int32()),
+            ("sentence_idx", pa.int32()),
+            ("text", pa.string()),
+            ("emotions_raw", pa.list_(pa.string())),
+            ("emotion_vector", pa.list_(pa.float32(), len(CANONICAL_EMOTIONS))),
+            ("emotion_label", pa.string()),
+            ("life_stage_raw", pa.string()),
+            ("life_stage", pa.string()),
+            ("event_type_raw", pa.string()),
+            ("event_type", pa.string()),
+            ("entities", pa.list_(pa.string())),
+        ],
+        metadata={
+            "emotions": json.dumps(CANONICAL_EMOTIONS),
+            "life_stages": json.dumps(LIFE_STAGES),
+            "event_types": json.dumps(event_vocab),
+        },
+    )
+    table = pa.Table.from_pylist(rows, schema=schema)
+    pq.write_table(table, output_path, compression="zstd")
+    return event_vocab
+
+
 def main():
     input_dir = Path("data/dataset_50")
     output_path = Path("data/emotion_dataset.jsonl")
+    multitask_path = Path("data/multitask_dataset.parquet")
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     files = sorted(glob.glob(str(input_dir / "*.json")))
@@ -77,21 +191,40 @@ def main():
 
     n_total = 0
     n_used = 0
+    multitask_rows = []
 
     with output_path.open("w", encoding="utf-8") as fout:
         for fp in files:
             with open(fp, "r", encoding="utf-8") as f:
                 session = json.load(f)
+            session_id = session.get("session_id", Path(fp).stem)
 
             for turn in session.get("dialogue_turns", []):
                 # 通常我们只用 Subject 的内容
                 if turn.get("speaker") != "Subject":
                     continue
 
-                for ann in turn.get("sentence_annotations", []):
+                for idx, ann in enumerate(turn.get("sentence_annotations", [])):
                     text = ann.get("text", "").strip()
                     emotions = ann.get("emotions", [])
-                    if not text or not emotions:
+                    if not text:
+                        continue
+
+                    multitask_rows.append({
+                        "session_id": session_id,
+                        "turn_id": turn.get("turn_id"),
+                        "sentence_idx": idx,
+                        "text": text,
+                        "emotions_raw": emotions,
+                        "emotion_vector": map_emotion_vector(emotions),
+                        "emotion_label": map_emotion_list(emotions),
+                        "life_stage_raw": ann.get("life_stage"),
+                        "life_stage": map_life_stage(ann.get("life_stage")),
+                        "event_type_raw": ann.get("event_type"),
+                        "entities": ann.get("entities", []),
+                    })
+
+                    if not emotions:
                         continue
 
                     n_total += 1
@@ -100,13 +233,19 @@ def main():
                         continue
 
                     n_used += 1
-                    record = {"text": text, "label": label}
+                    # session_id lets the trainer keep a persona's sentences in one fold.
+                    record = {"text": text, "label": label, "session_id": session_id}
                     fout.write(json.dumps(record, ensure_ascii=False) + "\n")
 
     print(f"Total annotated sentences: {n_total}")
     print(f"Used with mapped emotion:  {n_used}")
     print(f"Saved emotion dataset to: {output_path}")
 
+    event_vocab = write_multitask_parquet(multitask_rows, multitask_path)
+    print(f"Multi-task sentences:      {len(multitask_rows)}")
+    print(f"Event types (incl. Other): {len(event_vocab)}")
+    print(f"Saved multi-task dataset to: {multitask_path}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,95 @@
+import argparse
+import glob
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from question_retrieval import DEFAULT_EMBEDDER, build_index  # noqa: E402
+
+_QUESTION = re.compile(r"[^.!?]*\?")
+
+
+def questions_from_templates(path):
+    with open(path, "r", encoding="utf-8") as f:
+        templates = json.load(f)
+
+    out = []
+    for questions in templates.get("stage_templates", {}).values():
+        out += [{"text": q} for q in questions]
+    for category, stages in templates.get("category_templates", {}).items():
+        for questions in stages.values():
+            out += [{"text": q, "category": category} for q in questions]
+    for emotion, questions in templates.get("emotion_templates", {}).items():
+        out += [{"text": q, "emotion": emotion} for q in questions]
+    out += [{"text": q} for q in templates.get("fallback", [])]
+    return out
+
+
+def questions_from_sessions(input_dir):
+    """
+    Question sentences asked by the interviewer in dataset_50 sessions.
+    Questions addressing the participant by name do not transfer to other
+    people and are skipped.
+    """
+    out = []
+    for fp in sorted(glob.glob(str(Path(input_dir) / "*.json"))):
+        with open(fp, "r", encoding="utf-8") as f:
+            session = json.load(f)
+        name = session.get("profile", {}).get("name", "").lower()
+        for turn in session.get("dialogue_turns", []):
+            if turn.get("speaker") != "Interviewer":
+                continue
+            for m in _QUESTION.finditer(turn.get("text", "")):
+                text = m.group(0).strip()
+                if len(text.split()) < 4 or (name and name in text.lower()):
+                    continue
+                out.append({"text": text})
+    return out
+
+
+def questions_from_bank(path):
+    """Extra bank: JSONL with {"text", "category"?, "emotion"?} or plain lines."""
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            out.append(json.loads(line) if line.startswith("{") else {"text": line})
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the interview question bank.")
+    parser.add_argument("--templates", default="data/question_templates.json")
+    parser.add_argument("--sessions", default="data/dataset_50")
+    parser.add_argument("--bank", nargs="*", default=[], help="extra question files (JSONL or text)")
+    parser.add_argument("--output", default="models/question_index")
+    parser.add_argument("--embedder", default=DEFAULT_EMBEDDER, help="SentenceTransformer model name")
+    args = parser.parse_args()
+
+    questions = questions_from_templates(args.templates) + questions_from_sessions(args.sessions)
+    for path in args.bank:
+        questions += questions_from_bank(path)
+
+    # Deduplicate on normalised text, keeping the first (most tagged) entry.
+    seen = set()
+    unique = []
+    for q in questions:
+        key = " ".join(q["text"].lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(q)
+    print(f"Collected {len(questions)} questions, {len(unique)} unique")
+
+    start = time.perf_counter()
+    shape = build_index(unique, args.output, args.embedder)
+    print(f"Embedded {shape[0]} questions ({shape[1]} dims) with {args.embedder} in {time.perf_counter() - start:.1f}s")
+    print(f"Saved question index to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
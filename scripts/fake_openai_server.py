@@ -0,0 +1,192 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, for load-testing
+llm_client.RateLimitedClient without an API key or cost.
+
+Enforces requests-per-minute and tokens-per-minute limits like the provider
+(429 with Retry-After when exceeded), caps concurrent requests, and injects
+random 429 / 500 responses, or exact ones queued with server.inject(status)
+(as the tests do). Answers are canned, after a configurable latency.
+
+    python scripts/fake_openai_server.py --port 8765 --rpm 600 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python src/batch_memoirs.py ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Limits:
+    """
+    Provider-side accounting. Like the real API, per-minute limits are
+    enforced over short intervals: buckets refilling continuously, holding
+    at most one second's worth of requests and tokens.
+    """
+
+    def __init__(self, rpm, tpm, max_concurrency):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.lock = threading.Lock()
+        self.requests = self.req_capacity = max(1.0, rpm / 60.0)
+        self.tokens = self.tok_capacity = tpm / 60.0
+        self.stamp = time.monotonic()
+        self.in_flight = 0
+        self.counts = {"ok": 0, "rate_limited": 0, "injected_429": 0, "injected_500": 0, "overloaded": 0}
+        self.scripted = deque()  # (status, retry_after_s) returned before anything else
+
+    def next_scripted(self):
+        with self.lock:
+            return self.scripted.popleft() if self.scripted else None
+
+    def admit(self, tokens):
+        """None if admitted, else (status, retry_after_s, counter)."""
+        with self.lock:
+            now = time.monotonic()
+            elapsed, self.stamp = now - self.stamp, now
+            self.requests = min(self.req_capacity, self.requests + elapsed * self.rpm / 60.0)
+            self.tokens = min(self.tok_capacity, self.tokens + elapsed * self.tpm / 60.0)
+            if self.in_flight >= self.max_concurrency:
+                return 503, 1.0, "overloaded"
+            if self.requests < 1.0 or self.tokens < tokens:
+                retry = max((1.0 - self.requests) * 60.0 / self.rpm, (tokens - self.tokens) * 60.0 / self.tpm)
+                return 429, max(0.05, retry), "rate_limited"
+            self.requests -= 1.0
+            self.tokens -= tokens
+            self.in_flight += 1
+            return None
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def make_handler(limits, latency_s, error_rate, throttle_rate, completion_tokens):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, body, retry_after=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if retry_after is not None:
+                self.send_header("Retry-After", f"{retry_after:.2f}")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status, message, retry_after=None):
+            self._send(status, {"error": {"message": message, "type": "fake_error", "code": status}}, retry_after)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._error(404, f"unknown path {self.path}")
+                return
+
+            scripted = limits.next_scripted()
+            if scripted is not None:
+                status, retry_after = scripted
+                limits.count(f"injected_{status}")
+                self._error(status, "scripted fault", retry_after=retry_after)
+                return
+
+            roll = random.random()
+            if roll < throttle_rate:
+                limits.count("injected_429")
+                self._error(429, "injected rate limit", retry_after=0.5)
+                return
+            if roll < throttle_rate + error_rate:
+                limits.count("injected_500")
+                self._error(500, "injected server error")
+                return
+
+            prompt_tokens = sum(len(m.get("content") or "") // 4 + 4 for m in request.get("messages", []))
+            refused = limits.admit(prompt_tokens + completion_tokens)
+            if refused is not None:
+                status, retry_after, key = refused
+                limits.count(key)
+                self._error(status, key, retry_after=retry_after)
+                return
+            try:
+                time.sleep(latency_s * random.uniform(0.5, 1.5))
+                limits.count("ok")
+                self._send(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "Fake completion."},
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                })
+            finally:
+                limits.done()
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=0, rpm=600, tpm=200_000, max_concurrency=32,
+          latency_s=0.2, error_rate=0.02, throttle_rate=0.02, completion_tokens=200):
+    """Start the server on a background thread; returns it (.server_port, .limits, .inject(), .shutdown())."""
+    limits = Limits(rpm, tpm, max_concurrency)
+    server = ThreadingHTTPServer(
+        (host, port), make_handler(limits, latency_s, error_rate, throttle_rate, completion_tokens)
+    )
+    server.daemon_threads = True
+    server.limits = limits
+
+    def inject(status, retry_after=None, times=1):
+        """Answer the next `times` requests with `status` (and Retry-After, if given)."""
+        with limits.lock:
+            limits.scripted.extend([(status, retry_after)] * times)
+
+    server.inject = inject
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server with fault injection.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=600, help="requests per minute before 429")
+    parser.add_argument("--tpm", type=int, default=200_000, help="tokens per minute before 429")
+    parser.add_argument("--max-concurrency", type=int, default=32, help="in-flight requests before 503")
+    parser.add_argument("--latency", type=float, default=0.2, help="mean seconds per completion")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fraction of injected 500s")
+    parser.add_argument("--throttle-rate", type=float, default=0.02, help="fraction of injected 429s")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.rpm, args.tpm, args.max_concurrency,
+                   args.latency, args.error_rate, args.throttle_rate)
+    print(f"Fake OpenAI server on http://{args.host}:{server.server_port}/v1")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(server.limits.counts))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Offline ambient sound pack: pre-decoded clips selected by tag or text similarity.
+
+Layout of a pack directory (written by scripts/build_ambient_pack.py):
+
+    manifest.json     sample_rate, channels, tag vocabulary, embedder, and per
+                      clip: id, file, tags, description, frames
+    audio/<id>.npy    int16 PCM, shape (frames, channels), memory-mapped on use
+    embeddings.npy    float32 (clips, D), L2-normalised description embeddings
+
+Loading reads only the manifest and builds a (clips, tags) incidence matrix;
+audio stays on disk until a clip is played, and is already PCM, so playback
+needs no network and no decoding. Selecting clips for the keywords from
+playAudio.detect_environment is one matrix-vector product over the
+incidence matrix, falling back to embedding similarity when no tag matches.
+
+    pack = AmbientPack("data/ambient_pack")
+    clips = pack.select(["rain", "night"], k=3)
+    pcm = pack.audio(clips[0])   # np.memmap int16 (frames, channels)
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+AUDIO_DIR = "audio"
+
+
+def keyword_tags(keyword):
+    """'Ocean waves' -> ['ocean waves', 'ocean', 'waves']: the phrase and its words."""
+    phrase = " ".join(keyword.lower().split())
+    words = phrase.split()
+    return [phrase] + words if len(words) > 1 else words
+
+
+class AmbientPack:
+
+    def __init__(self, pack_dir, embedder=None):
+        """
+        :param pack_dir: directory written by build_ambient_pack.py
+        :param embedder: SentenceTransformer for the embedding fallback; loaded
+                         on first use from the manifest's model name
+        """
+        self.dir = Path(pack_dir)
+        with (self.dir / MANIFEST_FILE).open("r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        self.sample_rate = self.manifest["sample_rate"]
+        self.channels = self.manifest["channels"]
+        self.clips = self.manifest["clips"]
+        self.ids = [c["id"] for c in self.clips]
+        self._by_id = {c["id"]: c for c in self.clips}
+
+        self.tags = self.manifest["tags"]
+        self.tag_index = {t: i for i, t in enumerate(self.tags)}
+        self.incidence = np.zeros((len(self.clips), len(self.tags)), dtype=np.float32)
+        for row, clip in enumerate(self.clips):
+            for tag in clip["tags"]:
+                self.incidence[row, self.tag_index[tag]] = 1.0
+        # Clips with many tags should not win just by being generic.
+        self._tag_norm = 1.0 / np.sqrt(np.maximum(self.incidence.sum(axis=1), 1.0))
+
+        emb_path = self.dir / EMBEDDINGS_FILE
+        self.embeddings = np.load(emb_path, mmap_mode="r") if emb_path.exists() else None
+        self._embedder = embedder
+
+    def __len__(self):
+        return len(self.clips)
+
+    # ------------------------------ Selection ------------------------------
+    def tag_query(self, keywords):
+        q = np.zeros(len(self.tags), dtype=np.float32)
+        for kw in keywords:
+            for tag in keyword_tags(kw):
+                i = self.tag_index.get(tag)
+                if i is not None:
+                    q[i] = 1.0
+        return q
+
+    def _top(self, scores, k, min_score):
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.ids[i] for i in top if scores[i] > min_score]
+
+    def select_by_tags(self, keywords, k=3):
+        """Clips sharing the most tags with the keywords (normalised by clip tag count)."""
+        scores = (self.incidence @ self.tag_query(keywords)) * self._tag_norm
+        return self._top(scores, k, 0.0)
+
+    def embed(self, texts):
+        if self._embedder is None:
+            from sentence_transformers import SentenceTransformer
+            self._embedder = SentenceTransformer(self.manifest.get("embedder") or "all-MiniLM-L6-v2")
+        return self._embedder.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+
+    def select_by_embedding(self, query_vec, k=3, min_similarity=0.3):
+        """Clips whose description embedding is closest to an (L2-normalised) query."""
+        if self.embeddings is None:
+            return []
+        return self._top(self.embeddings @ np.asarray(query_vec, dtype=np.float32), k, min_similarity)
+
+    def select(self, keywords, k=3):
+        """Tag match first; embedding similarity to the keywords when no tag matches."""
+        if not keywords:
+            return []
+        clips = self.select_by_tags(keywords, k)
+        if not clips and self.embeddings is not None:
+            query = self.embed([" ".join(keywords)])[0]
+            clips = self.select_by_embedding(query, k)
+        return clips
+
+    # ------------------------------ Audio ------------------------------
+    def clip(self, clip_id):
+        return self._by_id[clip_id]
+
+    def audio(self, clip_id):
+        """int16 PCM (frames, channels), memory-mapped: no copy until it is read."""
+        return np.load(self.dir / AUDIO_DIR / self._by_id[clip_id]["file"], mmap_mode="r")
@@ -0,0 +1,445 @@
+"""
+Pluggable, streaming speech recognition for the interview.
+
+Audio comes from a source as fixed-size 16 kHz mono int16 frames: a live
+microphone (MicrophoneSource) or a WAV file (WavFileSource, optionally paced
+in real time), so everything below can be driven from recorded fixtures.
+
+An energy-based voice-activity detector is calibrated on the quietest
+frames of the first half second of audio, keeps tracking the noise floor
+during silence, and cuts speech into segments at short pauses
+(or every few seconds of continuous speech). A capture thread keeps reading
+and segmenting while the previous segment is transcribed, so transcription
+keeps pace with the speaker instead of starting after they stop; the
+utterance ends after a longer silence.
+
+Backends (all CPU, selected by name or MELO_ASR):
+
+    google          speech_recognition's recognize_google (network)
+    faster-whisper  local CTranslate2 Whisper, int8
+    vosk            local Kaldi model (MELO_VOSK_MODEL = model directory)
+
+    python src/asr.py fixture.wav --backend faster-whisper --realtime
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+import tracing
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+
+class ASRError(RuntimeError):
+    """The recognizer could not be reached or failed (not: heard nothing)."""
+
+
+# ------------------------------ Sources ------------------------------
+class WavFileSource:
+
+    def __init__(self, path, frame_ms=FRAME_MS, realtime=False):
+        """
+        :param path: 16-bit PCM WAV; other rates are resampled, stereo is downmixed
+        :param realtime: pace frames at the speed they were recorded, like a microphone
+        """
+        self.path = path
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self.sample_rate = SAMPLE_RATE
+
+    def _load(self):
+        with wave.open(str(self.path), "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{self.path}: only 16-bit PCM WAV is supported")
+            rate, channels = wf.getframerate(), wf.getnchannels()
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if channels > 1:
+            pcm = pcm.reshape(-1, channels).mean(axis=1)
+        if rate != SAMPLE_RATE:
+            n = int(round(len(pcm) * SAMPLE_RATE / rate))
+            pcm = np.interp(np.linspace(0, len(pcm) - 1, n), np.arange(len(pcm)), pcm)
+        return pcm.astype(np.int16)
+
+    def frames(self):
+        pcm = self._load()
+        step = SAMPLE_RATE * self.frame_ms // 1000
+        start = time.perf_counter()
+        for i, offset in enumerate(range(0, len(pcm) - step + 1, step)):
+            if self.realtime:
+                delay = start + (i + 1) * self.frame_ms / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield pcm[offset:offset + step]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class MicrophoneSource:
+
+    def __init__(self, frame_ms=FRAME_MS, device_index=None):
+        self.frame_ms = frame_ms
+        self.device_index = device_index
+        self.sample_rate = SAMPLE_RATE
+        self._mic = None
+
+    def __enter__(self):
+        import speech_recognition as sr
+
+        chunk = SAMPLE_RATE * self.frame_ms // 1000
+        self._mic = sr.Microphone(device_index=self.device_index, sample_rate=SAMPLE_RATE, chunk_size=chunk)
+        self._mic.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._mic.__exit__(*exc)
+        self._mic = None
+        return False
+
+    def frames(self):
+        chunk = self._mic.CHUNK
+        while True:
+            yield np.frombuffer(self._mic.stream.read(chunk), dtype=np.int16)
+
+
+# ------------------------------ Voice activity ------------------------------
+def frame_rms(frame):
+    return float(np.sqrt(np.mean(frame.astype(np.float32) ** 2))) if len(frame) else 0.0
+
+
+class EnergyVAD:
+
+    def __init__(self, threshold=None, ratio=3.0, min_threshold=200.0, calibration_ms=500,
+                 percentile=10.0, adapt_rate=0.05):
+        """
+        :param threshold: fixed RMS threshold (int16 scale); None = calibrate
+        :param ratio: threshold = noise floor * ratio after calibration
+        :param min_threshold: lower bound, so digital silence does not make every click speech
+        :param calibration_ms: audio used for the initial noise calibration
+        :param percentile: frame-energy percentile taken as the noise floor
+        :param adapt_rate: how fast silent frames move the running noise floor
+                           (calibrated thresholds only; 0 = calibrate once)
+        """
+        self.threshold = threshold
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.calibration_ms = calibration_ms
+        self.percentile = percentile
+        self.adapt_rate = adapt_rate if threshold is None else 0.0
+        self.floor = None
+
+    @property
+    def calibrated(self):
+        return self.threshold is not None
+
+    def calibrate(self, frames):
+        # A low percentile, not the median: the participant may start talking
+        # straight away, but the gaps between words are still near the floor.
+        self.floor = float(np.percentile([frame_rms(f) for f in frames], self.percentile)) if frames else 0.0
+        self.threshold = max(self.min_threshold, self.floor * self.ratio)
+        return self.threshold
+
+    def is_speech(self, frame):
+        rms = frame_rms(frame)
+        if rms > self.threshold:
+            return True
+        if self.adapt_rate and self.floor is not None:
+            # Re-calibrate during silence, so a bad start or a change of room
+            # noise does not stick for the whole session. The floor falls
+            # fast and rises slowly: quiet speech just under the threshold
+            # must not drag it up.
+            rate = 10 * self.adapt_rate if rms < self.floor else self.adapt_rate / 10
+            self.floor += min(1.0, rate) * (rms - self.floor)
+            self.threshold = max(self.min_threshold, self.floor * self.ratio)
+        return False
+
+
+class Segmenter:
+    """Frame-by-frame VAD state machine that cuts one utterance into segments."""
+
+    def __init__(self, vad, frame_ms=FRAME_MS, start_ms=90, pause_ms=300, end_ms=1200,
+                 pad_ms=150, max_segment_s=6.0, timeout_s=10.0):
+        """
+        :param start_ms: voiced audio needed to open a segment
+        :param pause_ms: silence that closes a segment (sent for transcription)
+        :param end_ms: silence after speech that ends the utterance
+        :param pad_ms: context kept before and after each segment
+        :param max_segment_s: continuous speech is cut at this length
+        :param timeout_s: give up when nobody starts speaking
+        """
+        per = lambda ms: max(1, int(round(ms / frame_ms)))  # noqa: E731
+        self.vad = vad
+        self.frame_s = frame_ms / 1000
+        self.start_frames = per(start_ms)
+        self.pause_frames = per(pause_ms)
+        self.end_frames = per(end_ms)
+        self.pad_frames = per(pad_ms)
+        self.max_frames = per(max_segment_s * 1000)
+        self.timeout_frames = per(timeout_s * 1000)
+
+        self.preroll = deque(maxlen=self.pad_frames + self.start_frames)
+        self.buffer = []
+        self.in_speech = False
+        self.heard = False
+        self.voiced_run = 0
+        self.since_voice = 0
+        self.n = 0
+        self.seg_start = 0
+        self.done = False
+
+    def _cut(self, keep_tail):
+        frames = self.buffer[:len(self.buffer) - max(0, self.since_voice - keep_tail)] or self.buffer
+        start = self.seg_start * self.frame_s
+        segment = (np.concatenate(frames), start, start + len(frames) * self.frame_s)
+        self.buffer = []
+        return segment
+
+    def feed(self, frame):
+        """Consume one frame; returns the segments it closed (zero or one)."""
+        self.n += 1
+        voiced = self.vad.is_speech(frame)
+        self.since_voice = 0 if voiced else self.since_voice + 1
+        out = []
+
+        if not self.in_speech:
+            self.preroll.append(frame)
+            self.voiced_run = self.voiced_run + 1 if voiced else 0
+            if self.voiced_run >= self.start_frames:
+                self.in_speech = self.heard = True
+                self.buffer = list(self.preroll)
+                self.seg_start = self.n - len(self.buffer)
+                self.preroll.clear()
+        else:
+            self.buffer.append(frame)
+            if self.since_voice >= self.pause_frames:
+                out.append(self._cut(keep_tail=self.pad_frames))
+                self.in_speech = False
+                self.voiced_run = 0
+            elif len(self.buffer) >= self.max_frames:
+                out.append(self._cut(keep_tail=len(self.buffer)))
+                self.seg_start = self.n
+
+        if self.heard and self.since_voice >= self.end_frames:
+            self.done = True
+        elif not self.heard and self.n >= self.timeout_frames:
+            self.done = True
+        return out
+
+    def flush(self):
+        """Close the segment still open when the audio ends."""
+        if self.in_speech and self.buffer:
+            self.in_speech = False
+            return [self._cut(keep_tail=self.pad_frames)]
+        return []
+
+
+# ------------------------------ Backends ------------------------------
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, recognizer=None, language="en-US"):
+        import speech_recognition as sr
+
+        self._sr = sr
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE, prompt=None):
+        audio = self._sr.AudioData(pcm.astype(np.int16).tobytes(), sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).strip()
+        except self._sr.UnknownValueError:
+            return ""
+        except self._sr.RequestError as e:
+            raise ASRError(str(e)) from e
+
+
+class FasterWhisperBackend:
+    name = "faster-whisper"
+
+    def __init__(self, model="base.en", compute_type="int8", cpu_threads=0, beam_size=1, language="en"):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(model, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+        self.beam_size = beam_size
+        self.language = language
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE, prompt=None):
+        # The previous segment's text as prompt keeps names and casing
+        # consistent across segment boundaries.
+        audio = pcm.astype(np.float32) / 32768.0
+        segments, _ = self.model.transcribe(
+            audio, language=self.language, beam_size=self.beam_size,
+            initial_prompt=prompt or None, condition_on_previous_text=False, vad_filter=False,
+        )
+        return " ".join(s.text.strip() for s in segments).strip()
+
+
+class VoskBackend:
+    name = "vosk"
+
+    def __init__(self, model_path=None):
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+
+        SetLogLevel(-1)
+        model_path = model_path or os.environ.get("MELO_VOSK_MODEL")
+        if not model_path:
+            raise ValueError("Vosk needs a model directory (model_path= or MELO_VOSK_MODEL)")
+        self.model = Model(model_path)
+        self._recognizer_cls = KaldiRecognizer
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE, prompt=None):
+        rec = self._recognizer_cls(self.model, sample_rate)
+        rec.AcceptWaveform(pcm.astype(np.int16).tobytes())
+        return json.loads(rec.FinalResult()).get("text", "").strip()
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    VoskBackend.name: VoskBackend,
+}
+
+
+def make_backend(name=None, **kwargs):
+    """Backend by name; defaults to MELO_ASR, then 'google'."""
+    name = name or os.environ.get("MELO_ASR", GoogleBackend.name)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend {name!r}; choose from {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+
+# ------------------------------ Streaming transcription ------------------------------
+@dataclass
+class Segment:
+    index: int
+    start_s: float
+    end_s: float
+    text: str
+    # Seconds between the end of this segment's audio being captured and
+    # its transcript being ready.
+    lag_s: float = 0.0
+
+
+_END = object()
+
+
+class StreamingTranscriber:
+
+    def __init__(self, backend, vad=None, frame_ms=FRAME_MS, **segmenter_kwargs):
+        """
+        :param backend: object with transcribe(pcm_int16, sample_rate, prompt=None) -> str
+        :param vad: EnergyVAD; calibrated on the first audio it sees
+        :param segmenter_kwargs: forwarded to Segmenter (pause_ms, end_ms, ...)
+        """
+        self.backend = backend
+        self.vad = vad or EnergyVAD()
+        self.frame_ms = frame_ms
+        self.segmenter_kwargs = segmenter_kwargs
+
+    def _capture(self, source, out):
+        """Read frames, segment them, hand segments over; runs in its own thread."""
+        try:
+            frames = source.frames()
+            pending = []
+            if not self.vad.calibrated:
+                n = max(1, self.vad.calibration_ms // self.frame_ms)
+                for frame in frames:
+                    pending.append(frame)
+                    if len(pending) >= n:
+                        break
+                with tracing.span("asr.calibrate"):
+                    self.vad.calibrate(pending)
+
+            segmenter = Segmenter(self.vad, frame_ms=self.frame_ms, **self.segmenter_kwargs)
+            for frame in _chain(pending, frames):
+                for seg in segmenter.feed(frame):
+                    out.put((seg, time.perf_counter()))
+                if segmenter.done:
+                    break
+            for seg in segmenter.flush():
+                out.put((seg, time.perf_counter()))
+        except BaseException as e:  # surfaced in the consuming thread
+            out.put(e)
+        finally:
+            out.put(_END)
+
+    def iter_segments(self, source):
+        """
+        Yield a Segment as soon as each piece of speech is transcribed, while
+        the capture thread keeps listening. Ends when the speaker stops.
+        """
+        out = queue.Queue()
+        capture = threading.Thread(target=self._capture, args=(source, out), name="asr-capture", daemon=True)
+        capture.start()
+
+        index = 0
+        prompt = ""
+        try:
+            while True:
+                item = out.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                (pcm, start_s, end_s), captured_at = item
+                with tracing.span("asr.segment", seconds=round(end_s - start_s, 2)):
+                    text = self.backend.transcribe(pcm, SAMPLE_RATE, prompt=prompt)
+                if not text:
+                    continue
+                prompt = text
+                yield Segment(index, start_s, end_s, text, time.perf_counter() - captured_at)
+                index += 1
+        finally:
+            capture.join()
+
+    def transcribe(self, source):
+        """Whole utterance as one string ('' when nothing was recognised)."""
+        return " ".join(seg.text for seg in self.iter_segments(source)).strip()
+
+
+def _chain(first, rest):
+    yield from first
+    yield from rest
+
+
+# ------------------------------ CLI ------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a WAV file with streaming VAD segmentation.")
+    parser.add_argument("wav")
+    parser.add_argument("--backend", default=None, choices=sorted(BACKENDS))
+    parser.add_argument("--model", default=None, help="faster-whisper model name / Vosk model directory")
+    parser.add_argument("--realtime", action="store_true", help="feed audio at recording speed")
+    parser.add_argument("--threshold", type=float, default=None, help="fixed VAD RMS threshold")
+    args = parser.parse_args()
+
+    kwargs = {}
+    if args.model and args.backend == "faster-whisper":
+        kwargs["model"] = args.model
+    elif args.model and args.backend == "vosk":
+        kwargs["model_path"] = args.model
+    transcriber = StreamingTranscriber(make_backend(args.backend, **kwargs), EnergyVAD(threshold=args.threshold))
+
+    start = time.perf_counter()
+    texts = []
+    for seg in transcriber.iter_segments(WavFileSource(args.wav, realtime=args.realtime)):
+        print(f"[{seg.start_s:6.2f}-{seg.end_s:6.2f}s] (+{seg.lag_s:.2f}s) {seg.text}")
+        texts.append(seg.text)
+    print(f"\nTranscript: {' '.join(texts)}")
+    print(f"VAD threshold: {transcriber.vad.threshold:.0f}  elapsed: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+In-process real-time audio mixer.
+
+All sources (ambience beds, music, one-shots) are summed block by block in
+NumPy into one output stream, so ambience can keep playing under the
+soundtrack instead of being stopped for it, and no thread is blocked per
+clip. Per source: gain, looping, fade in/out as linear gain ramps, and a
+role. While any "music" source is playing, "ambience" sources are ducked
+to `duck_gain`, with separate attack and release times.
+
+Output goes to a sink: SoundDeviceSink (the sound card), WavSink (a file) or
+NullSink (nothing; for tests and benchmarks). With a file or null sink the
+mixer can also render offline, faster than real time:
+
+    mixer = Mixer(sink=WavSink("out.wav"))
+    bed = mixer.add(rain_pcm, gain=0.6, loop=True, fade_in=2.0, role="ambience")
+    mixer.add(song_pcm, role="music", fade_in=0.5)
+    mixer.render_seconds(30)
+"""
+import threading
+import time
+import wave
+
+import numpy as np
+
+import tracing
+
+AMBIENCE = "ambience"
+MUSIC = "music"
+
+
+def to_float(pcm):
+    """int16 (or float) PCM -> float32 in [-1, 1], shape (frames, channels)."""
+    pcm = np.asarray(pcm)
+    if pcm.ndim == 1:
+        pcm = pcm[:, None]
+    if pcm.dtype == np.int16:
+        return pcm.astype(np.float32) / 32768.0
+    return pcm.astype(np.float32, copy=False)
+
+
+def resample(pcm, src_rate, dst_rate):
+    """Linear resampling, done once when a source is added."""
+    if src_rate == dst_rate:
+        return pcm
+    n = int(round(len(pcm) * dst_rate / src_rate))
+    x = np.linspace(0, len(pcm) - 1, n)
+    return np.stack([np.interp(x, np.arange(len(pcm)), pcm[:, c]) for c in range(pcm.shape[1])], axis=1)
+
+
+class Source:
+    """One playing sound. Created by Mixer.add(); its methods are thread-safe enough to call from anywhere."""
+
+    def __init__(self, pcm, rate, gain, loop, fade_in, role):
+        self.pcm = pcm          # int16 or float, (frames, channels); int16 is converted block by block
+        self.rate = rate
+        self.loop = loop
+        self.role = role
+        self.pos = 0
+        self.gain = 0.0 if fade_in > 0 else gain
+        self._target = gain
+        self._step = gain / (fade_in * rate) if fade_in > 0 else 0.0
+        self._stop_at_target = False
+        self.finished = threading.Event()
+
+    def ramp_to(self, gain, seconds):
+        self._target = gain
+        self._step = abs(gain - self.gain) / (seconds * self.rate) if seconds > 0 else 0.0
+        if seconds <= 0:
+            self.gain = gain
+
+    def set_gain(self, gain, seconds=0.05):
+        self._stop_at_target = False
+        self.ramp_to(gain, seconds)
+
+    def fade_out(self, seconds=1.0):
+        """Fade to silence, then remove the source."""
+        self._stop_at_target = True
+        self.ramp_to(0.0, seconds)
+
+    def stop(self):
+        self.fade_out(0.0)
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def _envelope(self, n):
+        """Per-frame gain for the next n frames, advancing the ramp."""
+        if self._step == 0.0 or self.gain == self._target:
+            self.gain = self._target
+            return None  # constant: use the scalar
+        direction = 1.0 if self._target > self.gain else -1.0
+        env = self.gain + direction * self._step * np.arange(1, n + 1, dtype=np.float32)
+        env = np.minimum(env, self._target) if direction > 0 else np.maximum(env, self._target)
+        self.gain = float(env[-1])
+        return env
+
+    def _read(self, n):
+        """Next n frames as float32 (shorter at the end of a non-looping source)."""
+        total = len(self.pcm)
+        if not self.loop:
+            block = self.pcm[self.pos:self.pos + n]
+            self.pos += len(block)
+            return to_float(block)
+        parts = []
+        while n > 0 and total:
+            take = min(n, total - self.pos)
+            parts.append(self.pcm[self.pos:self.pos + take])
+            self.pos = (self.pos + take) % total
+            n -= take
+        return to_float(np.concatenate(parts) if len(parts) > 1 else parts[0])
+
+    @property
+    def done(self):
+        return (
+            (self._stop_at_target and self.gain <= 0.0)
+            or (not self.loop and self.pos >= len(self.pcm))
+        )
+
+
+class Mixer:
+
+    def __init__(self, sink=None, sample_rate=44100, channels=2, block_frames=1024,
+                 duck_gain=0.3, duck_attack=0.3, duck_release=1.0):
+        """
+        :param sink: SoundDeviceSink / WavSink / NullSink (default: NullSink)
+        :param block_frames: frames mixed per block (~23 ms at 44.1 kHz)
+        :param duck_gain: ambience level while music plays
+        :param duck_attack / duck_release: seconds to duck / recover
+        """
+        self.sink = sink or NullSink()
+        self.rate = sample_rate
+        self.channels = channels
+        self.block = block_frames
+        self.duck_gain = duck_gain
+        self.duck_attack = duck_attack
+        self.duck_release = duck_release
+        self.duck = 1.0
+
+        self._sources = []
+        self._lock = threading.Lock()
+        self._out = np.zeros((block_frames, channels), dtype=np.float32)
+        self._thread = None
+        self._running = False
+        self.frames_rendered = 0
+
+    # ------------------------------ Sources ------------------------------
+    def add(self, pcm, gain=1.0, loop=False, fade_in=0.0, role=AMBIENCE, sample_rate=None):
+        """
+        Start playing PCM (int16 or float, mono or multi-channel; a memory-map
+        is read block by block). Returns the Source handle.
+        """
+        pcm = np.asarray(pcm) if not isinstance(pcm, np.memmap) else pcm
+        if pcm.ndim == 1:
+            pcm = pcm[:, None]
+        if len(pcm) == 0:
+            raise ValueError("cannot play empty PCM")
+        if sample_rate and sample_rate != self.rate:
+            pcm = resample(to_float(pcm), sample_rate, self.rate).astype(np.float32)
+        if pcm.shape[1] != self.channels:
+            # Mono -> all channels, multi-channel -> mono: converted once here.
+            mono = to_float(pcm).mean(axis=1, keepdims=True)
+            pcm = np.repeat(mono, self.channels, axis=1)
+        source = Source(pcm, self.rate, gain, loop, fade_in, role)
+        with self._lock:
+            self._sources.append(source)
+        return source
+
+    def sources(self, role=None):
+        with self._lock:
+            return [s for s in self._sources if role is None or s.role == role]
+
+    def fade_out_all(self, role=None, seconds=1.0):
+        for s in self.sources(role):
+            s.fade_out(seconds)
+
+    # ------------------------------ Mixing ------------------------------
+    def _duck_envelope(self, music_playing, n):
+        target = self.duck_gain if music_playing else 1.0
+        if self.duck == target:
+            return None
+        seconds = self.duck_attack if target < self.duck else self.duck_release
+        step = (1.0 - self.duck_gain) / max(1.0, seconds * self.rate)
+        direction = 1.0 if target > self.duck else -1.0
+        env = self.duck + direction * step * np.arange(1, n + 1, dtype=np.float32)
+        env = np.minimum(env, target) if direction > 0 else np.maximum(env, target)
+        self.duck = float(env[-1])
+        return env
+
+    def render(self, n=None):
+        """Mix the next block into a float32 (n, channels) array (a reused buffer)."""
+        n = n or self.block
+        out = self._out[:n] if n <= len(self._out) else np.zeros((n, self.channels), dtype=np.float32)
+        out[:] = 0.0
+        with self._lock:
+            sources = list(self._sources)
+
+        music_playing = any(s.role == MUSIC and not s.done for s in sources)
+        duck_env = self._duck_envelope(music_playing, n)
+
+        finished = []
+        for s in sources:
+            block = s._read(n)
+            m = len(block)
+            env = s._envelope(m)
+            if s.role == AMBIENCE and (duck_env is not None or self.duck != 1.0):
+                env = (env if env is not None else s.gain) * (duck_env[:m] if duck_env is not None else self.duck)
+            if env is None:
+                if s.gain != 0.0:
+                    out[:m] += s.gain * block
+            else:
+                out[:m] += np.asarray(env, dtype=np.float32).reshape(-1, 1) * block
+            if s.done:
+                finished.append(s)
+
+        if finished:
+            with self._lock:
+                self._sources = [s for s in self._sources if s not in finished]
+            for s in finished:
+                s.finished.set()
+        np.clip(out, -1.0, 1.0, out=out)
+        self.frames_rendered += n
+        return out
+
+    def render_seconds(self, seconds):
+        """Offline: render `seconds` of audio straight into the sink."""
+        with tracing.span("mixer.render", seconds=seconds):
+            remaining = int(seconds * self.rate)
+            while remaining > 0:
+                n = min(self.block, remaining)
+                self.sink.write(self.render(n), self.rate)
+                remaining -= n
+
+    # ------------------------------ Real time ------------------------------
+    def _run(self):
+        self.sink.open(self.rate, self.channels, self.block)
+        try:
+            while self._running:
+                # Sinks that play in real time block here, pacing the loop.
+                self.sink.write(self.render(), self.rate)
+        finally:
+            self.sink.close()
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="audio-mixer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+# ------------------------------ Sinks ------------------------------
+def to_int16(block):
+    return (block * 32767.0).astype(np.int16)
+
+
+class SoundDeviceSink:
+    """The default (or given) output device, via sounddevice."""
+
+    def __init__(self, device=None):
+        self.device = device
+        self._stream = None
+
+    def open(self, rate, channels, block):
+        import sounddevice as sd
+
+        self._stream = sd.OutputStream(
+            samplerate=rate, channels=channels, dtype="int16", blocksize=block, device=self.device
+        )
+        self._stream.start()
+
+    def write(self, block, rate):
+        if self._stream is None:
+            self.open(rate, block.shape[1], len(block))
+        self._stream.write(to_int16(block))
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class WavSink:
+    """16-bit WAV file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._wav = None
+
+    def open(self, rate, channels, block):
+        self._wav = wave.open(str(self.path), "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+
+    def write(self, block, rate):
+        if self._wav is None:
+            self.open(rate, block.shape[1], len(block))
+        self._wav.writeframes(to_int16(block).tobytes())
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class NullSink:
+    """Discards audio. With realtime=True it sleeps like a device would."""
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.frames = 0
+        self.peak = 0.0
+        self._t0 = None
+
+    def open(self, rate, channels, block):
+        self._t0 = time.perf_counter()
+
+    def write(self, block, rate):
+        self.frames += len(block)
+        self.peak = max(self.peak, float(np.abs(block).max(initial=0.0)))
+        if self.realtime:
+            if self._t0 is None:
+                self._t0 = time.perf_counter()
+            delay = self._t0 + self.frames / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        pass
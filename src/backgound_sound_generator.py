@@ -1,25 +1,34 @@
 from openai import OpenAI
 
+import tracing
+from llm_client import RateLimitedClient, shared_client
+
 class BackgroundSoundGenerator:
     """
     Generates a dynamically suggested ambient background sound
     based on a text describing a memory or scene.
     """
 
-    def __init__(self, model="gpt-4o-mini", api_key=None):
+    def __init__(self, model="gpt-4o-mini", api_key=None, client=None):
         """
         :param model: OpenAI GPT model to use
         :param api_key: Optional API key to pass manually for this session
+        :param client: Optional pre-built client; defaults to the shared
+                       rate-limited client (llm_client.shared_client)
         """
-        if api_key:
-            self.client = OpenAI(api_key=api_key)
+        if client is not None:
+            self.client = client
+        elif api_key:
+            # Own key, own limits; retries happen in the wrapper.
+            self.client = RateLimitedClient(OpenAI(api_key=api_key, max_retries=0))
         else:
-            self.client = OpenAI()  # uses environment variable OPENAI_API_KEY
+            self.client = shared_client()  # uses environment variable OPENAI_API_KEY
         self.model = model
 
     # ----------------------------------------------------
     # 1. Generate Background Sound
     # ----------------------------------------------------
+    @tracing.traced("bg_sound.generate")
     def generate_sound(self, text):
         """
         Generate a concise ambient sound suggestion for the given text.
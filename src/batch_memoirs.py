@@ -0,0 +1,212 @@
+"""
+Offline batch memoir generation over a directory of sessions.
+
+Each input file follows the data/dataset_50 schema. Participant transcripts
+are rebuilt from `dialogue_turns`, emotion analysis runs in large batches,
+and memoirs are generated by a bounded pool of worker threads. Results are
+appended to a JSONL file that doubles as the checkpoint: rerunning the same
+command skips every session already written.
+
+    python src/batch_memoirs.py data/dataset_50 --output memoirs.jsonl --workers 8
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from emotion_trajectory import EmotionTrajectory
+from nlp_pipeline import NLPPipeline
+
+
+# ------------------------------ Sessions ------------------------------
+def load_session(path):
+    with open(path, "r", encoding="utf-8") as f:
+        session = json.load(f)
+    session.setdefault("session_id", Path(path).stem)
+    return session
+
+
+def build_transcript(session):
+    """Interviewer/Participant transcript in the format both generators parse."""
+    lines = []
+    for turn in session.get("dialogue_turns", []):
+        text = turn.get("text", "").strip()
+        if not text:
+            continue
+        speaker = "Participant" if turn.get("speaker") == "Subject" else "Interviewer"
+        lines.append(f"{speaker}: {text}")
+    return "\n".join(lines)
+
+
+def participant_turns(session):
+    return [
+        turn.get("text", "").strip()
+        for turn in session.get("dialogue_turns", [])
+        if turn.get("speaker") == "Subject" and turn.get("text", "").strip()
+    ]
+
+
+# ------------------------------ Checkpoint ------------------------------
+def load_checkpoint(output_path):
+    """
+    Return the source files already written. A torn final line left by a crash
+    is truncated away so the file stays valid JSONL.
+    """
+    done = set()
+    if not output_path.exists():
+        return done
+
+    valid_bytes = 0
+    with output_path.open("rb") as f:
+        for raw in f:
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                break
+            if not raw.endswith(b"\n"):
+                break
+            done.add(record["source"])
+            valid_bytes += len(raw)
+
+    if valid_bytes < output_path.stat().st_size:
+        print(f"[batch] Truncating partial record at byte {valid_bytes} of {output_path}")
+        with output_path.open("r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+def append_record(f, record):
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+# ------------------------------ Generation ------------------------------
+def make_generator(backend, model):
+    if backend == "gpt":
+        from memoir_generator_gpt import MemoirGenerator
+        return MemoirGenerator(model=model or "gpt-4o-mini")
+    from memoir_generator_flan import MemoirGenerator
+    return MemoirGenerator(
+        model=model or "google/flan-t5-large",
+        backend="ct2" if backend == "flan-ct2" else "pipeline",
+    )
+
+
+def summarize_emotions(analyses):
+    """Mean emotion vector, overall dominant label and deduplicated entities."""
+    labels = sorted({lbl for _, vec, _ in analyses for lbl in vec})
+    if not labels:
+        return "neutral", {}, []
+    trajectory = EmotionTrajectory(labels, capacity=len(analyses)).extend(vec for _, vec, _ in analyses)
+    mean = {lbl: round(v, 4) for lbl, v in trajectory.mean_dict().items()}
+
+    seen = {}
+    for _, _, ents in analyses:
+        for e in ents:
+            seen.setdefault(e["text"].lower(), e)
+    return max(mean, key=mean.get), mean, list(seen.values())
+
+
+def generate_one(mg, source, session, analyses):
+    start = time.perf_counter()
+    memoir = mg.generate_memoir(build_transcript(session))
+    dominant, mean_vec, entities = summarize_emotions(analyses)
+    return {
+        "source": source,
+        "session_id": session["session_id"],
+        "memoir": memoir,
+        "dominant_emotion": dominant,
+        "emotion_mean": mean_vec,
+        "turn_emotions": [dom for dom, _, _ in analyses],
+        "entities": entities,
+        "n_participant_turns": len(analyses),
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+
+
+def run_batch(args):
+    input_dir = Path(args.input_dir)
+    output_path = Path(args.output)
+    errors_path = output_path.with_suffix(".errors.jsonl")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    files = sorted(glob.glob(str(input_dir / "*.json")))
+    done = load_checkpoint(output_path)
+    pending = [fp for fp in files if Path(fp).name not in done]
+    if args.limit:
+        pending = pending[:args.limit]
+    print(f"[batch] {len(files)} sessions, {len(done)} already done, {len(pending)} to run")
+    if not pending:
+        return
+
+    nlp = NLPPipeline(joint=args.joint)
+    mg = make_generator(args.backend, args.model)
+
+    n_ok = n_failed = 0
+    start = time.perf_counter()
+    with output_path.open("a", encoding="utf-8") as out, \
+            errors_path.open("a", encoding="utf-8") as err, \
+            ThreadPoolExecutor(max_workers=args.workers) as pool:
+
+        # Sessions go through in chunks: one large NLP batch per chunk, then the
+        # chunk's memoirs fan out to the pool. This bounds in-flight work and
+        # memory regardless of corpus size.
+        for chunk_start in range(0, len(pending), args.chunk_size):
+            chunk = [
+                (Path(fp).name, load_session(fp))
+                for fp in pending[chunk_start:chunk_start + args.chunk_size]
+            ]
+
+            texts, owners = [], []
+            for i, (_, session) in enumerate(chunk):
+                for text in participant_turns(session):
+                    texts.append(text)
+                    owners.append(i)
+            analyses = [[] for _ in chunk]
+            for owner, result in zip(owners, nlp.analyze_batch(texts, batch_size=args.nlp_batch_size)):
+                analyses[owner].append(result)
+
+            futures = {
+                pool.submit(generate_one, mg, source, session, analyses[i]): source
+                for i, (source, session) in enumerate(chunk)
+            }
+            for fut in as_completed(futures):
+                source = futures[fut]
+                try:
+                    record = fut.result()
+                except Exception as e:
+                    n_failed += 1
+                    append_record(err, {"source": source, "error": repr(e)})
+                    print(f"[batch] {source} failed: {e!r}")
+                    continue
+                # Writes stay on this thread, so records never interleave.
+                append_record(out, record)
+                n_ok += 1
+                print(f"[batch] {source} done ({n_ok}/{len(pending)})")
+
+    elapsed = time.perf_counter() - start
+    print(f"[batch] Finished {n_ok} sessions in {elapsed:.1f}s, {n_failed} failed")
+    if n_failed:
+        print(f"[batch] Failures logged to {errors_path}; rerun to retry them.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate memoirs for a directory of sessions.")
+    parser.add_argument("input_dir", help="directory of session JSON files (dataset_50 schema)")
+    parser.add_argument("--output", default="memoirs.jsonl", help="JSONL results / checkpoint file")
+    parser.add_argument("--backend", choices=["gpt", "flan", "flan-ct2"], default="gpt")
+    parser.add_argument("--model", default=None, help="override the backend's default model")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent memoir generations")
+    parser.add_argument("--chunk-size", type=int, default=64, help="sessions per NLP batch")
+    parser.add_argument("--nlp-batch-size", type=int, default=64, help="texts per forward pass")
+    parser.add_argument("--limit", type=int, default=0, help="only run N pending sessions")
+    parser.add_argument("--joint", action="store_true", help="use the single-encoder NLP model")
+    run_batch(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Incremental, chapter-by-chapter memoir assembly.
+
+The interview is organised by CATEGORIES, so each category's part of the
+transcript becomes one chapter. A chapter is drafted in the background as
+soon as its category is finished, and cached under a hash of its transcript
+segment (plus the generator and model), in memory and optionally on disk.
+Finishing the memoir is then a cheap pass: wait for any chapter still in
+flight, title the whole thing, and stitch the chapters together. Editing
+one answer only changes that chapter's hash, so only that chapter (and the
+title) is regenerated.
+
+There is deliberately no polish pass over the stitched memoir: it would be
+another LLM call over the whole text at the end of the interview, the very
+latency this module removes, and any edit would invalidate it. Chapters
+share one prompt and voice, so the title is the only whole-memoir call.
+
+    builder = ChapterBuilder(mg, cache_dir="cache/chapters")
+    builder.submit("2. Early Life", early_life_lines)   # returns immediately
+    ...
+    memoir = builder.build({"2. Early Life": early_life_lines, "3. Family": family_lines})
+"""
+import hashlib
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import tracing
+
+
+def chapter_title(category):
+    """'2. Early Life' -> 'Early Life'."""
+    head, _, rest = category.partition(". ")
+    return rest if head.strip().isdigit() and rest else category
+
+
+def _normalize(lines):
+    return "\n".join(" ".join(line.split()) for line in lines if line.strip())
+
+
+@dataclass
+class Chapter:
+    category: str
+    text: str
+    key: str
+    cached: bool = False
+
+
+class ChapterBuilder:
+
+    def __init__(self, memoir_generator, cache_dir=None, workers=1):
+        """
+        :param memoir_generator: GPT or Flan MemoirGenerator (needs generate_chapter and generate_heading)
+        :param cache_dir: keep drafted chapters on disk across runs; None = memory only
+        :param workers: chapters drafted concurrently
+        """
+        self.mg = memoir_generator
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chapter")
+        self._inflight = {}  # category -> (key, Future[Chapter])
+        self._generator_id = f"{type(self.mg).__module__}:{getattr(self.mg, 'model', '')}"
+
+    # ------------------------------ Cache ------------------------------
+    def _key(self, kind, text):
+        payload = f"{self._generator_id}\n{kind}\n{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _load(self, key):
+        if key in self._memory:
+            return self._memory[key]
+        if self.cache_dir and (self.cache_dir / f"{key}.json").exists():
+            with (self.cache_dir / f"{key}.json").open("r", encoding="utf-8") as f:
+                text = json.load(f)["text"]
+            self._memory[key] = text
+            return text
+        return None
+
+    def _store(self, key, text):
+        self._memory[key] = text
+        if self.cache_dir:
+            tmp = self.cache_dir / f"{key}.json.tmp"
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"text": text}, f, ensure_ascii=False)
+            tmp.replace(self.cache_dir / f"{key}.json")
+
+    # ------------------------------ Chapters ------------------------------
+    def _draft(self, category, segment, key):
+        with tracing.span("chapter.draft", category=category, chars=len(segment)):
+            text = self.mg.generate_chapter(segment, chapter_title(category))
+        self._store(key, text)
+        return Chapter(category, text, key)
+
+    def submit(self, category, lines):
+        """
+        Start drafting `category`'s chapter from its transcript lines, unless
+        an identical segment is cached or already being drafted. Returns a
+        Future[Chapter].
+        """
+        segment = _normalize(lines)
+        key = self._key(category, segment)
+        current = self._inflight.get(category)
+        if current is not None and current[0] == key:
+            return current[1]
+
+        cached = self._load(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(Chapter(category, cached, key, cached=True))
+        else:
+            future = self._pool.submit(self._draft, category, segment, key)
+        self._inflight[category] = (key, future)
+        return future
+
+    def chapter(self, category):
+        return self._inflight[category][1].result()
+
+    # ------------------------------ Assembly ------------------------------
+    def stitch(self, chapters):
+        """Title the memoir and join the chapters in order."""
+        body = "\n\n".join(f"## {chapter_title(c.category)}\n\n{c.text}" for c in chapters)
+        key = self._key("heading", "\n".join(c.key for c in chapters))
+        heading = self._load(key)
+        if heading is None:
+            with tracing.span("chapter.heading"):
+                heading = self.mg.generate_heading(body)
+            self._store(key, heading)
+        return f"**{heading}**\n\n{body}"
+
+    def build(self, segments):
+        """
+        Full memoir from an ordered {category: transcript lines} mapping.
+        Unchanged chapters come from the cache; only edited or new ones are drafted.
+        """
+        futures = [self.submit(category, lines) for category, lines in segments.items() if lines]
+        with tracing.span("chapter.wait", chapters=len(futures)):
+            chapters = [f.result() for f in futures]
+        return self.stitch(chapters)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,174 @@
+"""
+Per-session emotion trajectory: one float32 row of emotion scores per turn.
+
+Rows are aligned to a fixed label order (the emotion model's label set,
+taken from the first vector appended unless given) and stored in a
+preallocated matrix that doubles when full, so append() is amortised
+O(labels). A running sum and a running exponentially-weighted mean are
+updated on append, so the session mean and the "current mood" are O(labels)
+at any time; rolling windows and peaks are single vectorised passes.
+
+    traj = EmotionTrajectory()
+    for emo_vec in per_turn_vectors:
+        traj.append(emo_vec)
+    traj.mean_dict(); traj.rolling_mean(3); traj.peaks()
+    traj.save("session.npy"); EmotionTrajectory.load("session.npy")  # memory-mapped
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+def _ewma_weights(n, alpha):
+    # Closed form of e_0 = r_0, e_i = alpha * r_i + (1 - alpha) * e_(i-1):
+    # turn i weighs alpha * (1 - alpha)^(n-1-i), the first turn (1 - alpha)^(n-1).
+    decay = (1 - alpha) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    weights = alpha * decay
+    weights[0] = decay[0]
+    return weights
+
+
+class EmotionTrajectory:
+
+    def __init__(self, labels=None, capacity=32, alpha=0.3):
+        """
+        :param labels: label order; None = the keys of the first appended vector
+        :param capacity: initial number of rows
+        :param alpha: weight of the newest turn in the running EWMA
+        """
+        self.labels = None
+        self.alpha = alpha
+        self.n = 0
+        self._capacity = capacity
+        if labels is not None:
+            self._init_labels(labels)
+
+    def _init_labels(self, labels):
+        self.labels = tuple(labels)
+        self._index = {lbl: i for i, lbl in enumerate(self.labels)}
+        self._data = np.zeros((self._capacity, len(self.labels)), dtype=np.float32)
+        self._sum = np.zeros(len(self.labels), dtype=np.float64)
+        self._ewma = np.zeros(len(self.labels), dtype=np.float64)
+
+    # ------------------------------ Building ------------------------------
+    def _row(self, emo_vec):
+        row = np.zeros(len(self.labels), dtype=np.float32)
+        for lbl, score in emo_vec.items():
+            i = self._index.get(lbl)
+            if i is not None:
+                row[i] = score
+        return row
+
+    def append(self, emo_vec):
+        """Add one turn's {label: score}; labels outside the label set are ignored."""
+        if self.labels is None:
+            self._init_labels(emo_vec)
+        if self.n == len(self._data):
+            grown = np.zeros((max(1, 2 * len(self._data)), len(self.labels)), dtype=np.float32)
+            grown[:self.n] = self._data[:self.n]
+            self._data = grown
+
+        row = self._row(emo_vec)
+        self._data[self.n] = row
+        self._sum += row
+        self._ewma = row if self.n == 0 else self.alpha * row + (1 - self.alpha) * self._ewma
+        self.n += 1
+        return self.n - 1
+
+    def extend(self, emo_vecs):
+        for vec in emo_vecs:
+            self.append(vec)
+        return self
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def matrix(self):
+        """(turns, labels) float32 view; no copy."""
+        if self.labels is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._data[:self.n]
+
+    # ------------------------------ Statistics ------------------------------
+    def as_dict(self, vec):
+        return {lbl: float(v) for lbl, v in zip(self.labels, vec)}
+
+    def mean(self):
+        return self._sum / self.n if self.n else np.zeros(len(self.labels or ()))
+
+    def mean_dict(self):
+        return self.as_dict(self.mean()) if self.n else {}
+
+    def ewma(self, alpha=None):
+        """Exponentially-weighted mean with the newest turn weighted `alpha`."""
+        if not self.n:
+            return np.zeros(len(self.labels or ()))
+        if alpha is None or alpha == self.alpha:
+            return self._ewma.copy()
+        return _ewma_weights(self.n, alpha) @ self.matrix
+
+    def rolling_mean(self, window):
+        """(turns, labels) trailing mean over the last `window` turns (fewer at the start)."""
+        m = self.matrix.astype(np.float64)
+        csum = np.vstack([np.zeros((1, m.shape[1])), np.cumsum(m, axis=0)])
+        idx = np.arange(1, self.n + 1)
+        lo = np.maximum(idx - window, 0)
+        return (csum[idx] - csum[lo]) / (idx - lo)[:, None]
+
+    def intensity(self):
+        """Per-turn emotional intensity: 1 - P(neutral) when there is a neutral label, else the max score."""
+        if not self.n:
+            return np.zeros(0, dtype=np.float32)
+        m = self.matrix
+        if "neutral" in self._index:
+            return 1.0 - m[:, self._index["neutral"]]
+        return m.max(axis=1)
+
+    def peaks(self, label=None, k=3, min_height=0.0):
+        """
+        Turn indices of the `k` highest local maxima of one label's score
+        (or of intensity), highest first.
+        """
+        s = self.intensity() if label is None else self.matrix[:, self._index[label]]
+        if len(s) == 0:
+            return np.zeros(0, dtype=np.int64)
+        padded = np.concatenate([[-np.inf], s, [-np.inf]])
+        is_peak = (padded[1:-1] > padded[:-2]) & (padded[1:-1] >= padded[2:]) & (s >= min_height)
+        idx = np.flatnonzero(is_peak)
+        return idx[np.argsort(-s[idx], kind="stable")][:k]
+
+    def dominant(self):
+        """Dominant label per turn."""
+        return [self.labels[i] for i in self.matrix.argmax(axis=1)] if self.n else []
+
+    # ------------------------------ Persistence ------------------------------
+    @staticmethod
+    def _labels_path(path):
+        return Path(path).with_suffix(".labels.json")
+
+    def save(self, path):
+        """Matrix as `path` (.npy) plus the label order in a .labels.json sidecar."""
+        path = Path(path).with_suffix(".npy")
+        np.save(path, self.matrix)
+        with self._labels_path(path).open("w", encoding="utf-8") as f:
+            json.dump({"labels": list(self.labels or ()), "alpha": self.alpha}, f)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a saved trajectory; with mmap the rows are not read until used."""
+        path = Path(path).with_suffix(".npy")
+        with cls._labels_path(path).open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        data = np.load(path, mmap_mode="r" if mmap else None)
+
+        traj = cls(labels=meta["labels"], capacity=0, alpha=meta.get("alpha", 0.3))
+        # Backed by the (read-only) file until the first append grows it into memory.
+        traj._data = data
+        traj.n = len(data)
+        if traj.n:
+            traj._sum = data.sum(axis=0, dtype=np.float64)
+            traj._ewma = _ewma_weights(traj.n, traj.alpha) @ data
+        return traj
@@ -0,0 +1,120 @@
+"""
+Int8 CPU generation for Flan-T5 with CTranslate2.
+
+The Hugging Face checkpoint is converted once into an int8 CTranslate2 model
+directory (weights quantised, decoder self-attention cached between steps),
+then wrapped in a callable with the text2text-generation pipeline's call
+signature, so memoir_generator_flan.MemoirGenerator can use it unchanged:
+
+    mg = MemoirGenerator(backend="ct2")
+    # or, explicitly:
+    mg = MemoirGenerator(generator=CT2Text2TextGenerator("google/flan-t5-large"))
+
+Convert ahead of time (otherwise it happens on first use):
+
+    python src/flan_ct2.py --model google/flan-t5-large
+"""
+import argparse
+import os
+import re
+from pathlib import Path
+
+MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
+
+
+def default_output_dir(model_name, quantization="int8"):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", model_name.split("/")[-1]).strip("-").lower()
+    return MODELS_DIR / f"{slug}-ct2-{quantization}"
+
+
+def convert(model_name, output_dir=None, quantization="int8", force=False):
+    """Convert a Hugging Face seq2seq checkpoint; returns the CTranslate2 model directory."""
+    from ctranslate2.converters import TransformersConverter
+
+    output_dir = Path(output_dir or default_output_dir(model_name, quantization))
+    if force or not (output_dir / "model.bin").exists():
+        TransformersConverter(model_name).convert(str(output_dir), quantization=quantization, force=True)
+    return output_dir
+
+
+class CT2Text2TextGenerator:
+
+    # __call__ takes per-prompt decoder prefixes (memoir_generator_flan uses
+    # this to decode heading and body in one translate_batch call).
+    supports_prefix = True
+
+    def __init__(
+        self,
+        model="google/flan-t5-large",
+        model_dir=None,
+        compute_type="int8",
+        intra_threads=0,
+        inter_threads=1,
+    ):
+        """
+        :param model: Hugging Face name, for the tokenizer and (first use) the conversion
+        :param model_dir: converted model directory; default models/<name>-ct2-int8
+        :param intra_threads: threads per generation call (0 = all cores)
+        :param inter_threads: generation calls that may run in parallel
+        """
+        import ctranslate2
+        from transformers import AutoTokenizer
+
+        model_dir = convert(model, model_dir, quantization=compute_type)
+        self.translator = ctranslate2.Translator(
+            str(model_dir), device="cpu", compute_type=compute_type,
+            intra_threads=intra_threads, inter_threads=inter_threads,
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+
+    def _tokens(self, text):
+        return self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(text))
+
+    def _decode(self, tokens):
+        return self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(tokens), skip_special_tokens=True)
+
+    def __call__(self, prompts, max_new_tokens=256, do_sample=False, temperature=1.0, top_p=1.0,
+                 prefixes=None, **_):
+        """
+        Same arguments and output shape as the text2text-generation pipeline.
+        prefixes: optional decoder prefix per prompt (or None), forced at the
+        start of its output and left out of the generated text.
+        """
+        single = isinstance(prompts, str)
+        batch = [prompts] if single else list(prompts)
+        prefix_tokens = [
+            self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(p, add_special_tokens=False)) if p else []
+            for p in (prefixes or [None] * len(batch))
+        ]
+        results = self.translator.translate_batch(
+            [self._tokens(p) for p in batch],
+            target_prefix=[t or None for t in prefix_tokens] if prefixes else None,
+            beam_size=1,
+            max_input_length=0,  # the pipeline does not truncate either
+            max_decoding_length=max_new_tokens,
+            # topk=0 samples from the full (top_p-filtered) distribution, 1 is greedy
+            sampling_topk=0 if do_sample else 1,
+            sampling_topp=top_p if do_sample else 1.0,
+            sampling_temperature=temperature if do_sample else 1.0,
+        )
+        outputs = [
+            [{"generated_text": self._decode(r.hypotheses[0][len(t):])}] for r, t in zip(results, prefix_tokens)
+        ]
+        return outputs[0] if single else outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a Flan-T5 checkpoint to int8 CTranslate2.")
+    parser.add_argument("--model", default="google/flan-t5-large")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--quantization", default="int8")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    out = convert(args.model, args.output, args.quantization, force=args.force)
+    size = sum(f.stat().st_size for f in out.iterdir() if f.is_file())
+    print(f"Saved {args.quantization} model to {out} ({size / 2**20:.0f} MB, {os.cpu_count()} cores available)")
+
+
+if __name__ == "__main__":
+    main()
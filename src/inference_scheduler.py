@@ -0,0 +1,210 @@
+"""
+Dynamic micro-batching for NLP inference.
+
+Callers on any thread submit single texts and get a Future back. Dedicated
+worker threads gather whatever is queued into one batch, bounded by
+max_batch_size and max_wait_ms, run a single batched forward pass, and
+resolve each caller's Future with its own result.
+
+    scheduler = InferenceScheduler.for_pipeline(NLPPipeline())
+    dominant, emo_vec, entities = scheduler.analyze(text)   # drop-in for nlp.analyze
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import tracing
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the request queue is at capacity."""
+
+
+class SchedulerClosed(RuntimeError):
+    """Raised by submit() once close() has been called."""
+
+
+_STOP = object()
+
+
+class InferenceScheduler:
+
+    def __init__(
+        self,
+        batch_fn,
+        max_batch_size=16,
+        max_wait_ms=5.0,
+        max_queue=1024,
+        workers=1,
+        name="nlp",
+    ):
+        """
+        :param batch_fn: callable taking a list of inputs, returning a list of results
+        :param max_batch_size: upper bound on items per forward pass
+        :param max_wait_ms: how long the first item of a batch may wait for company
+        :param max_queue: pending items before submit() raises QueueFull
+        :param workers: worker threads pulling batches from the shared queue
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-scheduler-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = {}
+        self._queue_depths = {}
+        self._items = 0
+        self._batches = 0
+        self._busy_s = 0.0
+        self._wait_s = 0.0
+        # Guards _started/_closed, so submit() and start() cannot race and
+        # nothing is queued behind the stop sentinels.
+        self._lifecycle = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    @classmethod
+    def for_pipeline(cls, nlp, **kwargs):
+        """Scheduler over NLPPipeline.analyze_batch."""
+        return cls(nlp.analyze_batch, **kwargs)
+
+    # ------------------------------ Lifecycle ------------------------------
+    def start(self):
+        with self._lifecycle:
+            self._start()
+        return self
+
+    def _start(self):
+        if self._closed:
+            raise SchedulerClosed(f"{self.name} scheduler is closed")
+        if not self._started:
+            self._started = True
+            for t in self._threads:
+                t.start()
+
+    def close(self, timeout=None):
+        """Finish queued work, then stop the workers. A closed scheduler cannot be restarted."""
+        with self._lifecycle:
+            if self._closed:
+                return
+            self._closed = True
+            started = self._started
+        if not started:
+            return
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ------------------------------ Client API ------------------------------
+    def submit(self, item):
+        fut = Future()
+        with self._lifecycle:
+            self._start()
+            try:
+                self._queue.put_nowait((item, fut, time.perf_counter()))
+            except queue.Full:
+                raise QueueFull(f"{self.name} scheduler queue is full ({self._queue.maxsize})")
+        return fut
+
+    def analyze(self, text, timeout=None):
+        """Blocking, NLPPipeline.analyze-compatible call."""
+        return self.submit(text).result(timeout)
+
+    # ------------------------------ Worker ------------------------------
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Let a sibling (or this worker's next loop) see the sentinel.
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            depth = self._queue.qsize()
+            # Drop requests whose caller already cancelled the Future.
+            batch = [b for b in batch if b[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            inputs = [item for item, _, _ in batch]
+            start = time.perf_counter()
+            waited = sum(start - enqueued for _, _, enqueued in batch)
+            try:
+                with tracing.span(f"{self.name}.batch", size=len(batch)):
+                    results = list(self.batch_fn(inputs))
+                if len(results) != len(batch):
+                    # Which result belongs to whom is unknown: fail every caller
+                    # rather than leave some waiting forever.
+                    raise RuntimeError(
+                        f"{self.name} batch_fn returned {len(results)} results for {len(batch)} inputs"
+                    )
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                results = None
+            busy = time.perf_counter() - start
+
+            if results is not None:
+                for (_, fut, _), result in zip(batch, results):
+                    fut.set_result(result)
+            self._record(len(batch), depth, busy, waited)
+
+    # ------------------------------ Metrics ------------------------------
+    def _record(self, size, depth, busy, waited):
+        bucket = 0 if depth == 0 else 1 << (depth - 1).bit_length()
+        with self._stats_lock:
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._queue_depths[bucket] = self._queue_depths.get(bucket, 0) + 1
+            self._items += size
+            self._batches += 1
+            self._busy_s += busy
+            self._wait_s += waited
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        queue_depth_histogram buckets the depth left behind after each batch
+        was formed into powers of two (0, 1, 2, 4, 8, ...).
+        """
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_depth_histogram": dict(sorted(self._queue_depths.items())),
+                "mean_queue_wait_ms": 1000.0 * self._wait_s / self._items if self._items else 0.0,
+                "busy_s": self._busy_s,
+            }
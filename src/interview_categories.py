@@ -0,0 +1,31 @@
+"""
+Interview categories, shared by the CLI interview (memoir_interview.py) and
+the HTTP server (interview_server.py) without either importing the other.
+"""
+
+CATEGORIES = [
+    "1. Introduction",
+    "2. Early Life",
+    "3. Family",
+    "4. Education",
+    "5. Career",
+    "6. Love & Relationship",
+    "7. Passions & Hobbies",
+    "8. Challenges",
+    "9. Reflections"
+]
+
+
+def resolve_category(user_input):
+    """Match a number ('3') or (partial) name ('family') to a CATEGORIES entry."""
+    user_input = user_input.strip().lower()
+    if not user_input:
+        return None
+    for cat in CATEGORIES:
+        if user_input == cat.split(".")[0] or user_input in cat.lower():
+            return cat
+    return None
+
+
+def next_category(category):
+    return CATEGORIES[(CATEGORIES.index(category) + 1) % len(CATEGORIES)]
@@ -0,0 +1,98 @@
+"""
+Local test client for interview_server.py.
+
+Opens N concurrent interview sessions and replays the participant turns of
+data/dataset_50 sessions through them, then reports per-turn latency and how
+the server batched the analyze calls.
+
+    python src/interview_client.py --url http://127.0.0.1:8080 --sessions 20
+"""
+import argparse
+import asyncio
+import glob
+import json
+import time
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+from interview_categories import CATEGORIES
+
+N_CATEGORIES = len(CATEGORIES)  # selected by number
+
+
+def load_participant_turns(data_dir, n):
+    sessions = []
+    files = sorted(glob.glob(str(Path(data_dir) / "*.json")))
+    for fp in files[:n] if n else files:
+        with open(fp, "r", encoding="utf-8") as f:
+            session = json.load(f)
+        sessions.append([
+            t["text"] for t in session.get("dialogue_turns", [])
+            if t.get("speaker") == "Subject" and t.get("text", "").strip()
+        ])
+    return sessions
+
+
+async def post_with_retry(http, url, payload, retries=20):
+    """POST, backing off on 429/503 as the server asks."""
+    for attempt in range(retries):
+        async with http.post(url, json=payload) as resp:
+            if resp.status in (429, 503):
+                delay = float(resp.headers.get("Retry-After", 0.05 * (attempt + 1)))
+                await asyncio.sleep(delay)
+                continue
+            resp.raise_for_status()
+            return await resp.json()
+    raise RuntimeError(f"gave up on {url} after {retries} retries")
+
+
+async def run_session(http, base_url, idx, turns, latencies, finish):
+    category = str(idx % N_CATEGORIES + 1)
+    created = await post_with_retry(http, f"{base_url}/sessions", {"category": category})
+    session_id = created["session_id"]
+
+    for text in turns:
+        start = time.perf_counter()
+        await post_with_retry(http, f"{base_url}/sessions/{session_id}/responses", {"text": text})
+        latencies.append(time.perf_counter() - start)
+
+    if finish:
+        await post_with_retry(http, f"{base_url}/sessions/{session_id}/finish", {})
+
+
+async def main_async(args):
+    sessions = load_participant_turns(args.data_dir, args.sessions)
+    latencies = []
+    start = time.perf_counter()
+
+    async with aiohttp.ClientSession() as http:
+        await asyncio.gather(*[
+            run_session(http, args.url, i, turns, latencies, args.finish)
+            for i, turns in enumerate(sessions)
+        ])
+        async with http.get(f"{args.url}/stats") as resp:
+            stats = await resp.json()
+
+    elapsed = time.perf_counter() - start
+    ms = np.asarray(latencies) * 1000.0
+    print(f"Sessions: {len(sessions)}  Turns: {ms.size}  Wall: {elapsed:.1f}s  "
+          f"Throughput: {ms.size / elapsed:.1f} turns/s")
+    if ms.size:
+        print(f"Turn latency ms  p50={np.percentile(ms, 50):.1f}  "
+              f"p95={np.percentile(ms, 95):.1f}  p99={np.percentile(ms, 99):.1f}")
+    print(f"Server stats: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the interview server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--data-dir", default="data/dataset_50")
+    parser.add_argument("--finish", action="store_true", help="request a memoir at the end")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Multi-session interview service.
+
+One process hosts many concurrent interviews. Each session keeps its own
+DialogueState and transcript, while a single shared NLPPipeline serves every
+session through an InferenceScheduler: analyze requests arriving from
+different sessions within a few milliseconds run as one batched forward pass.
+
+    python src/interview_server.py --port 8080
+    python src/interview_client.py --sessions 20
+
+Endpoints (JSON):
+    POST /sessions                    {"category": "3"}      -> first question
+    POST /sessions/{id}/responses     {"text": "..."}        -> next question
+    POST /sessions/{id}/finish                               -> memoir
+    GET  /sessions/{id}                                      -> session summary
+    GET  /stats                                              -> queue / batch stats
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from aiohttp import web
+
+from inference_scheduler import InferenceScheduler, QueueFull
+from interview_categories import CATEGORIES, resolve_category
+from nlp_pipeline import NLPPipeline
+from question_generator import EmotionAwareQuestionGenerator, DialogueState
+from question_planner import QuestionPlanner
+from question_retrieval import load_retriever
+import tracing
+
+
+# ------------------------------ Sessions ------------------------------
+@dataclass
+class InterviewSession:
+    session_id: str
+    category: str
+    state: DialogueState = field(default_factory=DialogueState)
+    transcript_lines: List[str] = field(default_factory=list)
+    last_question: Optional[str] = None
+    busy: bool = False
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class InterviewService:
+    def __init__(self, scheduler, memoir_generator=None, idle_timeout_s=1800, max_sessions=1000, retriever=None):
+        self.scheduler = scheduler
+        # One immutable planner (and question index) for all sessions; progress
+        # lives in each DialogueState.
+        self.qg = EmotionAwareQuestionGenerator(planner=QuestionPlanner.load(), retriever=retriever)
+        self.mg = memoir_generator
+        self.idle_timeout_s = idle_timeout_s
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.memoir_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memoir")
+
+    def _ask(self, session, dominant_emotion="neutral", entities=None):
+        question = self.qg.generate(
+            dominant_emotion=dominant_emotion,
+            entities=entities or [],
+            state=session.state,
+            category=session.category,
+        )
+        session.last_question = f"[Category: {session.category}] {question}"
+        return session.last_question
+
+    def _get(self, request):
+        session = self.sessions.get(request.match_info["session_id"])
+        if session is None:
+            raise web.HTTPNotFound(reason="unknown session")
+        session.last_active = time.monotonic()
+        return session
+
+    # ---------------- Handlers ----------------
+    async def create_session(self, request):
+        body = await request.json() if request.can_read_body else {}
+        category = resolve_category(str(body.get("category", "")))
+        if category is None:
+            raise web.HTTPBadRequest(reason=f"category must be one of {CATEGORIES}")
+        if len(self.sessions) >= self.max_sessions:
+            raise web.HTTPServiceUnavailable(reason="session limit reached")
+
+        session = InterviewSession(session_id=uuid.uuid4().hex, category=category)
+        self.sessions[session.session_id] = session
+        return web.json_response({
+            "session_id": session.session_id,
+            "category": category,
+            "question": self._ask(session),
+        })
+
+    async def respond(self, request):
+        session = self._get(request)
+        body = await request.json()
+        text = str(body.get("text", "")).strip()
+        if not text:
+            raise web.HTTPBadRequest(reason="empty response")
+
+        # Per-session backpressure: one turn in flight per session.
+        if session.busy:
+            raise web.HTTPTooManyRequests(reason="previous response still processing")
+        session.busy = True
+        try:
+            with tracing.span("server.turn", session=session.session_id):
+                try:
+                    fut = self.scheduler.submit(text)
+                    dominant, emo_vec, entities = await asyncio.wrap_future(fut)
+                except QueueFull:
+                    raise web.HTTPServiceUnavailable(
+                        reason="analysis queue full", headers={"Retry-After": "1"}
+                    )
+
+                session.transcript_lines.append(f"Melo: {session.last_question}")
+                session.transcript_lines.append(f"Participant: {text}")
+                session.state.history.append(text)
+                if self.qg.retriever is not None:
+                    # Embedding the response takes milliseconds: keep it off the event loop.
+                    question = await asyncio.get_running_loop().run_in_executor(
+                        None, self._ask, session, dominant, entities
+                    )
+                else:
+                    question = self._ask(session, dominant, entities)
+        finally:
+            session.busy = False
+
+        return web.json_response({
+            "question": question,
+            "dominant_emotion": dominant,
+            "emotions": emo_vec,
+            "entities": entities,
+        })
+
+    async def finish(self, request):
+        session = self._get(request)
+        if session.busy:
+            raise web.HTTPTooManyRequests(reason="previous response still processing")
+        self.sessions.pop(session.session_id, None)
+
+        transcript = "\n".join(session.transcript_lines).strip()
+        memoir = None
+        if self.mg is not None and transcript:
+            loop = asyncio.get_running_loop()
+            memoir = await loop.run_in_executor(
+                self.memoir_executor, self.mg.generate_memoir, transcript
+            )
+        return web.json_response({
+            "session_id": session.session_id,
+            "turns": len(session.state.history),
+            "transcript": transcript,
+            "memoir": memoir,
+        })
+
+    async def describe(self, request):
+        session = self._get(request)
+        return web.json_response({
+            "session_id": session.session_id,
+            "category": session.category,
+            "turns": len(session.state.history),
+            "last_question": session.last_question,
+        })
+
+    async def stats(self, request):
+        return web.json_response({"sessions": len(self.sessions), **self.scheduler.stats()})
+
+    async def reap_idle_sessions(self):
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - self.idle_timeout_s
+            for sid in [s.session_id for s in self.sessions.values() if s.last_active < cutoff]:
+                self.sessions.pop(sid, None)
+
+
+def build_app(nlp, memoir_generator=None, max_batch_size=16, max_wait_ms=10, workers=1, retriever=None):
+    scheduler = InferenceScheduler.for_pipeline(
+        nlp, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, max_queue=256, workers=workers
+    )
+    service = InterviewService(scheduler, memoir_generator, retriever=retriever)
+
+    app = web.Application()
+    app.add_routes([
+        web.post("/sessions", service.create_session),
+        web.post("/sessions/{session_id}/responses", service.respond),
+        web.post("/sessions/{session_id}/finish", service.finish),
+        web.get("/sessions/{session_id}", service.describe),
+        web.get("/stats", service.stats),
+    ])
+
+    async def on_startup(app):
+        scheduler.start()
+        app["reaper"] = asyncio.create_task(service.reap_idle_sessions())
+
+    async def on_cleanup(app):
+        app["reaper"].cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, scheduler.close)
+        # shutdown() waits (wait=True) for memoirs already being written.
+        await loop.run_in_executor(None, service.memoir_executor.shutdown)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app["service"] = service
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many concurrent memoir interviews.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=1, help="model worker threads")
+    parser.add_argument("--prefork", type=int, default=0,
+                        help="serve the models from N forked processes sharing one copy of the weights")
+    parser.add_argument("--memoir", choices=["none", "gpt", "flan"], default="gpt")
+    parser.add_argument("--joint", action="store_true", help="use the single-encoder NLP model")
+    parser.add_argument("--question-index", default=None,
+                        help="question index directory, or 'off' (default: MELO_QUESTION_INDEX, "
+                             "else models/question_index if built)")
+    args = parser.parse_args()
+
+    tracing.enable_from_env()
+    nlp = NLPPipeline(joint=args.joint)
+    workers = args.workers
+    if args.prefork:
+        from prefork_server import PreforkAnalyzer
+        # Fork before the event loop and HTTP clients exist; one scheduler
+        # thread per process keeps every worker busy.
+        nlp = PreforkAnalyzer(workers=args.prefork, nlp=nlp)
+        workers = args.prefork
+    mg = None
+    if args.memoir == "gpt":
+        from memoir_generator_gpt import MemoirGenerator
+        mg = MemoirGenerator(model="gpt-4o-mini")
+    elif args.memoir == "flan":
+        from memoir_generator_flan import MemoirGenerator
+        mg = MemoirGenerator()
+
+    # Loaded after the prefork workers are forked, so they do not inherit the
+    # embedder (replacement workers still do; see prefork_server).
+    retriever = load_retriever(args.question_index)
+    app = build_app(nlp, mg, args.max_batch_size, args.max_wait_ms, workers, retriever=retriever)
+    if args.prefork:
+        # Runs after build_app's cleanup has drained the scheduler.
+        async def close_prefork(app):
+            await asyncio.get_running_loop().run_in_executor(None, nlp.close)
+
+        app.on_cleanup.append(close_prefork)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
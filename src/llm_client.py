@@ -0,0 +1,313 @@
+"""
+Rate-limited, retrying OpenAI client shared by all LLM callers.
+
+RateLimitedClient wraps an OpenAI client (or anything exposing
+chat.completions.create) and is itself a drop-in for one. Every call:
+
+  1. waits for a concurrency slot in an AIMD window: the number of calls in
+     flight grows by one per window of successes and halves on a 429, so
+     concurrency settles just under what the provider accepts;
+  2. takes one request from a requests-per-minute token bucket and its
+     estimated tokens (prompt + max completion) from a tokens-per-minute
+     bucket, then corrects the estimate with the reported usage;
+  3. retries 429s, 5xx and connection errors with full-jitter exponential
+     backoff, honouring Retry-After;
+  4. gives up with DeadlineExceeded once its deadline (waiting, calls and
+     backoff included) has passed.
+
+    client = shared_client()   # one per process, limits from MELO_OPENAI_RPM / MELO_OPENAI_TPM
+    client.chat.completions.create(model=..., messages=..., deadline=30)
+
+scripts/fake_openai_server.py serves a local endpoint that enforces limits
+and injects 429/500 responses; benchmarks/bench_llm_client.py drives it.
+"""
+import os
+import random
+import threading
+import time
+import types
+
+import tracing
+from transcript_compactor import approx_token_count
+
+try:
+    import openai
+    _TRANSIENT_ERRORS = (openai.APIConnectionError, openai.APITimeoutError, ConnectionError, TimeoutError)
+except ImportError:
+    openai = None
+    _TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+DEFAULT_COMPLETION_TOKENS = 1024
+
+
+class LLMError(Exception):
+    """A call failed for good (non-retryable error, or retries exhausted)."""
+
+
+class DeadlineExceeded(LLMError):
+    """A call could not complete before its deadline."""
+
+
+# ------------------------------ Limiters ------------------------------
+class TokenBucket:
+    """`rate` units per second, bursts up to `capacity`. Thread-safe."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._level = self.capacity
+        self._stamp = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, amount=1.0, deadline=None):
+        """
+        Block until `amount` is available and take it. Returns False, taking
+        nothing, if that cannot happen before `deadline` (monotonic time).
+        """
+        # A request bigger than the bucket could never be served: let it
+        # through once the bucket is full and charge all of it, driving the
+        # level negative, so later callers wait until it has been paid back.
+        amount = float(amount)
+        needed = min(amount, self.capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                if self._level >= needed:
+                    self._level -= amount
+                    return True
+                wait = (needed - self._level) / self.rate
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    return False
+                self._cond.wait(wait)
+
+    def adjust(self, delta):
+        """Give back (delta > 0) or charge (delta < 0) units after the fact."""
+        with self._cond:
+            self._refill()
+            self._level = min(self.capacity, self._level + delta)
+            self._cond.notify_all()
+
+
+class AIMDWindow:
+    """
+    Concurrency limit with additive increase / multiplicative decrease:
+    +1 slot per full window of successes, x`decrease` on throttling (at most
+    once per round trip, so one burst of 429s only halves it once).
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline=None):
+        """Wait for a slot; returns the acquire time, or None if the deadline passed."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return None
+                self._cond.wait(timeout)
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self, started):
+        """`started`: when the throttled call acquired its slot."""
+        with self._cond:
+            if started >= self._last_decrease:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = time.monotonic()
+
+
+# ------------------------------ Client ------------------------------
+def _status(exc):
+    return getattr(exc, "status_code", None)
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(exc):
+    return _status(exc) in RETRY_STATUSES or isinstance(exc, _TRANSIENT_ERRORS)
+
+
+class RateLimitedClient:
+
+    def __init__(
+        self,
+        client=None,
+        requests_per_minute=500,
+        tokens_per_minute=200_000,
+        max_retries=6,
+        base_delay=0.5,
+        max_delay=20.0,
+        deadline=120.0,
+        window=None,
+        count_tokens=None,
+    ):
+        """
+        :param client: underlying client; defaults to OpenAI(max_retries=0),
+                       so retries happen here, under the limits
+        :param requests_per_minute / tokens_per_minute: provider limits
+        :param max_retries: retries per call after the first attempt
+        :param base_delay / max_delay: backoff before retry n is uniform in
+                                       [0, min(max_delay, base_delay * 2^n)]
+        :param deadline: default seconds per call, including waits and retries
+        :param window: AIMDWindow (default: starts at 4 in flight)
+        :param count_tokens: callable text -> tokens for the token bucket estimate
+        """
+        if client is None:
+            if openai is None:
+                raise LLMError("the openai package is required when no client is given")
+            client = openai.OpenAI(max_retries=0)
+        self.client = client
+        # Providers enforce per-minute limits over short intervals: allow
+        # bursts of at most one second's worth.
+        self.requests = TokenBucket(requests_per_minute / 60.0, capacity=max(1.0, requests_per_minute / 60.0))
+        self.tokens = TokenBucket(tokens_per_minute / 60.0)
+        self.window = window or AIMDWindow()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.count_tokens = count_tokens or approx_token_count
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "server_errors": 0,
+                       "failures": 0, "deadline_exceeded": 0, "tokens": 0}
+        # Same shape as OpenAI(): client.chat.completions.create(...)
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats, window=round(self.window.limit, 2), in_flight=self.window.in_flight)
+
+    def estimate_tokens(self, kwargs):
+        prompt = sum(self.count_tokens(m.get("content") or "") + 4 for m in kwargs.get("messages", []))
+        completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+        return prompt + completion
+
+    def _backoff(self, attempt, exc):
+        delay = random.uniform(0.0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _retry_after(exc)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _attempt(self, kwargs, estimate, deadline):
+        """One call under the concurrency window and both buckets."""
+        started = self.window.acquire(deadline)
+        if started is None:
+            raise DeadlineExceeded("no concurrency slot before the deadline")
+        try:
+            if not self.requests.acquire(1, deadline):
+                raise DeadlineExceeded("rate limit budget not available before the deadline")
+            if not self.tokens.acquire(estimate, deadline):
+                # No request is sent: give back the request unit already taken.
+                self.requests.adjust(1)
+                raise DeadlineExceeded("rate limit budget not available before the deadline")
+            self._count(attempts=1)
+            try:
+                response = self.client.chat.completions.create(
+                    **kwargs, timeout=max(0.1, deadline - time.monotonic())
+                )
+            except Exception as exc:
+                if _status(exc) == 429:
+                    self.window.on_throttle(started)
+                raise
+            usage = getattr(response, "usage", None)
+            used = getattr(usage, "total_tokens", None)
+            if used is not None:
+                # The full estimate was charged (see TokenBucket.acquire), so
+                # this refund can never exceed what was taken.
+                self.tokens.adjust(estimate - used)
+                self._count(tokens=used)
+            self.window.on_success()
+            return response
+        finally:
+            self.window.release()
+
+    def create(self, deadline=None, **kwargs):
+        """
+        chat.completions.create with limits, retries and a deadline.
+        :param deadline: seconds for this call (default: the client's)
+        """
+        end = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        estimate = self.estimate_tokens(kwargs)
+        self._count(calls=1)
+
+        with tracing.span("llm.call", model=kwargs.get("model"), est_tokens=estimate) as sp:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self._attempt(kwargs, estimate, end)
+                    sp.set_attribute("attempts", attempt + 1)
+                    return response
+                except DeadlineExceeded:
+                    self._count(deadline_exceeded=1)
+                    raise
+                except Exception as exc:
+                    if not _is_retryable(exc):
+                        self._count(failures=1)
+                        raise
+                    if _status(exc) == 429:
+                        self._count(throttled=1)
+                    elif _status(exc) is not None:
+                        self._count(server_errors=1)
+                    if attempt == self.max_retries:
+                        self._count(failures=1)
+                        raise LLMError(f"giving up after {attempt + 1} attempts") from exc
+                    delay = self._backoff(attempt, exc)
+                    if time.monotonic() + delay >= end:
+                        self._count(deadline_exceeded=1)
+                        raise DeadlineExceeded(f"deadline reached after {attempt + 1} attempts") from exc
+                    self._count(retries=1)
+                    time.sleep(delay)
+
+
+# ------------------------------ Shared instance ------------------------------
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """
+    The process-wide RateLimitedClient, so concurrent generators share one
+    set of limits. Configured from MELO_OPENAI_RPM / MELO_OPENAI_TPM.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateLimitedClient(
+                requests_per_minute=float(os.environ.get("MELO_OPENAI_RPM", 500)),
+                tokens_per_minute=float(os.environ.get("MELO_OPENAI_TPM", 200_000)),
+            )
+        return _shared
@@ -1,17 +1,47 @@
 from transformers import pipeline
 
+import tracing
+
+# Decoder prefix that turns a decode from the memoir prompt's encoder states
+# into a heading (T5's vocabulary has no newline to split a heading off).
+HEADING_PREFIX = "Title:"
+# CTranslate2 decodes the heading with the body's length limit, so it is cut here.
+HEADING_MAX_WORDS = 12
+
+
+def clean_heading(text):
+    """Strip quotes, bold markers and a repeated "Title:" from a decoded heading."""
+    text = text.strip().strip('"*').strip()
+    if text.lower().startswith(HEADING_PREFIX.lower()):
+        text = text[len(HEADING_PREFIX):].strip().strip('"*').strip()
+    return " ".join(text.split()[:HEADING_MAX_WORDS])
+
 class MemoirGenerator:
     def __init__(
         self,
         model="google/flan-t5-large",
         max_new_tokens=1000,
         temperature=0.9,
-        top_p=0.9
+        top_p=0.9,
+        generator=None,
+        backend="pipeline",
+        compactor=None
     ):
         """
         Memoir generator with automatic heading generation and formatting.
+        generator: optional callable with the text2text-generation pipeline
+        call signature, used instead of loading `model`.
+        backend: "pipeline" (transformers) or "ct2" (int8 CTranslate2 on CPU,
+        converted on first use, see flan_ct2.py).
+        compactor: optional TranscriptCompactor, applied to the participant
+        text before prompting (e.g. to enforce a token budget).
         """
-        self.generator = pipeline(
+        if generator is None and backend == "ct2":
+            from flan_ct2 import CT2Text2TextGenerator
+            generator = CT2Text2TextGenerator(model)
+        elif generator is None and backend != "pipeline":
+            raise ValueError(f"Unknown backend {backend!r}; use 'pipeline' or 'ct2'")
+        self.generator = generator or pipeline(
             "text2text-generation",
             model=model,
             device_map="auto",
@@ -19,6 +49,7 @@ class MemoirGenerator:
         self.max_new_tokens = max_new_tokens
         self.temperature = temperature
         self.top_p = top_p
+        self.compactor = compactor
 
     # ---------------------------------------------------------
     # INPUT FORMATTING
@@ -40,6 +71,7 @@ class MemoirGenerator:
     # ---------------------------------------------------------
     # HEADING GENERATION
     # ---------------------------------------------------------
+    @tracing.traced("memoir.heading")
     def generate_heading(self, conversation_text):
         prompt = f"Generate a short, meaningful heading for the following memoir based on the participant's experiences:\n\"\"\"\n{conversation_text}\n\"\"\""
         output = self.generator(
@@ -51,6 +83,55 @@ class MemoirGenerator:
         )[0]["generated_text"].strip()
         return output
 
+    # ---------------------------------------------------------
+    # SHARED ENCODING (transformers seq2seq pipelines)
+    # ---------------------------------------------------------
+    def _seq2seq(self):
+        """(model, tokenizer) when the encoder can be run once and reused, else (None, None)."""
+        model = getattr(self.generator, "model", None)
+        tokenizer = getattr(self.generator, "tokenizer", None)
+        if model is None or tokenizer is None or not getattr(model.config, "is_encoder_decoder", False):
+            return None, None
+        return model, tokenizer
+
+    @tracing.traced("memoir.encode")
+    def encode_prompt(self, prompt):
+        import torch
+
+        model, tokenizer = self._seq2seq()
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        with torch.no_grad():
+            encoder_outputs = model.get_encoder()(
+                input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]
+            )
+        return {"encoder_outputs": encoder_outputs, "attention_mask": inputs["attention_mask"]}
+
+    def decode(self, encoded, max_new_tokens, temperature, top_p, prefix=None):
+        """Sample from already-encoded prompt states; `prefix` is forced as the decoder's start."""
+        model, tokenizer = self._seq2seq()
+        kwargs = dict(encoded)
+        n_prefix = 0
+        if prefix:
+            import torch
+
+            ids = [model.config.decoder_start_token_id] + tokenizer(prefix, add_special_tokens=False).input_ids
+            kwargs["decoder_input_ids"] = torch.tensor([ids], device=model.device)
+            n_prefix = len(ids)
+        output_ids = model.generate(
+            **kwargs,
+            max_new_tokens=max_new_tokens,
+            do_sample=True,
+            temperature=temperature,
+            top_p=top_p
+        )
+        return tokenizer.decode(output_ids[0][n_prefix:], skip_special_tokens=True)
+
+    @tracing.traced("memoir.heading")
+    def generate_heading_from(self, encoded):
+        """Heading decoded from the memoir prompt's encoder states: no second encoder pass."""
+        heading = self.decode(encoded, max_new_tokens=15, temperature=0.7, top_p=0.95, prefix=HEADING_PREFIX)
+        return clean_heading(heading)
+
     # ---------------------------------------------------------
     # MEMOIR PROMPT CONSTRUCTION
     # ---------------------------------------------------------
@@ -104,12 +185,11 @@ class MemoirGenerator:
         elaboration=True
     ):
         conversation_text, heading = self.format_transcript(transcript)
+        if self.compactor is not None:
+            conversation_text = self.compactor.compact(conversation_text)
 
-        # Step 1: Generate heading if missing
-        if not heading:
-            heading = self.generate_heading(conversation_text)
-
-        # Step 2: Generate memoir using heading + transcript
+        # The prompt does not embed the heading, so it can be built (and,
+        # with a transformers model, encoded) before the heading exists.
         prompt = self.build_memoir_prompt(
             conversation_text,
             heading=heading,
@@ -118,14 +198,44 @@ class MemoirGenerator:
             pacing=pacing,
             elaboration=elaboration
         )
+        model, _ = self._seq2seq()
 
-        output = self.generator(
-            prompt,
-            max_new_tokens=self.max_new_tokens,
-            do_sample=True,
-            temperature=self.temperature,
-            top_p=self.top_p
-        )[0]["generated_text"]
+        if model is not None:
+            # Step 1: Encode the transcript once
+            encoded = self.encode_prompt(prompt)
+            # Step 2: Heading (if missing) and memoir both decode from it
+            if not heading:
+                heading = self.generate_heading_from(encoded)
+            with tracing.span("memoir.body", prompt_chars=len(prompt)):
+                output = self.decode(encoded, self.max_new_tokens, self.temperature, self.top_p)
+        elif getattr(self.generator, "supports_prefix", False):
+            # CTranslate2: heading and body from the same prompt in one
+            # translate_batch call, sharing its sampling settings.
+            prompts = [prompt] if heading else [prompt, prompt]
+            with tracing.span("memoir.body", prompt_chars=len(prompt), with_heading=not heading):
+                outputs = self.generator(
+                    prompts,
+                    prefixes=[None] if heading else [None, HEADING_PREFIX],
+                    max_new_tokens=self.max_new_tokens,
+                    do_sample=True,
+                    temperature=self.temperature,
+                    top_p=self.top_p
+                )
+            output = outputs[0][0]["generated_text"]
+            if not heading:
+                heading = clean_heading(outputs[1][0]["generated_text"])
+        else:
+            # Other generators (stubs, plain callables): two independent calls
+            if not heading:
+                heading = self.generate_heading(conversation_text)
+            with tracing.span("memoir.body", prompt_chars=len(prompt)):
+                output = self.generator(
+                    prompt,
+                    max_new_tokens=self.max_new_tokens,
+                    do_sample=True,
+                    temperature=self.temperature,
+                    top_p=self.top_p
+                )[0]["generated_text"]
 
         # Remove possible prompt repetition
         if conversation_text in output:
@@ -137,6 +247,14 @@ class MemoirGenerator:
         final_output = f"**{heading}**\n\n{cleaned}"
         return final_output
 
+    # ---------------------------------------------------------
+    # SINGLE CHAPTER (see chapter_builder.py)
+    # ---------------------------------------------------------
+    def generate_chapter(self, transcript, title, **style):
+        """Memoir prose for one transcript segment; the title is given, so no heading is generated."""
+        memoir = self.generate_memoir(f"Heading: {title}\n{transcript}", **style)
+        return memoir.split("\n\n", 1)[-1]
+
 
 # ---------------------------------------------------------
 # EXAMPLE USAGE
@@ -1,6 +1,9 @@
 # memoir_gen.py
 import os
-from openai import OpenAI
+
+import tracing
+from llm_client import shared_client
+from transcript_compactor import TranscriptCompactor, openai_token_counter
 
 class MemoirGenerator:
     """
@@ -8,13 +11,23 @@ class MemoirGenerator:
     into a polished memoir with a title and structured narrative.
     """
 
-    def __init__(self, model="gpt-4o-mini"):
-        self.client = OpenAI()     # Automatically uses OPENAI_API_KEY
+    def __init__(self, model="gpt-4o-mini", client=None, compactor=None):
+        """
+        :param model: OpenAI GPT model to use
+        :param client: Optional pre-built client (anything exposing
+                       chat.completions.create); defaults to the shared
+                       rate-limited client (llm_client.shared_client)
+        :param compactor: TranscriptCompactor applied before every call;
+                          defaults to clean-up only (no token budget)
+        """
+        self.client = client or shared_client()     # Automatically uses OPENAI_API_KEY
         self.model = model
+        self.compactor = compactor or TranscriptCompactor(count_tokens=openai_token_counter(model))
 
     # ----------------------------------------------------
     # 1. Generate Heading
     # ----------------------------------------------------
+    @tracing.traced("memoir.heading")
     def generate_heading(self, conversation_text):
         system_prompt = (
             "You generate emotionally resonant, elegant memoir titles. "
@@ -36,6 +49,7 @@ class MemoirGenerator:
     # ----------------------------------------------------
     # 2. Generate Memoir Body
     # ----------------------------------------------------
+    @tracing.traced("memoir.body")
     def generate_body(self, conversation_text):
         system_prompt = (
             "You turn interview transcripts into polished memoir prose. "
@@ -56,9 +70,36 @@ class MemoirGenerator:
         return response.choices[0].message.content.strip()
 
     # ----------------------------------------------------
-    # 3. Final Assembly
+    # 3. Single Chapter (see chapter_builder.py)
+    # ----------------------------------------------------
+    @tracing.traced("memoir.chapter")
+    def generate_chapter(self, conversation_text, title):
+        conversation_text = self.compactor.compact(conversation_text)
+        system_prompt = (
+            f"You turn one part of an interview transcript into a single memoir chapter titled \"{title}\". "
+            "Write in warm, reflective, literary non-fiction style. "
+            "Remove interviewer questions. Keep only the participant’s story. "
+            "Expand lightly when context allows. Preserve personal voice and culture. "
+            "Return only the chapter prose, without the title."
+        )
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": conversation_text}
+            ],
+            temperature=0.65,
+        )
+
+        return response.choices[0].message.content.strip()
+
+    # ----------------------------------------------------
+    # 4. Final Assembly
     # ----------------------------------------------------
     def generate_memoir(self, conversation_text):
+        # Compacted once; heading and body share it.
+        conversation_text = self.compactor.compact(conversation_text)
         heading = self.generate_heading(conversation_text)
         body = self.generate_body(conversation_text)
 
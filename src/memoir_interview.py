@@ -1,9 +1,21 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
 import numpy as np
-import speech_recognition as sr
+import asr
 from memoir_generator_gpt import MemoirGenerator
 from question_generator import EmotionAwareQuestionGenerator, DialogueState
+from question_planner import QuestionPlanner
+from question_retrieval import load_retriever
 from nlp_pipeline import NLPPipeline
+from streaming_analyzer import BackgroundAnalyzer, StreamingAnalyzer
 from backgound_sound_generator import BackgroundSoundGenerator
+from chapter_builder import ChapterBuilder, chapter_title
+from emotion_trajectory import EmotionTrajectory
+from interview_categories import CATEGORIES, next_category, resolve_category
+from transcript_compactor import TranscriptCompactor, openai_token_counter
+import tracing
 
 # ------------------------------ Songs ------------------------------
 SONG_DB = [
@@ -15,8 +27,10 @@ SONG_DB = [
      "vector": np.array([0.2, 0.1, 0.7])},
 ]
 
+SONG_LABELS = ["joy", "sadness", "nostalgia"]
+
 def select_song(emo_vec, dominant):
-    labels = ["joy", "sadness", "nostalgia"]
+    labels = SONG_LABELS
     v_text = np.array([emo_vec.get(lbl, 0.0) for lbl in labels])
     if np.linalg.norm(v_text) == 0:
         v_text = np.ones(len(labels)) / len(labels)
@@ -36,41 +50,71 @@ def select_song(emo_vec, dominant):
             best_song = song
     return best_song, best_sim
 
-# ------------------------------ Categories ------------------------------
-CATEGORIES = [
-    "1. Introduction",
-    "2. Early Life",
-    "3. Family",
-    "4. Education",
-    "5. Career",
-    "6. Love & Relationship",
-    "7. Passions & Hobbies",
-    "8. Challenges",
-    "9. Reflections"
-]
+# ------------------------------ Memoir ------------------------------
+MEMOIR_MODEL = "gpt-4o-mini"
+# Participant tokens sent per memoir call; longer transcripts keep their
+# most emotionally salient sentences.
+MEMOIR_TOKEN_BUDGET = 3000
+# Drafted chapters, keyed by a hash of their transcript segment. Cached in
+# memory only by default, since they hold the raw transcript; set
+# MELO_CHAPTER_CACHE to a directory to keep them across runs.
+CHAPTER_CACHE = os.environ.get("MELO_CHAPTER_CACHE") or None
 
 # ------------------------------ Speech recognition ------------------------------
-recognizer = sr.Recognizer()
-mic = sr.Microphone()
-
-def get_audio_input():
-    with mic as source:
-        print("Listening… Please speak now.")
-        recognizer.adjust_for_ambient_noise(source)
-        audio = recognizer.listen(source)
-    try:
-        #text = recognizer.recognize_whisper(audio)
-        text = recognizer.recognize_google(audio)
-        return text.strip()
-    except sr.UnknownValueError:
-        print("Sorry, could not understand audio.")
-        return None
-    except sr.RequestError as e:
-        print(f"Speech recognition error: {e}")
-        return None
+# Backend from MELO_ASR (google / faster-whisper / vosk). Created on first
+# use, so importing this module needs no audio device or model; the noise
+# calibration happens once, on the first turn.
+transcriber = None
+
+def _get_transcriber():
+    global transcriber
+    if transcriber is None:
+        transcriber = asr.StreamingTranscriber(asr.make_backend())
+    return transcriber
+
+def get_audio_input(source=None):
+    """
+    :param source: audio source (default: the microphone); an asr.WavFileSource
+                   replays a recorded answer
+    """
+    text, _ = listen_and_analyze(None, source)
+    return text
+
+def listen_and_analyze(sa, source=None):
+    """
+    Transcribe one spoken answer and, when `sa` (a StreamingAnalyzer) is
+    given, analyse each transcribed segment in the background while the
+    participant keeps talking. Returns (text, (dominant, emo_vec, entities));
+    the analysis is None without `sa`, and both are None if nothing was understood.
+    """
+    segments = []
+    with BackgroundAnalyzer(sa) if sa is not None else nullcontext() as background:
+        try:
+            with source or asr.MicrophoneSource() as src:
+                print("Listening… Please speak now.")
+                for seg in _get_transcriber().iter_segments(src):
+                    segments.append(seg.text)
+                    if background is not None:
+                        background.submit(seg.text)
+        except asr.ASRError as e:
+            print(f"Speech recognition error: {e}")
+            return None, None
+
+        text = " ".join(segments).strip()
+        if not text:
+            print("Sorry, could not understand audio.")
+            return None, None
+        return text, background.finish() if background is not None else None
 
 # ------------------------------ Interview ------------------------------
-def run_interview():
+def run_interview(speculative=True):
+    """
+    :param speculative: precompute the candidate next questions in the
+                        background while the participant answers, so only
+                        the classifier runs between an answer and the next question
+    """
+    tracing.enable_from_env()
+
     print("\n==============================")
     print("   REAL-TIME MEMOIR INTERVIEW ")
     print("==============================\n")
@@ -78,6 +122,7 @@ def run_interview():
     print("Instructions:")
     print(" - Melo will ask questions based on your chosen category.")
     print(" - You can respond by typing or speaking (audio input).")
+    print(" - Type 'NEXT' to move on to the next category (Melo also moves on once it has no more questions).")
     print(" - Type 'DONE' at any time to finish and generate the memoir.\n")
 
     # ----------------- Choose category -----------------
@@ -87,11 +132,7 @@ def run_interview():
     
     chosen_category = ""
     while not chosen_category:
-        user_input = input("\nYour choice: ").strip().lower()
-        for cat in CATEGORIES:
-            if user_input == cat.split(".")[0] or user_input in cat.lower():
-                chosen_category = cat
-                break
+        chosen_category = resolve_category(input("\nYour choice: "))
         if not chosen_category:
             print("Invalid choice. Please select a number 1-9 or type the category name.")
 
@@ -99,33 +140,77 @@ def run_interview():
     print("The interview will now begin...\n")
 
     # ----------------- Initialize -----------------
-    mg = MemoirGenerator(model="gpt-4o-mini")
-    qg = EmotionAwareQuestionGenerator()
     nlp = NLPPipeline()
+    mg = MemoirGenerator(
+        model=MEMOIR_MODEL,
+        compactor=TranscriptCompactor(
+            token_budget=MEMOIR_TOKEN_BUDGET, nlp=nlp, count_tokens=openai_token_counter(MEMOIR_MODEL)
+        ),
+    )
+    # Questions retrieved from the embedded bank when models/question_index exists
+    qg = EmotionAwareQuestionGenerator(planner=QuestionPlanner.load(), retriever=load_retriever())
+    # Sentence-level analysis, so long answers are not truncated by the models
+    sa = StreamingAnalyzer(nlp)
     state = DialogueState()
     transcript_lines = []
+    # Per-category transcript lines, in the order the categories were visited;
+    # each finished category is drafted as a chapter in the background.
+    chapter_lines = {}
+    chapters = ChapterBuilder(mg, cache_dir=CHAPTER_CACHE)
     bg_gen = BackgroundSoundGenerator(model="gpt-4o-mini")
     participant_responses = []
     bg_sound_printed = False
+    bg_sound = None
+    speculator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculate") if speculative else None
+    pending = None
+    # (dominant, emo_vec, entities) of a spoken answer, already analysed
+    # segment by segment while it was being transcribed
+    analysis = None
+    tracing.start_session()
 
     # ----------------- Main loop -----------------
     while True:
-        last_response = transcript_lines[-1] if transcript_lines else ""
-        last_text = last_response.replace("Participant:", "").strip() if last_response else ""
-        dominant_emotion, emo_vec, entities = nlp.analyze(last_text) if last_text else ("neutral", {}, [])
+        last_text = state.history[-1] if state.history else ""
+        with tracing.span("nlp.analyze", turn=state.turns):
+            if analysis is not None:
+                dominant_emotion, emo_vec, entities = analysis
+            else:
+                dominant_emotion, emo_vec, entities = sa.analyze(last_text) if last_text else ("neutral", {}, [])
+        analysis = None
 
-        ai_question = qg.generate(dominant_emotion=dominant_emotion, entities=entities, state=state)
+        with tracing.span("question.generate", turn=state.turns):
+            speculation = None
+            if pending is not None:
+                try:
+                    speculation = pending.result()
+                except Exception as e:
+                    # Speculation is only a shortcut: compute the question normally.
+                    print(f"Question speculation failed: {e!r}")
+            ai_question = qg.generate(
+                dominant_emotion=dominant_emotion, entities=entities, state=state,
+                category=chosen_category, speculation=speculation,
+            )
         ai_question = f"[Category: {chosen_category}] {ai_question}"
-        print(f"\nMelo: {ai_question}")
+        with tracing.span("print"):
+            print(f"\nMelo: {ai_question}")
+
+        # speculate() forks `state` without copying its history, so the
+        # history.append below is safe; everything else is only touched again
+        # by the next qg.generate, which waits for this result first.
+        if speculator is not None:
+            pending = speculator.submit(qg.speculate, state, chosen_category)
 
         try:
-            mode = input("Respond via (t)ext or (s)peech? [t/s]: ").strip().lower()
+            with tracing.span("input.wait"):
+                mode = input("Respond via (t)ext or (s)peech? [t/s]: ").strip().lower()
             if mode == "s":
-                user_input = get_audio_input()
+                with tracing.span("asr.total"):
+                    user_input, analysis = listen_and_analyze(sa)
                 if not user_input:
                     continue
             else:
-                user_input = input("Participant: ").strip()
+                with tracing.span("input.wait"):
+                    user_input = input("Participant: ").strip()
         except KeyboardInterrupt:
             print("\nInterview interrupted. Generating memoir…")
             break
@@ -134,43 +219,68 @@ def run_interview():
             print("\nInterview finished. Generating memoir…\n")
             break
 
-        # ----------------- Store responses -----------------
-        transcript_lines.append(f"Melo: {ai_question}")
-        transcript_lines.append(f"Participant: {user_input}")
-        participant_responses.append(user_input)
-        state.history.append(user_input)
+        category_done = user_input.upper() == "NEXT"
+        if not category_done:
+            # ----------------- Store responses -----------------
+            transcript_lines.append(f"Melo: {ai_question}")
+            transcript_lines.append(f"Participant: {user_input}")
+            chapter_lines.setdefault(chosen_category, []).extend(transcript_lines[-2:])
+            participant_responses.append(user_input)
+            state.history.append(user_input)
+
+            # ----------------- Dynamic background sound -----------------
+            if not bg_sound_printed and participant_responses:
+                target_response = participant_responses[1] if len(participant_responses) > 1 else participant_responses[0]
+                bg_sound = bg_gen.generate_sound(target_response)
+                if bg_sound:
+                    print(f"\n🎵 Recommended background sound: {bg_sound}")
+                bg_sound_printed = True
 
-        # ----------------- Dynamic background sound -----------------
-        if not bg_sound_printed and participant_responses:
-            target_response = participant_responses[1] if len(participant_responses) > 1 else participant_responses[0]
-            bg_sound = bg_gen.generate_sound(target_response)
-            if bg_sound:
-                print(f"\n🎵 Recommended background sound: {bg_sound}")
-            bg_sound_printed = True
+            # The planner has asked all of this category's own questions.
+            category_done = qg.category_done(state, chosen_category)
+
+        # ----------------- Next category -----------------
+        if category_done:
+            if chapter_lines.get(chosen_category):
+                chapters.submit(chosen_category, chapter_lines[chosen_category])
+                print(f"\n📖 Drafting the \"{chapter_title(chosen_category)}\" chapter in the background…")
+            chosen_category = next_category(chosen_category)
+            print(f"\nMoving on to: {chosen_category}\n")
+            # Fresh question flow for the new category; remembered entities carry over.
+            state = DialogueState(entities=state.entities)
+            analysis = None
+
+    if speculator is not None:
+        speculator.shutdown(wait=False)
 
     # ----------------- Final analysis & print -----------------
     print("\n==============================")
     print("      INTERVIEW SUMMARY")
     print("==============================\n")
 
-    all_emo_vecs = []
+    # Per-turn emotion scores, aligned to the emotion model's label set
+    trajectory = EmotionTrajectory()
 
     for idx, line in enumerate(transcript_lines):
         if line.startswith("Participant:"):
             text = line.replace("Participant:", "").strip()
-            dom, emo_vec, ents = nlp.analyze(text)
-            all_emo_vecs.append(emo_vec)
-            refined = mg.generate_memoir(text)
-            song, sim = select_song(emo_vec, dom)
+            with tracing.span("summary.nlp.analyze"):
+                dom, emo_vec, ents = sa.analyze(text)
+            trajectory.append(emo_vec)
+            with tracing.span("summary.memoir.refine"):
+                refined = mg.generate_memoir(text)
+            with tracing.span("select_song"):
+                song, sim = select_song(emo_vec, dom)
 
-            print("\n===== Original Text =====")
-            print(text)
+            with tracing.span("print"):
+                print("\n===== Original Text =====")
+                print(text)
 
-            print("\n===== Emotion Analysis =====")
-            print(dom, emo_vec)
+                print("\n===== Emotion Analysis =====")
+                print(dom, emo_vec)
 
-            print("\n===== Named Entities =====")
-            print(ents)
+                print("\n===== Named Entities =====")
+                print(ents)
 
             # print("\n===== Refined Memoir Text =====")
             # print(refined)
@@ -182,9 +292,9 @@ def run_interview():
             #     print("No matching song found.")
 
     # ----------------- Aggregate emotions for overall music -----------------
-    if all_emo_vecs:
-        labels = ["joy", "sadness", "nostalgia"]
-        agg_vec = {lbl: np.mean([v.get(lbl, 0.0) for v in all_emo_vecs]) for lbl in labels}
+    if len(trajectory):
+        mean_vec = trajectory.mean_dict()
+        agg_vec = {lbl: mean_vec.get(lbl, 0.0) for lbl in SONG_LABELS}
         overall_dom = max(agg_vec, key=agg_vec.get)
         overall_song, overall_sim = select_song(agg_vec, overall_dom)
 
@@ -206,13 +316,20 @@ def run_interview():
 
     # ----------------- Full Memoir -----------------
     transcript = "\n".join(transcript_lines).strip()
-    final_memoir = mg.generate_memoir(transcript)
+    with tracing.span("memoir.final", chars=len(transcript), chapters=len(chapter_lines)):
+        # Chapters finished earlier are already drafted (or cached); only the
+        # last one and the title remain.
+        final_memoir = chapters.build(chapter_lines) if chapter_lines else mg.generate_memoir(transcript)
+    chapters.close()
     print("\n==============================")
     print("          FINAL MEMOIR")
     print("==============================\n")
     print(final_memoir)
     print("\n==============================\n")
 
+    if tracing.is_enabled():
+        tracing.print_session_breakdown()
+
 
 if __name__ == "__main__":
     run_interview()
@@ -0,0 +1,241 @@
+import json
+from pathlib import Path
+
+import torch
+from torch import nn
+from transformers import AutoModel, AutoTokenizer
+
+CONFIG_FILE = "multitask_config.json"
+HEADS_FILE = "heads.pt"
+
+# The dataset_50 entity annotations are untyped strings, so the token head
+# tags generic ENT spans in BIO form.
+ENTITY_TAGS = ["O", "B-ENT", "I-ENT"]
+
+
+class MultiTaskEmotionModel(nn.Module):
+    """
+    One shared transformer encoder with several classification heads:
+    multi-label emotion, life stage and event type, plus an optional
+    token-level entity tagger. A single forward pass produces every prediction.
+    """
+
+    def __init__(
+        self,
+        encoder_name,
+        emotion_labels,
+        life_stage_labels,
+        event_type_labels,
+        entity_tags=None,
+        dropout=0.1,
+    ):
+        super().__init__()
+        self.encoder_name = encoder_name
+        self.encoder = AutoModel.from_pretrained(encoder_name)
+        hidden = self.encoder.config.hidden_size
+
+        self.emotion_labels = list(emotion_labels)
+        self.life_stage_labels = list(life_stage_labels)
+        self.event_type_labels = list(event_type_labels)
+        self.entity_tags = list(entity_tags) if entity_tags else None
+
+        self.dropout = nn.Dropout(dropout)
+        self.emotion_head = nn.Linear(hidden, len(self.emotion_labels))
+        self.life_stage_head = nn.Linear(hidden, len(self.life_stage_labels))
+        self.event_type_head = nn.Linear(hidden, len(self.event_type_labels))
+        self.entity_head = (
+            nn.Linear(hidden, len(self.entity_tags)) if self.entity_tags else None
+        )
+
+    def forward(
+        self,
+        input_ids,
+        attention_mask,
+        emotion_labels=None,
+        emotion_mask=None,
+        life_stage_labels=None,
+        event_type_labels=None,
+        entity_tag_labels=None,
+    ):
+        """
+        - emotion_labels: multi-hot float targets, shape (batch, n_emotions)
+        - emotion_mask: 1 for rows whose emotions mapped to the label set
+        - life_stage_labels / event_type_labels: class ids, -100 to ignore
+        - entity_tag_labels: per-token tag ids, shape (batch, seq), -100 to ignore
+        """
+        hidden = self.encoder(
+            input_ids=input_ids, attention_mask=attention_mask
+        ).last_hidden_state
+        pooled = self.dropout(hidden[:, 0])
+
+        outputs = {
+            "emotion_logits": self.emotion_head(pooled),
+            "life_stage_logits": self.life_stage_head(pooled),
+            "event_type_logits": self.event_type_head(pooled),
+        }
+        if self.entity_head is not None:
+            outputs["entity_logits"] = self.entity_head(self.dropout(hidden))
+
+        loss = None
+        if emotion_labels is not None:
+            bce = nn.functional.binary_cross_entropy_with_logits(
+                outputs["emotion_logits"], emotion_labels.float(), reduction="none"
+            ).mean(dim=-1)
+            if emotion_mask is not None:
+                mask = emotion_mask.float()
+                bce = (bce * mask).sum() / mask.sum().clamp(min=1.0)
+            else:
+                bce = bce.mean()
+            loss = bce
+        for key, labels in (
+            ("life_stage_logits", life_stage_labels),
+            ("event_type_logits", event_type_labels),
+        ):
+            if labels is None or not (labels != -100).any():
+                continue
+            ce = nn.functional.cross_entropy(outputs[key], labels, ignore_index=-100)
+            loss = ce if loss is None else loss + ce
+        if entity_tag_labels is not None and self.entity_head is not None:
+            logits = outputs["entity_logits"]
+            ce = nn.functional.cross_entropy(
+                logits.reshape(-1, logits.size(-1)),
+                entity_tag_labels.reshape(-1),
+                ignore_index=-100,
+            )
+            loss = ce if loss is None else loss + ce
+
+        # Only report a loss when one was computed, so Trainer treats every
+        # other entry as logits.
+        if loss is not None:
+            outputs = {"loss": loss, **outputs}
+        return outputs
+
+    # ---------------------------------------------------------
+    # SAVE / LOAD
+    # ---------------------------------------------------------
+    def save_pretrained(self, save_dir):
+        save_dir = Path(save_dir)
+        save_dir.mkdir(parents=True, exist_ok=True)
+        self.encoder.save_pretrained(save_dir / "encoder")
+        heads = {k: v for k, v in self.state_dict().items() if not k.startswith("encoder.")}
+        torch.save(heads, save_dir / HEADS_FILE)
+        config = {
+            "encoder_name": self.encoder_name,
+            "emotion_labels": self.emotion_labels,
+            "life_stage_labels": self.life_stage_labels,
+            "event_type_labels": self.event_type_labels,
+            "entity_tags": self.entity_tags,
+        }
+        with (save_dir / CONFIG_FILE).open("w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+    @classmethod
+    def from_pretrained(cls, save_dir):
+        save_dir = Path(save_dir)
+        with (save_dir / CONFIG_FILE).open("r", encoding="utf-8") as f:
+            config = json.load(f)
+        model = cls(
+            str(save_dir / "encoder"),
+            config["emotion_labels"],
+            config["life_stage_labels"],
+            config["event_type_labels"],
+            entity_tags=config.get("entity_tags"),
+        )
+        model.encoder_name = config["encoder_name"]
+        heads = torch.load(save_dir / HEADS_FILE, map_location="cpu")
+        # The encoder was loaded from save_dir/encoder; every head weight must
+        # come from heads.pt, or a stale checkpoint runs with random heads.
+        result = model.load_state_dict(heads, strict=False)
+        missing = [k for k in result.missing_keys if not k.startswith("encoder.")]
+        unexpected = [k for k in result.unexpected_keys if not k.startswith("encoder.")]
+        if missing or unexpected:
+            raise RuntimeError(
+                f"{save_dir / HEADS_FILE} does not match the model: "
+                f"missing {missing or 'nothing'}, unexpected {unexpected or 'nothing'}"
+            )
+        return model
+
+
+class MultiTaskPredictor:
+    """
+    Inference wrapper: tokenizes a batch once and returns every head's
+    prediction from the same encoder pass.
+    """
+
+    def __init__(self, model_dir="models/multitask_classifier/best", max_length=128):
+        model_dir = Path(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.model = MultiTaskEmotionModel.from_pretrained(model_dir)
+        self.model.eval()
+        self.max_length = max_length
+
+    @property
+    def has_entities(self):
+        return self.model.entity_head is not None
+
+    @torch.no_grad()
+    def predict(self, texts, batch_size=16):
+        """
+        Return one dict per text with emotion scores, life stage, event type
+        and (when the model has a token head) entity spans.
+        """
+        results = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            enc = self.tokenizer(
+                batch,
+                truncation=True,
+                padding=True,
+                max_length=self.max_length,
+                return_offsets_mapping=True,
+                return_tensors="pt",
+            )
+            offsets = enc.pop("offset_mapping").tolist()
+            out = self.model(
+                input_ids=enc["input_ids"], attention_mask=enc["attention_mask"]
+            )
+            emo = torch.sigmoid(out["emotion_logits"]).tolist()
+            stage = out["life_stage_logits"].argmax(dim=-1).tolist()
+            event = out["event_type_logits"].argmax(dim=-1).tolist()
+            tags = (
+                out["entity_logits"].argmax(dim=-1).tolist()
+                if "entity_logits" in out else None
+            )
+
+            for i, text in enumerate(batch):
+                result = {
+                    "emotions": dict(zip(self.model.emotion_labels, emo[i])),
+                    "life_stage": self.model.life_stage_labels[stage[i]],
+                    "event_type": self.model.event_type_labels[event[i]],
+                }
+                if tags is not None:
+                    result["entities"] = self._decode_entities(
+                        text, tags[i], offsets[i], enc["attention_mask"][i].tolist()
+                    )
+                results.append(result)
+        return results
+
+    def _decode_entities(self, text, tag_ids, offsets, mask):
+        """Merge BIO token tags into character spans of the original text."""
+        tags = self.model.entity_tags
+        spans = []
+        prev_kind = None  # entity kind of the previous kept token, None after O
+        for tag_id, (start, end), keep in zip(tag_ids, offsets, mask):
+            if not keep or start == end:
+                prev_kind = None
+                continue
+            tag = tags[tag_id]
+            if tag == "O":
+                prev_kind = None
+                continue
+            kind = tag.split("-", 1)[1]
+            # I-X only continues a span directly after B-X / I-X; otherwise it starts one.
+            if tag.startswith("I-") and prev_kind == kind:
+                spans[-1][1] = end
+            else:
+                spans.append([start, end, kind])
+            prev_kind = kind
+        return [
+            {"text": text[start:end].strip(), "label": kind}
+            for start, end, kind in spans
+        ]
@@ -1,13 +1,32 @@
 from pathlib import Path
 from transformers import pipeline
 
+import tracing
+
 
 class NLPPipeline:
     """
     Emotion classifier (fine-tuned if available) + NER.
+
+    With joint=True and a multi-task model containing an entity head (see
+    training/train_multitask_classifier.py), emotion and entities come from a
+    single shared-encoder pass instead of two separate models.
     """
 
-    def __init__(self):
+    def __init__(self, joint=False, joint_model_dir="models/multitask_classifier/best"):
+        self.joint = None
+        if joint:
+            from multitask_model import MultiTaskPredictor
+
+            self.joint = MultiTaskPredictor(joint_model_dir)
+            if not self.joint.has_entities:
+                raise ValueError(
+                    f"{joint_model_dir} has no entity head; retrain with "
+                    "training/train_multitask_classifier.py"
+                )
+            print(f"[NLPPipeline] Using joint emotion+NER model: {joint_model_dir}")
+            return
+
         finetuned_dir = Path("models/emotion_classifier/best")
         if finetuned_dir.exists():
             emo_model = str(finetuned_dir)
@@ -30,11 +49,57 @@ class NLPPipeline:
         )
 
     def analyze(self, text: str):
-        emo_scores = self.emotion_pipeline(text)[0]
+        if self.joint is not None:
+            return self._analyze_joint(text)
+
+        with tracing.span("nlp.emotion", chars=len(text)):
+            emo_scores = self.emotion_pipeline(text)[0]
         emo_vec = {s["label"].lower(): float(s["score"]) for s in emo_scores}
         dominant = max(emo_vec, key=emo_vec.get)
 
-        ents_raw = self.ner_pipeline(text)
+        with tracing.span("nlp.ner", chars=len(text)):
+            ents_raw = self.ner_pipeline(text)
         entities = [{"text": e["word"], "label": e["entity_group"]} for e in ents_raw]
 
         return dominant, emo_vec, entities
+
+    def analyze_batch(self, texts, batch_size=32):
+        """
+        Analyze many texts with batched forward passes.
+        Returns one (dominant, emo_vec, entities) tuple per text, like analyze().
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        if self.joint is not None:
+            with tracing.span("nlp.joint", batch=len(texts)):
+                preds = self.joint.predict(texts, batch_size=batch_size)
+            return [self._joint_result(p) for p in preds]
+
+        with tracing.span("nlp.emotion", batch=len(texts)):
+            emo_batch = self.emotion_pipeline(texts, batch_size=batch_size)
+        with tracing.span("nlp.ner", batch=len(texts)):
+            ner_batch = self.ner_pipeline(texts, batch_size=batch_size)
+
+        results = []
+        for emo_scores, ents_raw in zip(emo_batch, ner_batch):
+            emo_vec = {s["label"].lower(): float(s["score"]) for s in emo_scores}
+            dominant = max(emo_vec, key=emo_vec.get)
+            entities = [{"text": e["word"], "label": e["entity_group"]} for e in ents_raw]
+            results.append((dominant, emo_vec, entities))
+        return results
+
+    def _analyze_joint(self, text: str):
+        with tracing.span("nlp.joint", chars=len(text)):
+            pred = self.joint.predict([text])[0]
+        return self._joint_result(pred)
+
+    def _joint_result(self, pred):
+        # The emotion head is multi-label (sigmoid); normalise so emo_vec is a
+        # distribution like the text-classification pipeline returns.
+        total = sum(pred["emotions"].values()) or 1.0
+        emo_vec = {lbl: float(s) / total for lbl, s in pred["emotions"].items()}
+        dominant = max(emo_vec, key=emo_vec.get)
+
+        return dominant, emo_vec, pred["entities"]
@@ -1,16 +1,21 @@
+import os
+from pathlib import Path
+
 import requests
 from datasets import load_dataset
 from sentence_transformers import SentenceTransformer, util
 import spacy
 from transformers import pipeline
+import numpy as np
 from pydub import AudioSegment
-from pydub.playback import play
 from io import BytesIO
 import threading
-import time
-import numpy as np
 import random
 import warnings
+import tracing
+from ambient_pack import MANIFEST_FILE, AmbientPack
+from audio_mixer import AMBIENCE, MUSIC, Mixer, SoundDeviceSink
+from soundtrack_planner import SoundtrackPlanner, TrackIndex
 warnings.filterwarnings("ignore")
 
 # 1. MODELS AND INITIALIZATION
@@ -33,7 +38,16 @@ SEED_ENVIRONMENTAL = [
 ]
 SEED_EMBEDS = embedder.encode(SEED_ENVIRONMENTAL, convert_to_tensor=True)
 
+# Offline ambient pack (scripts/build_ambient_pack.py); Deezer is only
+# searched when no pack is installed.
+AMBIENT_PACK_DIR = Path(os.environ.get(
+    "MELO_AMBIENT_PACK", Path(__file__).resolve().parents[1] / "data" / "ambient_pack"
+))
+ambient_pack = AmbientPack(AMBIENT_PACK_DIR, embedder=embedder) if (AMBIENT_PACK_DIR / MANIFEST_FILE).exists() else None
+
 lastfm = load_dataset("Acervans/Lastfm-VADS")["train"]
+# Valence/arousal of every track as one float32 matrix, built once
+lastfm_index = TrackIndex.from_dataset(lastfm)
 
 # 2. ENVIRONMENT DETECTION
 
@@ -56,49 +70,97 @@ def detect_environment_zeroshot(text):
     result = zero_shot(text, ENV_LABELS)
     return [label for label, score in zip(result["labels"], result["scores"]) if score > 0.30]
 
+@tracing.traced("env.detect")
 def detect_environment(text):
     emb = detect_environment_embeddings(text)
     zsl = detect_environment_zeroshot(text)
     normalized = set([w.split()[0] for w in emb] + [z.split()[0] for z in zsl])
     return list(normalized)
 
-# 3. AMBIENCE LOOP
+# 3. MIXER AND AMBIENCE
+
+# Ambience and music are sources of one in-process mixer writing to the
+# sound card: ambience keeps playing (ducked) under the soundtrack instead
+# of being stopped for it, and no thread is blocked per clip.
+MIXER_RATE = 44100
+AMBIENCE_GAIN = 0.6
+CROSSFADE_S = 2.0
+# Seconds to wait for Deezer, and for an ambience loop to notice it was stopped
+HTTP_TIMEOUT_S = 10.0
+STOP_TIMEOUT_S = 1.0
 
+mixer = None
 current_ambience_thread = None
-stop_ambience = False
+stop_ambience = threading.Event()
+
+def get_mixer():
+    global mixer
+    if mixer is None:
+        mixer = Mixer(sink=SoundDeviceSink(), sample_rate=MIXER_RATE).start()
+    return mixer
+
+def load_stream_pcm(url):
+    """Fetch and decode a preview into int16 PCM (frames, channels); returns (pcm, sample_rate)."""
+    with tracing.span("audio.fetch", url=url):
+        audio_data = requests.get(url, timeout=HTTP_TIMEOUT_S).content
+    with tracing.span("audio.decode", bytes=len(audio_data)):
+        sound = AudioSegment.from_file(BytesIO(audio_data)).set_sample_width(2)
+    pcm = np.frombuffer(sound.raw_data, dtype=np.int16).reshape(-1, sound.channels)
+    return pcm, sound.frame_rate
+
+def load_pack_clip(clip_id):
+    # Already PCM and memory-mapped: nothing to fetch or decode.
+    return ambient_pack.audio(clip_id), ambient_pack.sample_rate
 
 def play_stream_once(url):
-    audio_data = requests.get(url).content
-    sound = AudioSegment.from_file(BytesIO(audio_data))
-    play(sound)
-
-def loop_ambience(urls):
-    global stop_ambience
-    stop_ambience = False
-    while not stop_ambience:
-        url = random.choice(urls)
-        play_stream_once(url)
-        time.sleep(0.1)
+    """Play a preview through the mixer as music (ducking any ambience); blocks until it ends."""
+    pcm, rate = load_stream_pcm(url)
+    with tracing.span("audio.play", duration_s=len(pcm) / rate):
+        get_mixer().add(pcm, role=MUSIC, fade_in=0.5, sample_rate=rate).wait()
+
+def loop_ambience(sources, loader=load_stream_pcm, stop=None):
+    """Rotate through random sources, crossfading each into the next, until `stop` is set."""
+    stop = stop or stop_ambience
+    current = None
+    while not stop.is_set():
+        with tracing.span("ambience.iteration"):
+            pcm, rate = loader(random.choice(sources))
+            if stop.is_set():
+                break  # stopped during the fetch
+            if current is not None:
+                current.fade_out(CROSSFADE_S)
+            current = get_mixer().add(
+                pcm, gain=AMBIENCE_GAIN, fade_in=CROSSFADE_S, role=AMBIENCE, sample_rate=rate
+            )
+        # Sleeps until the next crossfade is due (or ambience is stopped).
+        stop.wait(max(0.1, len(pcm) / rate - CROSSFADE_S))
+    if current is not None:
+        current.fade_out(CROSSFADE_S / 2)
 
 def stop_current_ambience():
-    global stop_ambience
-    stop_ambience = True
-    time.sleep(0.2)
-
-def start_ambience_loop(urls):
-    global current_ambience_thread
+    # A loop stuck in a fetch is not waited for: it has its own stop event
+    # and exits, without playing, once the fetch returns.
+    stop_ambience.set()
+    if current_ambience_thread is not None:
+        current_ambience_thread.join(timeout=STOP_TIMEOUT_S)
+
+def start_ambience_loop(sources, loader=load_stream_pcm):
+    """sources: Deezer preview URLs, or ambient pack clip ids with loader=load_pack_clip"""
+    global current_ambience_thread, stop_ambience
     stop_current_ambience()
+    stop_ambience = threading.Event()
     current_ambience_thread = threading.Thread(
-        target=loop_ambience, args=(urls,), daemon=True
+        target=loop_ambience, args=(sources, loader, stop_ambience), daemon=True
     )
     current_ambience_thread.start()
 
 # 4. DEEZER PREVIEW
 
+@tracing.traced("deezer.ambience_search")
 def get_top_n_deezer_previews(keyword, n=3):
     query = f"{keyword} ambient OR nature OR environment OR sound"
     url = f"https://api.deezer.com/search?q={requests.utils.quote(query)}"
-    res = requests.get(url).json()
+    res = requests.get(url, timeout=HTTP_TIMEOUT_S).json()
     data = res.get("data", [])
     previews = []
     for item in data:
@@ -110,10 +172,11 @@ def get_top_n_deezer_previews(keyword, n=3):
             break
     return previews
 
+@tracing.traced("deezer.track_search")
 def try_deezer_preview(track_name, artist):
     query = f"track:\"{track_name}\" artist:\"{artist}\""
     url = f"https://api.deezer.com/search?q={requests.utils.quote(query)}"
-    res = requests.get(url).json()
+    res = requests.get(url, timeout=HTTP_TIMEOUT_S).json()
     data = res.get("data", [])
     if data:
         return data[0].get("preview")
@@ -129,29 +192,39 @@ def play_music_once(url):
 
 # 5. LASTFM-VADS TRACK MATCHING
 
+@tracing.traced("lastfm.find_best_track")
 def find_best_track(valence, arousal):
-    best_dist = float("inf")
-    best = None
-    for item in lastfm:
-        d = np.sqrt((item["valence"]-valence)**2 + (item["arousal"]-arousal)**2)
-        if d < best_dist:
-            best_dist = d
-            best = item
-    return best
+    idx, _ = lastfm_index.nearest([[valence, arousal]], k=1)
+    return lastfm[int(idx[0, 0])]
+
+@tracing.traced("lastfm.plan_soundtrack")
+def plan_session_soundtrack(moods, k=10):
+    """
+    One smoothly-changing track per turn for a whole session.
+    moods: EmotionTrajectory, or a (turns, 2) array of valence/arousal points
+    """
+    return [p.track for p in SoundtrackPlanner(lastfm_index, k=k).plan(moods)]
 
 # 6. MAIN PIPELINE
 
 def process_prompt(text, emotion_classifier):
     env_matches = detect_environment(text)
-    # Get top 2–3 Deezer previews per keyword
     ambience_urls = []
-    for kw in env_matches:
-        urls = get_top_n_deezer_previews(kw, n=3)
-        if urls:
-            ambience_urls.extend(urls)
-
-    if ambience_urls:
-        start_ambience_loop(ambience_urls)
+    ambience_clips = []
+    if ambient_pack is not None:
+        with tracing.span("ambience.select", keywords=len(env_matches)):
+            ambience_clips = ambient_pack.select(env_matches, k=3)
+        if ambience_clips:
+            start_ambience_loop(ambience_clips, loader=load_pack_clip)
+    else:
+        # Get top 2–3 Deezer previews per keyword
+        for kw in env_matches:
+            urls = get_top_n_deezer_previews(kw, n=3)
+            if urls:
+                ambience_urls.extend(urls)
+
+        if ambience_urls:
+            start_ambience_loop(ambience_urls)
 
     # Emotion classifier
     emo = emotion_classifier(text)
@@ -162,6 +235,7 @@ def process_prompt(text, emotion_classifier):
     return {
         "environmental_keywords": env_matches,
         "ambience_urls": ambience_urls,
+        "ambience_clips": ambience_clips,
         "emotion": emo,
         "selected_music_track": music
     }
@@ -172,5 +246,5 @@ def play_final_soundtrack(music_track):
     track_name = music_track["track_name"]
     artist = music_track["artist_name"]
     preview_url = get_music_preview_url(track_name, artist)
-    stop_current_ambience()  # fade out/stop ambience
+    # Ambience keeps playing: the mixer ducks it under the soundtrack.
     play_music_once(preview_url)
@@ -0,0 +1,256 @@
+"""
+Pre-fork multiprocess model serving for NLPPipeline.
+
+The parent process loads the emotion and NER weights once, moves every
+parameter tensor into shared memory and forks N workers. Workers never write
+to the weights, so they map the same physical pages as the parent; an extra
+worker costs its activations and Python heap rather than another full copy
+of the models. Each worker pins torch's intra-op pool to its share of the
+cores so N workers do not oversubscribe the machine.
+
+    analyzer = PreforkAnalyzer(workers=4)
+    results = analyzer.analyze_batch(texts)        # same tuples as NLPPipeline
+    scheduler = InferenceScheduler(analyzer.analyze_batch, workers=4)
+
+Linux/macOS only (relies on fork). Do not run inference in the parent before
+forking: an initialised OpenMP pool does not survive fork reliably.
+
+A worker that dies (OOM kill, segfault in a native op) fails the request it
+was holding with WorkerDied and is replaced by a fresh fork; callers also
+get a timeout, so a lost request can never block a scheduler thread forever.
+
+Replacements are forked from the collector thread while the rest of the
+process (event loop, scheduler threads, HTTP clients) keeps running. A fork
+copies only the forking thread, so any lock another thread held at that
+moment stays locked forever in the child. The child therefore runs nothing
+but _worker_main: the models (which never ran in the parent), the two
+multiprocessing queues (reset after fork by multiprocessing itself) and
+torch. Keep it that way: anything else a worker touches (logging, tracing,
+tokenizer thread pools, the OpenAI client) may deadlock in a replacement.
+"""
+import gc
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+import torch
+
+from nlp_pipeline import NLPPipeline
+
+
+def _pipeline_modules(nlp):
+    if nlp.joint is not None:
+        return [nlp.joint.model]
+    return [nlp.emotion_pipeline.model, nlp.ner_pipeline.model]
+
+
+def prepare_for_fork(nlp):
+    """Freeze the models and place their weights in shared memory."""
+    for module in _pipeline_modules(nlp):
+        module.eval()
+        for p in module.parameters():
+            p.requires_grad_(False)
+        module.share_memory()
+    # Move everything allocated so far out of the GC's reach, so collections in
+    # the children do not write to (and un-share) the parent's object pages.
+    gc.collect()
+    gc.freeze()
+
+
+class WorkerDied(RuntimeError):
+    """The worker process handling a request exited before answering it."""
+
+
+def _worker_main(nlp, threads, requests, results, current):
+    torch.set_num_threads(threads)
+    torch.set_grad_enabled(False)
+    while True:
+        msg = requests.get()
+        if msg is None:
+            return
+        req_id, texts = msg
+        # Shared memory, visible to the parent at once (a queue message could
+        # still be in the feeder thread when a native crash kills us), so the
+        # parent knows which request to fail if this process dies.
+        current.value = req_id
+        try:
+            results.put((req_id, nlp.analyze_batch(texts), None))
+        except Exception as e:
+            results.put((req_id, None, repr(e)))
+        current.value = -1
+
+
+class PreforkAnalyzer:
+
+    def __init__(self, workers=None, threads_per_worker=None, nlp=None, joint=False,
+                 timeout=120.0, poll_interval=0.5):
+        """
+        :param workers: worker processes (default: one per core)
+        :param threads_per_worker: torch intra-op threads per worker
+                                   (default: cores // workers, at least 1)
+        :param nlp: an already-loaded NLPPipeline to share; one is built if omitted
+        :param timeout: seconds analyze_batch waits for a result
+        :param poll_interval: how often the collector checks for dead workers
+        """
+        cores = os.cpu_count() or 1
+        self.workers = workers or cores
+        self.threads_per_worker = threads_per_worker or max(1, cores // self.workers)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self.nlp = nlp or NLPPipeline(joint=joint)
+        prepare_for_fork(self.nlp)
+
+        self._ctx = multiprocessing.get_context("fork")
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._worker_ids = itertools.count()
+        self._procs = {}    # worker id -> (Process, shared id of the request it is working on)
+        # Guards _procs and _closing: the collector reaps and respawns while
+        # close() may be shutting down from another thread.
+        self._procs_lock = threading.Lock()
+        self._closing = False
+        self.restarts = 0
+        with self._procs_lock:
+            for _ in range(self.workers):
+                self._spawn()
+
+        self._ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(target=self._collect, name="prefork-results", daemon=True)
+        self._collector.start()
+
+    def _spawn(self):
+        """Fork one worker. Caller holds _procs_lock (see the module docstring on forking)."""
+        worker_id = next(self._worker_ids)
+        current = self._ctx.Value("q", -1, lock=False)
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(self.nlp, self.threads_per_worker, self._requests, self._results, current),
+            name=f"nlp-prefork-{worker_id}",
+            daemon=True,
+        )
+        p.start()
+        self._procs[worker_id] = (p, current)
+
+    @property
+    def pids(self):
+        with self._procs_lock:
+            return [p.pid for p, _ in self._procs.values()]
+
+    def _reap(self):
+        """Fail the requests of dead workers and fork replacements."""
+        dead = []
+        with self._procs_lock:
+            if self._closing:
+                return
+            for worker_id, (p, current) in list(self._procs.items()):
+                if p.is_alive():
+                    continue
+                del self._procs[worker_id]
+                dead.append((p, current.value))
+                self.restarts += 1
+                self._spawn()
+        for p, req_id in dead:
+            if req_id >= 0:
+                with self._lock:
+                    fut = self._pending.pop(req_id, None)
+                if fut is not None:
+                    fut.set_exception(WorkerDied(f"{p.name} exited with code {p.exitcode}"))
+
+    def _collect(self):
+        while True:
+            try:
+                msg = self._results.get(timeout=self.poll_interval)
+            except queue.Empty:
+                self._reap()
+                continue
+            if msg is None:
+                return
+            req_id, result, error = msg
+            with self._lock:
+                fut = self._pending.pop(req_id, None)
+            if fut is None:
+                continue
+            if error is not None:
+                fut.set_exception(RuntimeError(f"prefork worker failed: {error}"))
+            else:
+                fut.set_result(result)
+            self._reap()
+
+    def submit_batch(self, texts):
+        fut = Future()
+        req_id = next(self._ids)
+        with self._lock:
+            self._pending[req_id] = fut
+        self._requests.put((req_id, list(texts)))
+        fut.req_id = req_id
+        return fut
+
+    def analyze_batch(self, texts, batch_size=None, timeout=None):
+        """Blocking; runs on whichever worker is free. batch_size is accepted for
+        NLPPipeline compatibility and ignored (the whole list is one request).
+        Raises WorkerDied if the worker crashed, TimeoutError after `timeout`
+        (default: the analyzer's) seconds."""
+        fut = self.submit_batch(texts)
+        try:
+            return fut.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            with self._lock:
+                self._pending.pop(fut.req_id, None)
+            raise
+
+    def analyze(self, text):
+        return self.analyze_batch([text])[0]
+
+    def close(self, timeout=5):
+        """Stop the collector, then the workers; requests still in flight fail with WorkerDied."""
+        with self._procs_lock:
+            if self._closing:
+                return
+            # From here on _reap() neither removes nor spawns workers.
+            self._closing = True
+            procs = [p for p, _ in self._procs.values()]
+        self._results.put(None)
+        self._collector.join(timeout)
+        for _ in procs:
+            self._requests.put(None)
+        for p in procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            fut.set_exception(WorkerDied("analyzer closed"))
+        gc.unfreeze()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def process_memory_kb(pid):
+    """
+    (Pss, Private) memory of a process in KiB, from /proc/<pid>/smaps_rollup.
+    Private pages are what the process does not share with anyone else.
+    """
+    pss = private = 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key == "Pss":
+                    pss = int(rest.split()[0])
+                elif key in ("Private_Clean", "Private_Dirty"):
+                    private += int(rest.split()[0])
+    except OSError:
+        return None, None
+    return pss, private
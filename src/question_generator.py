@@ -1,7 +1,104 @@
 # src/question_generator.py
-from dataclasses import dataclass, field
-from typing import List, Dict
+from collections import deque
+from dataclasses import dataclass, field, fields
+from typing import List, Dict, Optional, Tuple
+import copy
 import random
+import re
+
+import tracing
+from question_planner import PlannerState
+
+# NER labels (dslim/bert-base-NER, the joint model's ENT, spaCy-style) -> kind
+ENTITY_KINDS = {
+    "PER": "person",
+    "PERSON": "person",
+    "LOC": "place",
+    "GPE": "place",
+    "FAC": "place",
+    "DATE": "date",
+    "ORG": "organization",
+    "MISC": "topic",
+    "ENT": "topic",
+}
+# Follow-up priority when several new entities are waiting
+FOLLOW_UP_ORDER = ["person", "place", "date", "organization", "topic"]
+
+# The NER model does not tag dates, so years/decades are picked up here.
+_YEAR = re.compile(r"\b(?:1[89]|20)\d{2}s?\b")
+
+
+@dataclass
+class EntityRecord:
+    text: str
+    kind: str
+    count: int = 0
+    turns: List[int] = field(default_factory=list)
+    asked: bool = False
+
+
+class EntityMemory:
+    """
+    Deduplicated store of the people, places, dates and topics mentioned
+    during the interview. update() costs O(entities in the new turn); picking
+    a follow-up is amortised O(1), so nothing ever rescans the history.
+    """
+
+    def __init__(self):
+        self.records: Dict[str, EntityRecord] = {}
+        self._pending = {kind: deque() for kind in FOLLOW_UP_ORDER}
+
+    @staticmethod
+    def _key(text):
+        key = " ".join(text.lower().split())
+        return key[4:] if key.startswith("the ") else key
+
+    @staticmethod
+    def _text(ent):
+        text = ent.get("text", "").replace("##", "").strip()
+        return text if len(text) >= 2 else None
+
+    def has_new(self, entities):
+        """Whether update(entities) would create at least one new record."""
+        return any(
+            text is not None and self._key(text) not in self.records
+            for text in map(self._text, entities)
+        )
+
+    def update(self, entities, turn):
+        """Merge one turn's entities; returns the records first seen this turn."""
+        new = []
+        for ent in entities:
+            text = self._text(ent)
+            if text is None:
+                continue
+            key = self._key(text)
+            record = self.records.get(key)
+            if record is None:
+                kind = ENTITY_KINDS.get(ent.get("label", "").upper(), "topic")
+                record = EntityRecord(text=text, kind=kind)
+                self.records[key] = record
+                self._pending[kind].append(record)
+                new.append(record)
+            record.count += 1
+            if not record.turns or record.turns[-1] != turn:
+                record.turns.append(turn)
+        return new
+
+    def next_follow_up(self) -> Optional[EntityRecord]:
+        """Most recent not-yet-asked entity of the highest-priority kind."""
+        for kind in FOLLOW_UP_ORDER:
+            pending = self._pending[kind]
+            while pending:
+                record = pending.pop()
+                if not record.asked:
+                    record.asked = True
+                    return record
+        return None
+
+    def __len__(self):
+        return len(self.records)
+
 
 @dataclass
 class DialogueState:
@@ -12,11 +109,41 @@ class DialogueState:
     asked_about_meaning: bool = False
     turns: int = 0
     history: List[str] = field(default_factory=list)
+    entities: EntityMemory = field(default_factory=EntityMemory)
+    last_was_follow_up: bool = False
+    plan: Optional[PlannerState] = None
+    retrieval: Optional[object] = None  # question_retrieval.RetrievalState
+
+
+@dataclass
+class Speculation:
+    """
+    Next questions precomputed before the participant's answer is analysed:
+    one (question, forked state) per emotion that can change the outcome,
+    plus the key None for every other emotion.
+    """
+    turns: int
+    category: Optional[str]
+    candidates: Dict[Optional[str], Tuple[str, DialogueState]]
+
+    def pick(self, dominant_emotion):
+        emo = (dominant_emotion or "").lower()
+        return self.candidates.get(emo) or self.candidates[None]
 
 
 class EmotionAwareQuestionGenerator:
 
-    def __init__(self):
+    def __init__(self, planner=None, retriever=None):
+        """
+        planner: optional shared QuestionPlanner. When given, stage, category
+        and emotion questions come from its template tables (with per-session
+        no-repeat state in DialogueState.plan) instead of the lists below.
+        retriever: optional QuestionRetriever. When given, every turn after
+        the first asks the nearest unasked question in its bank to the last
+        response.
+        """
+        self.planner = planner
+        self.retriever = retriever
         self.templates_general = [
             "Could you tell me a bit more about that experience?",
             "When you picture that moment, what scenes come to mind?",
@@ -69,16 +196,144 @@ class EmotionAwareQuestionGenerator:
             ],
         }
 
+        self.templates_by_entity_kind = {
+            "person": [
+                "You mentioned {name}. What was {name} like?",
+                "How did {name} shape this part of your life?",
+            ],
+            "place": [
+                "What do you remember most about {name}?",
+                "When you think of {name}, what sights or sounds come back to you?",
+            ],
+            "date": [
+                "What else was happening in your life around {name}?",
+                "How did life feel for you back in {name}?",
+            ],
+            "organization": [
+                "What was it like being part of {name}?",
+                "How did your time with {name} affect you?",
+            ],
+            "topic": [
+                "You mentioned {name}. Could you tell me more about that?",
+                "What does {name} mean to you?",
+            ],
+        }
+
     def _choose(self, templates: List[str]) -> str:
         return random.choice(templates)
 
+    def _turn_entities(self, entities, state: DialogueState):
+        last_text = state.history[-1] if state.history else ""
+        dates = [{"text": m.group(0), "label": "DATE"} for m in _YEAR.finditer(last_text)]
+        return list(entities or []) + dates
+
+    def _entity_follow_up(self, state: DialogueState) -> Optional[str]:
+        record = state.entities.next_follow_up()
+        if record is None:
+            return None
+        return self._choose(self.templates_by_entity_kind[record.kind]).format(name=record.text)
+
     def generate(
         self,
         dominant_emotion: str,
         entities: List[Dict[str, str]],
         state: DialogueState,
+        category: str = None,
+        speculation: Optional[Speculation] = None,
     ) -> str:
+        """
+        speculation: result of speculate() taken on this state before the
+        last response was added. Used when still valid for the analysed
+        emotion and entities; otherwise the question is computed as usual.
+        """
+        turn_entities = self._turn_entities(entities, state)
+        if speculation is not None:
+            question = self._adopt(speculation, dominant_emotion, turn_entities, state, category)
+            if question is not None:
+                return question
+
         state.turns += 1
+        state.entities.update(turn_entities, turn=state.turns)
+        return self._next_question(dominant_emotion, state, category)
+
+    def category_done(self, state: DialogueState, category: str = None) -> bool:
+        """
+        Whether the planner has asked all of its own questions for `category`
+        in this session. Always False without a planner: the built-in
+        templates end on an open question that can be asked indefinitely.
+        """
+        return self.planner is not None and state.plan is not None and self.planner.category_done(state.plan, category)
+
+    # ------------------------------ Speculation ------------------------------
+    def _speculative_emotions(self):
+        if self.planner is not None:
+            return [k.split("/", 1)[1] for k in self.planner.tables if k.startswith("emotion/")]
+        return list(self.templates_by_emotion)
+
+    def speculate(self, state: DialogueState, category: str = None) -> Optional[Speculation]:
+        """
+        Precompute the next question for every emotion that has its own
+        templates, plus the plain next stage, on forks of `state`. Meant to
+        run while the participant is still answering: nothing in `state` is
+        modified, and history is shared, not copied.
+
+        Returns None with a retriever, whose questions depend on the text of
+        the answer itself.
+        """
+        if self.retriever is not None:
+            return None
+
+        with tracing.span("question.speculate"):
+            candidates = {}
+            for emotion in self._speculative_emotions() + [None]:
+                fork = copy.deepcopy(state, {id(state.history): state.history})
+                fork.turns += 1
+                candidates[emotion] = (self._next_question(emotion or "neutral", fork, category), fork)
+        return Speculation(turns=state.turns, category=category, candidates=candidates)
+
+    def _adopt(self, speculation, dominant_emotion, turn_entities, state, category):
+        """Take over the matching precomputed question, or None if it is stale."""
+        if speculation.turns != state.turns or speculation.category != category:
+            return None
+        # A new entity would have been asked about before anything else.
+        if (state.asked_about_context and not state.last_was_follow_up
+                and state.entities.has_new(turn_entities)):
+            return None
+
+        question, fork = speculation.pick(dominant_emotion)
+        for f in fields(state):
+            if f.name != "history":
+                setattr(state, f.name, getattr(fork, f.name))
+        # Only mention counts change here (plus entities that arrive while a
+        # follow-up is not due), exactly as if they had been merged first.
+        state.entities.update(turn_entities, turn=state.turns)
+        return question
+
+    def _next_question(self, dominant_emotion, state, category):
+        # Alternate: after an entity follow-up, return to the regular flow.
+        if not state.last_was_follow_up and state.asked_about_context:
+            question = self._entity_follow_up(state)
+            if question:
+                state.last_was_follow_up = True
+                return question
+        state.last_was_follow_up = False
+
+        if self.retriever is not None and state.history:
+            if state.retrieval is None:
+                state.retrieval = self.retriever.new_state()
+            question = self.retriever.next_question(
+                state.history[-1], state.retrieval, category=category, emotion=dominant_emotion
+            )
+            if question:
+                state.asked_about_context = True
+                return question
+
+        if self.planner is not None:
+            if state.plan is None:
+                state.plan = self.planner.new_state()
+            # The planner's first stage is the context question.
+            state.asked_about_context = True
+            return self.planner.next_question(state.plan, category, dominant_emotion)
 
         if not state.asked_about_context:
             state.asked_about_context = True
@@ -0,0 +1,178 @@
+"""
+Data-driven, category-aware question planner.
+
+Templates live in data/question_templates.json: a stage sequence, general
+per-stage tables, per-category overrides of those stages, per-emotion tables
+and a fallback table. The planner is loaded once and is immutable, so a
+single instance can be shared by every session in a server; all per-session
+progress lives in a small, JSON-serialisable PlannerState.
+
+No template repeats until its table is exhausted. Each table gets a few
+shuffled index orders precomputed at load time, and a session only keeps
+(which order, position) per table, so picking a question is O(1).
+"""
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_TEMPLATES = Path(__file__).resolve().parents[1] / "data" / "question_templates.json"
+
+
+def normalize_category(category):
+    """'2. Early Life' / 'early life' / None -> 'early life' / None."""
+    if not category:
+        return None
+    name = category.split(".", 1)[1] if category.split(".", 1)[0].strip().isdigit() else category
+    return name.strip().lower()
+
+
+@dataclass
+class PlannerState:
+    seed: int = 0
+    stage_index: int = 0
+    # table key -> [permutation id, position in that permutation]
+    cursors: Dict[str, List[int]] = field(default_factory=dict)
+    last_key: str = ""
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "stage_index": self.stage_index,
+            "cursors": {k: list(v) for k, v in self.cursors.items()},
+            "last_key": self.last_key,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            seed=data.get("seed", 0),
+            stage_index=data.get("stage_index", 0),
+            cursors={k: list(v) for k, v in data.get("cursors", {}).items()},
+            last_key=data.get("last_key", ""),
+        )
+
+
+class QuestionPlanner:
+
+    _shared = {}
+
+    def __init__(self, templates, n_permutations=8, seed=0):
+        """
+        :param templates: parsed question_templates.json
+        :param n_permutations: shuffled orders precomputed per table
+        """
+        self.stages = list(templates["stages"])
+        self.tables = {}
+
+        for stage, questions in templates.get("stage_templates", {}).items():
+            self.tables[f"stage/{stage}"] = tuple(questions)
+        for category, stages in templates.get("category_templates", {}).items():
+            for stage, questions in stages.items():
+                self.tables[f"category/{category.lower()}/{stage}"] = tuple(questions)
+        for emotion, questions in templates.get("emotion_templates", {}).items():
+            self.tables[f"emotion/{emotion.lower()}"] = tuple(questions)
+        self.tables["fallback"] = tuple(templates.get("fallback", []))
+
+        # Per category: the tables to draw from once the stage sequence is
+        # done, in preference order (after the emotion table).
+        self.followup_keys = {}
+        for category, stages in templates.get("category_templates", {}).items():
+            self.followup_keys[category.lower()] = tuple(
+                f"category/{category.lower()}/{stage}" for stage in self.stages if stage in stages
+            )
+
+        rng = random.Random(seed)
+        self.permutations = {}
+        for key, questions in self.tables.items():
+            orders = []
+            for _ in range(n_permutations):
+                order = list(range(len(questions)))
+                rng.shuffle(order)
+                orders.append(tuple(order))
+            self.permutations[key] = orders
+
+    @classmethod
+    def load(cls, path=DEFAULT_TEMPLATES):
+        """Load (once per path) and return the shared planner."""
+        path = str(path)
+        if path not in cls._shared:
+            with open(path, "r", encoding="utf-8") as f:
+                cls._shared[path] = cls(json.load(f))
+        return cls._shared[path]
+
+    def new_state(self, seed=None):
+        return PlannerState(seed=random.getrandbits(31) if seed is None else seed)
+
+    # ------------------------------ Selection ------------------------------
+    def _table_key(self, state, category, emotion):
+        if state.stage_index < len(self.stages):
+            stage = self.stages[state.stage_index]
+            state.stage_index += 1
+            key = f"category/{category}/{stage}"
+            return key if key in self.tables else f"stage/{stage}"
+
+        emotion_key = f"emotion/{emotion}"
+        candidates = (
+            ((emotion_key,) if emotion_key in self.tables else ())
+            + self.followup_keys.get(category, ())
+            + ("fallback",)
+        )
+        for key in candidates:
+            if not self._exhausted(state, key):
+                return key
+        # Everything has been asked once: cycle the most specific table.
+        return candidates[0]
+
+    def _exhausted(self, state, key):
+        cursor = state.cursors.get(key)
+        return cursor is not None and cursor[1] >= len(self.tables[key])
+
+    def _first_permutation(self, state, key):
+        digest = hashlib.blake2b(f"{state.seed}:{key}".encode(), digest_size=4).digest()
+        return int.from_bytes(digest, "little") % len(self.permutations[key])
+
+    def _draw(self, state, key):
+        questions = self.tables[key]
+        orders = self.permutations[key]
+        cursor = state.cursors.get(key)
+        if cursor is None:
+            cursor = [self._first_permutation(state, key), 0]
+        perm_id, pos = cursor
+
+        if pos >= len(questions):
+            # Table exhausted: continue with the next order, avoiding an
+            # immediate repeat of the last question across the boundary.
+            last = orders[perm_id][-1]
+            for step in range(1, len(orders) + 1):
+                candidate = (perm_id + step) % len(orders)
+                if len(questions) == 1 or orders[candidate][0] != last:
+                    break
+            perm_id, pos = candidate, 0
+
+        state.cursors[key] = [perm_id, pos + 1]
+        state.last_key = key
+        return questions[orders[perm_id][pos]]
+
+    def next_question(self, state, category=None, emotion=None):
+        """
+        Next question for a session: the stage sequence first (category
+        overrides where defined), then unasked emotion-specific, category
+        and fallback questions, in that order.
+        """
+        key = self._table_key(state, normalize_category(category), (emotion or "").lower())
+        if not self.tables[key]:
+            key = "fallback"
+        return self._draw(state, key)
+
+    def category_done(self, state, category=None):
+        """
+        True once the stage sequence is over and every question of the
+        category's own tables has been asked; from here on the session would
+        only get emotion and fallback questions.
+        """
+        if state.stage_index < len(self.stages):
+            return False
+        return all(self._exhausted(state, key) for key in self.followup_keys.get(normalize_category(category), ()))
@@ -0,0 +1,179 @@
+"""
+Semantic retrieval over a large bank of interview questions.
+
+The bank is embedded once (scripts/build_question_index.py) into an index
+directory:
+
+    embeddings.npy   float32 (N, D), L2-normalised rows, memory-mapped on load
+    questions.json   texts, category/emotion ids per row and their vocabularies
+
+Each turn embeds the participant's last response and scores every question
+with one matrix-vector product, plus small bonuses for matching the current
+category and emotion. Questions the session already asked are masked out.
+With 50k questions and 384-dim vectors this is a few milliseconds on CPU.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import tracing
+from question_planner import normalize_category
+
+EMBEDDINGS_FILE = "embeddings.npy"
+META_FILE = "questions.json"
+DEFAULT_EMBEDDER = "all-MiniLM-L6-v2"
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parents[1] / "models" / "question_index"
+
+
+def _vocab_ids(values):
+    vocab = sorted({v for v in values if v})
+    lookup = {v: i + 1 for i, v in enumerate(vocab)}  # 0 = untagged
+    return vocab, [lookup.get(v, 0) for v in values]
+
+
+def build_index(questions, out_dir, embedder_name, embedder=None, batch_size=256):
+    """
+    questions: list of {"text", "category"?, "emotion"?}; categories accept
+    the CATEGORIES spelling or a plain name.
+    embedder_name: SentenceTransformer model name, recorded in the index and
+    checked by QuestionRetriever; `embedder`, if given, must be that model.
+    """
+    if embedder is None:
+        from sentence_transformers import SentenceTransformer
+        embedder = SentenceTransformer(embedder_name)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    texts = [q["text"] for q in questions]
+    vectors = embedder.encode(
+        texts, batch_size=batch_size, normalize_embeddings=True,
+        convert_to_numpy=True, show_progress_bar=len(texts) > 10000,
+    ).astype(np.float32)
+    np.save(out_dir / EMBEDDINGS_FILE, vectors)
+
+    categories, category_ids = _vocab_ids([normalize_category(q.get("category")) for q in questions])
+    emotions, emotion_ids = _vocab_ids([(q.get("emotion") or "").lower() for q in questions])
+    meta = {
+        "embedder": embedder_name,
+        "texts": texts,
+        "categories": categories,
+        "category_ids": category_ids,
+        "emotions": emotions,
+        "emotion_ids": emotion_ids,
+    }
+    with (out_dir / META_FILE).open("w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return vectors.shape
+
+
+class RetrievalState:
+    """Per-session bookkeeping: which rows of the bank were already asked."""
+
+    def __init__(self, n_questions):
+        self.asked = np.zeros(n_questions, dtype=bool)
+        self.n_asked = 0
+
+    def mark(self, idx):
+        if not self.asked[idx]:
+            self.asked[idx] = True
+            self.n_asked += 1
+
+
+class QuestionRetriever:
+
+    def __init__(
+        self,
+        index_dir="models/question_index",
+        embedder=None,
+        embedder_name=None,
+        category_weight=0.15,
+        emotion_weight=0.10,
+    ):
+        """
+        :param index_dir: directory written by build_index()
+        :param embedder: SentenceTransformer for queries; default: the model the index was built with
+        :param embedder_name: model name of `embedder` (required with it), checked against the index
+        :param category_weight / emotion_weight: score bonus for questions
+                                                 tagged with the current category / emotion
+        """
+        index_dir = Path(index_dir)
+        self.embeddings = np.load(index_dir / EMBEDDINGS_FILE, mmap_mode="r")
+        with (index_dir / META_FILE).open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.texts = meta["texts"]
+        self.category_ids = np.asarray(meta["category_ids"], dtype=np.int16)
+        self.emotion_ids = np.asarray(meta["emotion_ids"], dtype=np.int16)
+        self.category_lookup = {c: i + 1 for i, c in enumerate(meta["categories"])}
+        self.emotion_lookup = {e: i + 1 for i, e in enumerate(meta["emotions"])}
+        self.category_weight = np.float32(category_weight)
+        self.emotion_weight = np.float32(emotion_weight)
+
+        indexed = meta.get("embedder")
+        if not indexed:
+            raise ValueError(f"{index_dir} does not record its embedder; rebuild it with scripts/build_question_index.py")
+        if embedder is not None and embedder_name is None:
+            raise ValueError("embedder_name is required with a custom embedder, to check it against the index")
+        if embedder_name is not None and embedder_name != indexed:
+            raise ValueError(f"{index_dir} was embedded with {indexed!r}, not {embedder_name!r}")
+        if embedder is None:
+            from sentence_transformers import SentenceTransformer
+            embedder = SentenceTransformer(indexed)
+        self.embedder = embedder
+        self.embedder_name = indexed
+
+    def __len__(self):
+        return len(self.texts)
+
+    def new_state(self):
+        return RetrievalState(len(self.texts))
+
+    def embed(self, text):
+        with tracing.span("retrieval.embed"):
+            return self.embedder.encode(
+                [text], normalize_embeddings=True, convert_to_numpy=True
+            )[0].astype(np.float32)
+
+    def scores(self, query_vec, category=None, emotion=None, state=None):
+        """Similarity of every question to the query, with bonuses and the asked mask."""
+        with tracing.span("retrieval.score", n=len(self.texts)):
+            scores = self.embeddings @ query_vec
+            cid = self.category_lookup.get(normalize_category(category))
+            if cid:
+                scores += self.category_weight * (self.category_ids == cid)
+            eid = self.emotion_lookup.get((emotion or "").lower())
+            if eid:
+                scores += self.emotion_weight * (self.emotion_ids == eid)
+            if state is not None and state.n_asked:
+                scores[state.asked] = -np.inf
+        return scores
+
+    def top_k(self, query_vec, k=5, category=None, emotion=None, state=None):
+        scores = self.scores(query_vec, category, emotion, state)
+        k = min(k, len(scores))
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx])]
+        return [(int(i), self.texts[i], float(scores[i])) for i in idx if np.isfinite(scores[i])]
+
+    def next_question(self, last_response, state, category=None, emotion=None):
+        """Nearest unasked question to the last response; marks it as asked."""
+        if state.n_asked >= len(self.texts):
+            return None
+        scores = self.scores(self.embed(last_response), category, emotion, state)
+        idx = int(np.argmax(scores))
+        state.mark(idx)
+        return self.texts[idx]
+
+
+def load_retriever(index_dir=None):
+    """
+    QuestionRetriever over `index_dir` (default: MELO_QUESTION_INDEX, else
+    models/question_index), or None when no index was built there or
+    MELO_QUESTION_INDEX is "off"; callers then keep the template questions.
+    """
+    index_dir = index_dir or os.environ.get("MELO_QUESTION_INDEX") or DEFAULT_INDEX_DIR
+    if str(index_dir).lower() == "off" or not (Path(index_dir) / META_FILE).exists():
+        return None
+    return QuestionRetriever(index_dir)
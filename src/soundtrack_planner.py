@@ -0,0 +1,169 @@
+"""
+Session soundtrack planning with dynamic-programming smoothing.
+
+Choosing the closest track for every turn on its own makes the soundtrack
+jump between moods. SoundtrackPlanner instead:
+
+  1. maps each turn's emotion scores to a valence/arousal(/dominance) point,
+  2. retrieves the top-k nearest tracks for all turns in one batched
+     distance computation over a TrackIndex (no per-track Python loop),
+  3. picks one candidate per turn with Viterbi over
+         emission   = distance of the track to the turn's mood
+         transition = smoothness * mood jump between consecutive tracks
+                      + switch_cost whenever the track changes
+     in O(T * k^2).
+
+    index = TrackIndex.from_dataset(load_dataset("Acervans/Lastfm-VADS")["train"])
+    plan = SoundtrackPlanner(index, k=10).plan(trajectory)   # EmotionTrajectory or (T, D) array
+"""
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+import tracing
+from emotion_trajectory import EmotionTrajectory
+
+VAD_COLUMNS = ("valence", "arousal", "dominance")
+# Discrete emotion -> (valence, arousal, dominance), all in [0, 1]
+EMOTION_VAD = {
+    "joy":       (0.9, 0.6, 0.7),
+    "sadness":   (0.1, 0.3, 0.4),
+    "anger":     (0.2, 0.7, 0.8),
+    "fear":      (0.2, 0.8, 0.6),
+    "surprise":  (0.7, 0.7, 0.6),
+    "disgust":   (0.1, 0.6, 0.5),
+    "neutral":   (0.5, 0.5, 0.5),
+    "love":      (0.9, 0.6, 0.8),
+    "optimism":  (0.8, 0.5, 0.7),
+    "pessimism": (0.2, 0.4, 0.5),
+    "nostalgia": (0.6, 0.4, 0.6),
+    "pride":     (0.8, 0.6, 0.8),
+    "humor":     (0.8, 0.6, 0.6),
+    "resilience": (0.7, 0.5, 0.8),
+}
+
+
+def emotion_vads(trajectory, columns=("valence", "arousal")):
+    """(T, len(columns)) mood points: score-weighted mean of EMOTION_VAD per turn."""
+    labels = trajectory.labels or ()
+    cols = [VAD_COLUMNS.index(c) for c in columns]
+    known = np.array([lbl in EMOTION_VAD for lbl in labels], dtype=np.float32)
+    table = np.array([EMOTION_VAD.get(lbl, (0.5, 0.5, 0.5)) for lbl in labels], dtype=np.float32)
+    table = table[:, cols] if len(labels) else np.zeros((0, len(cols)), dtype=np.float32)
+
+    m = trajectory.matrix * known  # unknown labels do not vote
+    total = m.sum(axis=1, keepdims=True)
+    vads = np.divide(m @ table, total, out=np.full((len(m), len(cols)), 0.5, dtype=np.float32), where=total > 0)
+    return vads
+
+
+class TrackIndex:
+
+    def __init__(self, vectors, tracks):
+        """
+        :param vectors: (N, D) mood coordinates of each track
+        :param tracks: indexable track metadata, tracks[i] for row i
+        """
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.sq_norms = (self.vectors ** 2).sum(axis=1)
+        self.tracks = tracks
+
+    @classmethod
+    def from_dataset(cls, dataset, columns=("valence", "arousal")):
+        """Index a Lastfm-VADS style dataset (columnar access, no per-row Python)."""
+        vectors = np.stack([np.asarray(dataset[c], dtype=np.float32) for c in columns], axis=1)
+        return cls(vectors, dataset)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def nearest(self, queries, k=10, chunk_elements=1 << 24):
+        """
+        Top-k tracks per query row by Euclidean distance, nearest first.
+        Returns (indices (Q, k), distances (Q, k)). Queries are processed in
+        chunks so the (Q, N) distance block stays bounded.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        rows = max(1, chunk_elements // max(1, len(self)))
+        idx_out = np.empty((len(queries), k), dtype=np.int64)
+        dist_out = np.empty((len(queries), k), dtype=np.float32)
+
+        for start in range(0, len(queries), rows):
+            q = queries[start:start + rows]
+            d2 = (q ** 2).sum(axis=1)[:, None] + self.sq_norms[None, :] - 2.0 * (q @ self.vectors.T)
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            # Exact distances for the k survivors (the expanded form above
+            # loses precision for very close points).
+            part_d = np.linalg.norm(q[:, None, :] - self.vectors[part], axis=2)
+            order = np.argsort(part_d, axis=1)
+            idx_out[start:start + rows] = np.take_along_axis(part, order, axis=1)
+            dist_out[start:start + rows] = np.take_along_axis(part_d, order, axis=1)
+        return idx_out, dist_out
+
+
+@dataclass
+class PlannedTrack:
+    turn: int
+    index: int
+    distance: float
+    track: Any
+
+
+class SoundtrackPlanner:
+
+    def __init__(self, index, k=10, smoothness=1.0, switch_cost=0.05, columns=("valence", "arousal")):
+        """
+        :param index: TrackIndex over the same mood columns
+        :param k: candidate tracks per turn
+        :param smoothness: weight of the mood distance between consecutive tracks
+        :param switch_cost: flat cost of changing track between turns
+        :param columns: mood dimensions used when planning from an EmotionTrajectory
+        """
+        self.index = index
+        self.k = k
+        self.smoothness = smoothness
+        self.switch_cost = switch_cost
+        self.columns = columns
+
+    def viterbi(self, cand_idx, cand_dist):
+        """Lowest-cost path through the (T, k) candidate lattice; returns one column per turn."""
+        T, k = cand_idx.shape
+        cost = cand_dist[0].astype(np.float64)
+        back = np.zeros((T, k), dtype=np.int64)
+        vecs = self.index.vectors[cand_idx]  # (T, k, D)
+
+        for t in range(1, T):
+            jump = np.linalg.norm(vecs[t - 1][:, None, :] - vecs[t][None, :, :], axis=2)
+            trans = self.smoothness * jump + self.switch_cost * (cand_idx[t - 1][:, None] != cand_idx[t][None, :])
+            total = cost[:, None] + trans  # (prev k, next k)
+            back[t] = total.argmin(axis=0)
+            cost = total[back[t], np.arange(k)] + cand_dist[t]
+
+        path = np.empty(T, dtype=np.int64)
+        path[-1] = int(cost.argmin())
+        for t in range(T - 1, 0, -1):
+            path[t - 1] = back[t, path[t]]
+        return path
+
+    def plan(self, moods):
+        """
+        One track per turn for a session.
+        :param moods: EmotionTrajectory, or a (T, D) array of mood points
+        """
+        if isinstance(moods, EmotionTrajectory):
+            moods = emotion_vads(moods, self.columns)
+        moods = np.atleast_2d(np.asarray(moods, dtype=np.float32))
+        if len(moods) == 0 or len(self.index) == 0:
+            return []
+
+        with tracing.span("soundtrack.candidates", turns=len(moods), k=self.k):
+            cand_idx, cand_dist = self.index.nearest(moods, self.k)
+        with tracing.span("soundtrack.viterbi", turns=len(moods)):
+            path = self.viterbi(cand_idx, cand_dist)
+
+        return [
+            PlannedTrack(t, int(cand_idx[t, c]), float(cand_dist[t, c]), self.index.tracks[int(cand_idx[t, c])])
+            for t, c in enumerate(path)
+        ]
@@ -0,0 +1,203 @@
+"""
+Sentence-level streaming analysis of long participant responses.
+
+NLPPipeline.analyze sees a whole response as one input, so long spoken
+answers are truncated at the model's token limit and their emotion is a
+blur over the entire monologue. StreamingAnalyzer splits a response into
+sentences (the granularity of `sentence_annotations` in data/dataset_50),
+classifies them in batches, yields per-sentence results as each batch
+finishes, and aggregates them into one turn-level result.
+
+    sa = StreamingAnalyzer(nlp, weighting="length")
+    for r in sa.iter_analyze(long_answer):
+        print(r.index, r.dominant)
+    dominant, emo_vec, entities = sa.analyze(long_answer)   # drop-in for nlp.analyze
+
+BackgroundAnalyzer does the same for text that arrives in pieces (speech
+transcribed segment by segment): each piece is analysed on a worker thread
+as soon as it is submitted, and finish() only waits for the last one.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+import tracing
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_MIN_WORDS = 3
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "jr.", "sr.", "prof.", "vs.", "mt."}
+
+
+def split_sentences(text, min_words=_MIN_WORDS):
+    """
+    Split on sentence-final punctuation followed by a capitalised start.
+    Fragments shorter than `min_words` ("Oh!", "Yes.") and splits after a
+    title abbreviation ("Mr.") are merged into the following sentence.
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+    parts = [p.strip() for p in _SENTENCE_END.split(text) if p.strip()]
+
+    sentences = []
+    carry = ""
+    for part in parts:
+        part = f"{carry} {part}".strip() if carry else part
+        words = part.split()
+        if len(words) < min_words or words[-1].lower() in _ABBREVIATIONS:
+            carry = part
+            continue
+        sentences.append(part)
+        carry = ""
+    if carry:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
+
+
+@dataclass
+class SentenceResult:
+    index: int
+    text: str
+    dominant: str
+    emotions: Dict[str, float]
+    entities: List[Dict[str, str]] = field(default_factory=list)
+
+
+# ------------------------------ Weighting ------------------------------
+def _uniform(results):
+    return np.ones(len(results))
+
+
+def _length(results):
+    return np.array([len(r.text) for r in results], dtype=np.float64)
+
+
+def _confidence(results):
+    return np.array([max(r.emotions.values()) for r in results], dtype=np.float64)
+
+
+def _recency(results, decay=0.8):
+    # The last sentence weighs 1, the one before it `decay`, and so on.
+    n = len(results)
+    return decay ** np.arange(n - 1, -1, -1, dtype=np.float64)
+
+
+WEIGHTINGS = {
+    "uniform": _uniform,
+    "length": _length,
+    "confidence": _confidence,
+    "recency": _recency,
+}
+
+
+def aggregate(results, weighting="length"):
+    """
+    Weighted mean of the per-sentence emotion vectors, plus entities merged in
+    order of first mention. `weighting` is a WEIGHTINGS key or a callable
+    mapping the result list to one weight per sentence.
+    """
+    if not results:
+        return "neutral", {}, []
+
+    weight_fn = WEIGHTINGS[weighting] if isinstance(weighting, str) else weighting
+    weights = np.asarray(weight_fn(results), dtype=np.float64)
+    if weights.sum() <= 0:
+        weights = np.ones(len(results))
+
+    labels = list(results[0].emotions)
+    matrix = np.array([[r.emotions.get(lbl, 0.0) for lbl in labels] for r in results])
+    mean = weights @ matrix / weights.sum()
+    emo_vec = {lbl: float(v) for lbl, v in zip(labels, mean)}
+    dominant = max(emo_vec, key=emo_vec.get)
+
+    seen = {}
+    for r in results:
+        for e in r.entities:
+            seen.setdefault(e["text"].lower(), e)
+    return dominant, emo_vec, list(seen.values())
+
+
+class StreamingAnalyzer:
+
+    def __init__(self, nlp, batch_size=8, weighting="length", first_batch_size=1):
+        """
+        :param nlp: NLPPipeline (or anything with analyze_batch)
+        :param batch_size: sentences per forward pass after the first batch
+        :param weighting: how sentences combine into the turn-level vector
+        :param first_batch_size: size of the first batch; kept small so the
+                                 opening sentence's result arrives quickly
+        """
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.weighting = weighting
+        self.first_batch_size = first_batch_size
+
+    def iter_analyze(self, text):
+        """Yield a SentenceResult per sentence, one batch at a time."""
+        sentences = split_sentences(text)
+        start = 0
+        size = self.first_batch_size
+        while start < len(sentences):
+            batch = sentences[start:start + size]
+            with tracing.span("stream.batch", sentences=len(batch)):
+                analyses = self.nlp.analyze_batch(batch, batch_size=len(batch))
+            for offset, (sentence, (dominant, emo_vec, entities)) in enumerate(zip(batch, analyses)):
+                yield SentenceResult(start + offset, sentence, dominant, emo_vec, entities)
+            start += len(batch)
+            size = self.batch_size
+
+    def analyze_sentences(self, text):
+        return list(self.iter_analyze(text))
+
+    def analyze(self, text, weighting=None):
+        """Turn-level (dominant, emo_vec, entities), like NLPPipeline.analyze."""
+        return aggregate(self.analyze_sentences(text), weighting or self.weighting)
+
+
+class BackgroundAnalyzer:
+
+    def __init__(self, analyzer, weighting=None):
+        """
+        :param analyzer: StreamingAnalyzer used for every piece
+        :param weighting: aggregation weighting; defaults to the analyzer's
+        """
+        self.analyzer = analyzer
+        self.weighting = weighting or analyzer.weighting
+        # One worker keeps pieces in order and leaves the caller's thread free
+        # (to keep reading audio); torch releases the GIL in the forward pass.
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlp-partial")
+        self._futures = []
+
+    def submit(self, text):
+        """Queue one piece (e.g. a transcribed speech segment) for analysis."""
+        self._futures.append(self._pool.submit(self.analyzer.analyze_sentences, text))
+
+    def results(self):
+        """Per-sentence results of every piece so far, re-indexed; waits for all."""
+        results = []
+        for fut in self._futures:
+            for r in fut.result():
+                r.index = len(results)
+                results.append(r)
+        return results
+
+    def finish(self):
+        """Turn-level (dominant, emo_vec, entities) over all pieces."""
+        try:
+            with tracing.span("stream.finish", pieces=len(self._futures)):
+                return aggregate(self.results(), self.weighting)
+        finally:
+            self._pool.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        return False
@@ -0,0 +1,220 @@
+"""
+Lightweight span tracing for the interview pipeline.
+
+Tracing is off by default; span() then hands back a shared no-op object, so
+an instrumented call costs one global flag check. When enabled, finished
+spans are kept for a per-session latency breakdown and, optionally, written
+as OpenTelemetry-style JSON lines to a local file.
+
+    with tracing.span("nlp.analyze", chars=len(text)):
+        ...
+
+Set MELO_TRACE=1 to trace in memory only, or MELO_TRACE=/path/trace.jsonl
+to export spans as well.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+_enabled = False
+_exporter = None
+_lock = threading.Lock()
+_finished = []
+_trace_id = None
+_current = contextvars.ContextVar("melo_current_span", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = (
+        "name", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "status", "_t0", "_token",
+    )
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = None
+        self.status = "OK"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        parent = _current.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self._t0
+        self.end_ns = self.start_ns + duration
+        if exc_type is not None:
+            self.status = "ERROR"
+            self.attributes["exception.type"] = exc_type.__name__
+        _current.reset(self._token)
+        _record(self)
+        return False
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+def span(name, **attributes):
+    """Context manager timing one stage; a no-op while tracing is disabled."""
+    if not _enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def traced(name=None):
+    """Decorator form of span(); the name defaults to the function's qualname."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_enabled():
+    return _enabled
+
+
+# ------------------------------ Recording / export ------------------------------
+class _JsonlExporter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def export(self, s):
+        record = {
+            "traceId": _trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id,
+            "name": s.name,
+            "startTimeUnixNano": s.start_ns,
+            "endTimeUnixNano": s.end_ns,
+            "attributes": s.attributes,
+            "status": {"code": s.status},
+            "thread": threading.current_thread().name,
+        }
+        self.file.write(json.dumps(record, default=str) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def _record(s):
+    with _lock:
+        _finished.append((s.name, s.end_ns - s.start_ns))
+        if _exporter is not None:
+            _exporter.export(s)
+
+
+def enable(export_path=None):
+    """Turn tracing on, optionally appending spans to a JSONL file."""
+    global _enabled, _exporter
+    with _lock:
+        if _exporter is not None:
+            _exporter.close()
+        _exporter = _JsonlExporter(export_path) if export_path else None
+        _enabled = True
+    start_session()
+
+
+def enable_from_env(var="MELO_TRACE"):
+    value = os.environ.get(var, "").strip()
+    if not value or value == "0":
+        return False
+    enable(None if value == "1" else value)
+    return True
+
+
+def disable():
+    global _enabled, _exporter
+    with _lock:
+        _enabled = False
+        if _exporter is not None:
+            _exporter.close()
+            _exporter = None
+
+
+atexit.register(disable)
+
+
+# ------------------------------ Session breakdown ------------------------------
+def start_session():
+    """Start a new trace; the breakdown only covers spans recorded after this."""
+    global _trace_id
+    with _lock:
+        _trace_id = uuid.uuid4().hex
+        _finished.clear()
+
+
+def session_breakdown():
+    """Per-stage latency summary of the spans recorded in this session."""
+    with _lock:
+        finished = list(_finished)
+
+    by_name = {}
+    for name, duration_ns in finished:
+        by_name.setdefault(name, []).append(duration_ns / 1e6)
+
+    breakdown = {}
+    for name, durations in by_name.items():
+        ms = np.asarray(durations)
+        breakdown[name] = {
+            "count": int(ms.size),
+            "total_ms": float(ms.sum()),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+        }
+    return dict(sorted(breakdown.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+
+def print_session_breakdown():
+    breakdown = session_breakdown()
+    if not breakdown:
+        return
+    print("\n==============================")
+    print("      LATENCY BREAKDOWN")
+    print("==============================\n")
+    print(f"{'stage':<28}{'count':>6}{'total ms':>11}{'mean ms':>10}{'p95 ms':>10}")
+    for name, s in breakdown.items():
+        print(f"{name:<28}{s['count']:>6}{s['total_ms']:>11.1f}"
+              f"{s['mean_ms']:>10.1f}{s['p95_ms']:>10.1f}")
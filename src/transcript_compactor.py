@@ -0,0 +1,162 @@
+"""
+Transcript compaction and token budgeting before LLM calls.
+
+Interview transcripts reach the memoir generators with source indentation,
+interviewer / Melo questions (which the prompts then ask the model to
+remove) and "[Category: ...]" prefixes. TranscriptCompactor keeps only the
+participant's words with normalised whitespace and, given a token budget,
+keeps the most salient sentences in their original order. Salience is the
+sentence's emotional intensity from NLPPipeline (1 - P(neutral)), with a
+small bonus per named entity, since people and places anchor a memoir.
+
+    compactor = TranscriptCompactor(token_budget=1500, nlp=NLPPipeline(),
+                                    count_tokens=openai_token_counter("gpt-4o-mini"))
+    text = compactor.compact(transcript)
+    compactor.last_stats  # {"tokens_in": ..., "tokens_out": ..., ...}
+"""
+import re
+
+import tracing
+from streaming_analyzer import split_sentences
+
+_SPEAKER = re.compile(r"^\s*(?P<speaker>[A-Za-z]+)\s*:\s*(?P<text>.*)$")
+_CATEGORY_TAG = re.compile(r"\[Category:[^\]]*\]\s*")
+INTERVIEWER_SPEAKERS = {"interviewer", "melo", "ai", "assistant"}
+PARTICIPANT_SPEAKERS = {"participant", "subject", "user"}
+ENTITY_BONUS = 0.1
+
+
+# ------------------------------ Token counting ------------------------------
+def approx_token_count(text):
+    """~4 characters per token; used when no tokenizer is available."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def openai_token_counter(model="gpt-4o-mini"):
+    """Token counter for an OpenAI model (tiktoken), or the approximation without tiktoken."""
+    try:
+        import tiktoken
+    except ImportError:
+        return approx_token_count
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+def hf_token_counter(tokenizer):
+    """Token counter for a Hugging Face tokenizer (e.g. a pipeline's .tokenizer)."""
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+# ------------------------------ Compaction ------------------------------
+def participant_lines(transcript):
+    """
+    Participant text of a transcript, one entry per turn: interviewer lines
+    and category tags dropped, whitespace normalised. Lines without a speaker
+    prefix are treated as the participant's (already-extracted text).
+    """
+    lines = []
+    for raw in transcript.splitlines():
+        m = _SPEAKER.match(raw)
+        if m and m.group("speaker").lower() in INTERVIEWER_SPEAKERS:
+            continue
+        text = m.group("text") if m and m.group("speaker").lower() in PARTICIPANT_SPEAKERS else raw
+        text = " ".join(_CATEGORY_TAG.sub("", text).split())
+        if text:
+            lines.append(text)
+    return lines
+
+
+def salience(emo_vec, entities):
+    """Emotional intensity of one sentence plus a bonus per entity."""
+    if not emo_vec:
+        return 0.0
+    intensity = 1.0 - emo_vec["neutral"] if "neutral" in emo_vec else max(emo_vec.values())
+    return intensity + ENTITY_BONUS * len(entities)
+
+
+class TranscriptCompactor:
+
+    def __init__(self, token_budget=None, nlp=None, count_tokens=None, batch_size=32):
+        """
+        :param token_budget: max tokens of participant text; None = clean up only
+        :param nlp: NLPPipeline for salience; without it, over-budget
+                    transcripts keep their earliest sentences
+        :param count_tokens: callable text -> tokens for the target model
+                             (openai_token_counter / hf_token_counter)
+        """
+        self.token_budget = token_budget
+        self.nlp = nlp
+        self.count_tokens = count_tokens or approx_token_count
+        self.batch_size = batch_size
+        self.last_stats = {}
+
+    def _truncate(self, sentence):
+        """Longest prefix of `sentence` within the budget: whole words if any fit, else characters."""
+        words = sentence.split()
+        for pieces, sep in ((words, " "), (list(sentence), "")):
+            lo, hi = 0, len(pieces)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if self.count_tokens(sep.join(pieces[:mid])) <= self.token_budget:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            if lo:
+                return sep.join(pieces[:lo])
+        return sentence[:1]
+
+    def _select(self, sentences):
+        """
+        {index: text} of the most salient sentences that fit the budget. If
+        none fits, the most salient one is kept, truncated to the budget.
+        """
+        costs = [self.count_tokens(s) + 1 for s in sentences]  # +1 for the separator
+        if self.nlp is not None:
+            with tracing.span("compact.salience", sentences=len(sentences)):
+                analyses = self.nlp.analyze_batch(sentences, batch_size=self.batch_size)
+            scores = [salience(emo_vec, ents) for _, emo_vec, ents in analyses]
+        else:
+            scores = [0.0] * len(sentences)
+
+        # Most salient first; ties (and the no-NLP case) keep transcript order.
+        order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+        kept, used = {}, 0
+        for i in order:
+            if used + costs[i] <= self.token_budget:
+                kept[i] = sentences[i]
+                used += costs[i]
+        if not kept and order:
+            kept[order[0]] = self._truncate(sentences[order[0]])
+        return kept
+
+    def compact(self, transcript):
+        """Participant-only, whitespace-normalised text, within the token budget if one is set."""
+        with tracing.span("transcript.compact", chars=len(transcript)) as sp:
+            lines = participant_lines(transcript)
+            text = "\n".join(lines)
+            tokens_in = self.count_tokens(text)
+            stats = {"chars_in": len(transcript), "tokens_in": tokens_in, "tokens_out": tokens_in,
+                     "sentences_dropped": 0}
+
+            if self.token_budget is not None and tokens_in > self.token_budget:
+                sentences, line_of = [], []
+                for n, line in enumerate(lines):
+                    for s in split_sentences(line, min_words=1):
+                        sentences.append(s)
+                        line_of.append(n)
+                kept = self._select(sentences)
+                # Rebuild in transcript order, one line per original turn.
+                rebuilt = {}
+                for i in sorted(kept):
+                    rebuilt.setdefault(line_of[i], []).append(kept[i])
+                text = "\n".join(" ".join(rebuilt[n]) for n in sorted(rebuilt))
+                stats["sentences_dropped"] = len(sentences) - len(kept)
+                stats["tokens_out"] = self.count_tokens(text)
+
+            for key in ("tokens_in", "tokens_out", "sentences_dropped"):
+                sp.set_attribute(key, stats[key])
+            self.last_stats = stats
+        return text
@@ -0,0 +1,54 @@
+"""
+Regenerate the synthetic audio fixtures (deterministic):
+
+    python tests/fixtures/make_fixtures.py
+
+utterance_16k.wav  16 kHz mono int16, 4.5 s: low room noise with two voiced
+                   bursts (harmonic "vowels" with a syllable-rate envelope)
+                   separated by a 0.5 s pause, then 1.8 s of silence.
+"""
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+HERE = Path(__file__).resolve().parent
+
+# (start_s, end_s) of speech in utterance_16k.wav; tests assert against these.
+UTTERANCE_SPEECH = [(0.6, 1.6), (2.1, 2.7)]
+UTTERANCE_SECONDS = 4.5
+
+
+def voiced(n_samples, rng, f0=140.0, level=4000.0):
+    t = np.arange(n_samples) / SAMPLE_RATE
+    tone = sum(np.sin(2 * np.pi * f0 * h * t + rng.uniform(0, 2 * np.pi)) / h for h in range(1, 6))
+    syllables = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 4.0 * t))  # ~4 syllables/s, never silent
+    return level * tone / np.abs(tone).max() * syllables
+
+
+def utterance(seed=7):
+    rng = np.random.default_rng(seed)
+    n = int(UTTERANCE_SECONDS * SAMPLE_RATE)
+    pcm = rng.normal(0.0, 40.0, n)  # room noise, RMS ~40
+    for start, end in UTTERANCE_SPEECH:
+        a, b = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+        pcm[a:b] += voiced(b - a, rng)
+    return np.clip(pcm, -32768, 32767).astype(np.int16)
+
+
+def write_wav(path, pcm):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(pcm.tobytes())
+
+
+def main():
+    write_wav(HERE / "utterance_16k.wav", utterance())
+    print(f"Wrote {HERE / 'utterance_16k.wav'}")
+
+
+if __name__ == "__main__":
+    main()
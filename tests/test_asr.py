@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import asr
+from conftest import FIXTURES
+from make_fixtures import SAMPLE_RATE, UTTERANCE_SPEECH, voiced, write_wav
+
+UTTERANCE = FIXTURES / "utterance_16k.wav"
+PAD_S = 0.15  # Segmenter pad_ms default
+TOLERANCE_S = 0.07  # a couple of 30 ms frames
+
+
+class StubBackend:
+    """Returns canned text per segment and records what it was given."""
+
+    name = "stub"
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.calls = []
+
+    def transcribe(self, pcm, sample_rate=asr.SAMPLE_RATE, prompt=None):
+        self.calls.append((len(pcm) / sample_rate, prompt))
+        return self.texts.pop(0) if self.texts else ""
+
+
+def test_wav_source_frames():
+    frames = list(asr.WavFileSource(UTTERANCE).frames())
+    step = asr.SAMPLE_RATE * asr.FRAME_MS // 1000
+    assert all(len(f) == step for f in frames)
+    assert len(frames) == int(4.5 * asr.SAMPLE_RATE) // step
+
+
+def test_segments_follow_the_speech_in_the_fixture():
+    backend = StubBackend(["I grew up by the sea", "with my two brothers"])
+    transcriber = asr.StreamingTranscriber(backend)
+    segments = list(transcriber.iter_segments(asr.WavFileSource(UTTERANCE)))
+
+    assert [s.text for s in segments] == ["I grew up by the sea", "with my two brothers"]
+    assert [s.index for s in segments] == [0, 1]
+    for seg, (start, end) in zip(segments, UTTERANCE_SPEECH):
+        assert seg.start_s == pytest.approx(start - PAD_S, abs=TOLERANCE_S)
+        assert seg.end_s == pytest.approx(end + PAD_S, abs=TOLERANCE_S)
+    # Each segment is prompted with the previous one's text.
+    assert [prompt for _, prompt in backend.calls] == ["", "I grew up by the sea"]
+    # Calibrated between the room noise (~40 RMS) and the speech (~thousands).
+    assert transcriber.vad.threshold < 1000
+
+
+def test_transcribe_joins_segments():
+    transcriber = asr.StreamingTranscriber(StubBackend(["I grew up", "by the sea"]))
+    assert transcriber.transcribe(asr.WavFileSource(UTTERANCE)) == "I grew up by the sea"
+
+
+def test_pause_longer_than_end_ms_ends_the_utterance():
+    # With end_ms below the 0.5 s pause, the second burst is never heard.
+    backend = StubBackend(["first", "second"])
+    transcriber = asr.StreamingTranscriber(backend, end_ms=400)
+    assert transcriber.transcribe(asr.WavFileSource(UTTERANCE)) == "first"
+
+
+def test_calibration_survives_speech_from_the_first_frame(tmp_path):
+    # Speaking immediately: most of the 0.5 s calibration window is speech,
+    # with one short gap between words.
+    rng = np.random.default_rng(3)
+    pcm = rng.normal(0.0, 40.0, int(3.5 * SAMPLE_RATE))
+    for start, end in [(0.0, 0.3), (0.4, 1.2), (1.8, 2.3)]:
+        a, b = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+        pcm[a:b] += voiced(b - a, rng)
+    path = tmp_path / "speech_at_start.wav"
+    write_wav(path, np.clip(pcm, -32768, 32767).astype(np.int16))
+
+    backend = StubBackend(["one", "two"])
+    transcriber = asr.StreamingTranscriber(backend)
+    segments = list(transcriber.iter_segments(asr.WavFileSource(path)))
+    assert [s.text for s in segments] == ["one", "two"]
+    assert segments[1].start_s == pytest.approx(1.8 - PAD_S, abs=TOLERANCE_S)
+    assert transcriber.vad.threshold < 1000
+
+
+def test_noise_floor_adapts_during_silence():
+    vad = asr.EnergyVAD(min_threshold=0.0)
+    loud = np.full(480, 3000, dtype=np.int16)
+    vad.calibrate([loud] * 10)  # calibrated on speech: threshold far too high
+    quiet = np.random.default_rng(0).normal(0, 40, 480).astype(np.int16)
+    for _ in range(200):
+        vad.is_speech(quiet)
+    assert vad.threshold < 500
+    assert vad.is_speech(loud)
+
+
+def test_fixed_threshold_does_not_adapt():
+    vad = asr.EnergyVAD(threshold=800)
+    for _ in range(50):
+        vad.is_speech(np.zeros(480, dtype=np.int16))
+    assert vad.threshold == 800
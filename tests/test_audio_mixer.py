@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from audio_mixer import MUSIC, Mixer
+
+
+@pytest.mark.parametrize("loop", [False, True])
+def test_empty_pcm_is_rejected(loop):
+    mixer = Mixer(channels=1)
+    with pytest.raises(ValueError):
+        mixer.add(np.zeros(0, dtype=np.int16), loop=loop)
+    assert mixer.sources() == []
+    mixer.render(64)  # nothing left behind to break the mix
+
+
+def test_looping_source_wraps_around():
+    mixer = Mixer(channels=1, block_frames=8)
+    mixer.add(np.array([0.1, 0.2, 0.3], dtype=np.float32), loop=True)
+    out = mixer.render(8)[:, 0]
+    np.testing.assert_allclose(out, [0.1, 0.2, 0.3, 0.1, 0.2, 0.3, 0.1, 0.2], rtol=1e-6)
+
+
+def test_ambience_is_ducked_under_music():
+    mixer = Mixer(channels=1, sample_rate=1000, duck_gain=0.25, duck_attack=0.0)
+    bed = np.full(1000, 0.5, dtype=np.float32)
+    mixer.add(bed, loop=True)
+    mixer.add(np.zeros(1000, dtype=np.float32), role=MUSIC)
+    mixer.render(100)
+    assert mixer.render(100)[-1, 0] == pytest.approx(0.5 * 0.25)
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from inference_scheduler import InferenceScheduler, SchedulerClosed
+
+
+class GatedBatchFn:
+    """Doubles its inputs; the first call blocks until released, so later items queue up."""
+
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, xs):
+        self.batches.append(list(xs))
+        if len(self.batches) == 1:
+            self.started.set()
+            assert self.release.wait(5)
+        return [x * 2 for x in xs]
+
+
+def test_batches_are_bounded_by_max_batch_size():
+    fn = GatedBatchFn()
+    with InferenceScheduler(fn, max_batch_size=4, max_wait_ms=50) as scheduler:
+        first = scheduler.submit(0)
+        assert fn.started.wait(5)
+        futures = [scheduler.submit(i) for i in range(1, 10)]
+        fn.release.set()
+        assert [f.result(5) for f in [first] + futures] == [2 * i for i in range(10)]
+    assert [len(b) for b in fn.batches] == [1, 4, 4, 1]
+    assert scheduler.stats()["items"] == 10
+
+
+def test_first_item_waits_at_most_max_wait_for_company():
+    fn = GatedBatchFn()
+    fn.release.set()
+    with InferenceScheduler(fn, max_batch_size=8, max_wait_ms=100) as scheduler:
+        start = time.perf_counter()
+        a = scheduler.submit(1)
+        b = scheduler.submit(2)
+        assert (a.result(5), b.result(5)) == (2, 4)
+        elapsed = time.perf_counter() - start
+    assert fn.batches == [[1, 2]]
+    assert 0.09 <= elapsed < 1.0
+
+
+def test_cancelled_futures_are_not_run():
+    fn = GatedBatchFn()
+    with InferenceScheduler(fn, max_wait_ms=20) as scheduler:
+        scheduler.submit(0)
+        assert fn.started.wait(5)
+        cancelled = scheduler.submit(1)
+        kept = scheduler.submit(2)
+        assert cancelled.cancel()
+        fn.release.set()
+        assert kept.result(5) == 4
+    assert fn.batches == [[0], [2]]
+
+
+def test_batch_fn_exceptions_reach_every_caller():
+    def fail(xs):
+        raise ValueError("model exploded")
+
+    with InferenceScheduler(fail, max_wait_ms=20) as scheduler:
+        futures = [scheduler.submit(i) for i in range(3)]
+        for f in futures:
+            with pytest.raises(ValueError, match="model exploded"):
+                f.result(5)
+
+
+def test_short_result_list_fails_callers_instead_of_hanging():
+    scheduler = InferenceScheduler(lambda xs: [x * 2 for x in xs[:-1]])
+    try:
+        with pytest.raises(RuntimeError, match="0 results for 1 inputs"):
+            scheduler.submit(3).result(timeout=1)
+    finally:
+        scheduler.close()
+
+
+def test_close_finishes_queued_work_and_rejects_new_items():
+    fn = GatedBatchFn()
+    scheduler = InferenceScheduler(fn, max_batch_size=2, max_wait_ms=0)
+    first = scheduler.submit(0)
+    assert fn.started.wait(5)
+    queued = [scheduler.submit(i) for i in range(1, 6)]
+
+    closer = threading.Thread(target=scheduler.close)
+    closer.start()
+    fn.release.set()
+    closer.join(5)
+
+    assert not closer.is_alive()
+    assert [f.result(0) for f in [first] + queued] == [0, 2, 4, 6, 8, 10]
+    with pytest.raises(SchedulerClosed):
+        scheduler.submit(6)
+    with pytest.raises(SchedulerClosed):
+        scheduler.start()
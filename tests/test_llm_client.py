@@ -0,0 +1,129 @@
+import time
+import types
+
+import pytest
+
+from llm_client import DeadlineExceeded, RateLimitedClient, TokenBucket
+
+openai = pytest.importorskip("openai")
+fake_openai_server = pytest.importorskip("fake_openai_server")
+
+MESSAGES = [{"role": "user", "content": "Participant: I grew up by the sea."}]
+
+
+@pytest.fixture
+def server():
+    # Ephemeral port, no random faults: tests script the exact responses.
+    srv = fake_openai_server.serve(port=0, rpm=6000, tpm=10_000_000, latency_s=0.0,
+                                   error_rate=0.0, throttle_rate=0.0)
+    yield srv
+    srv.shutdown()
+
+
+def make_client(server, **kwargs):
+    sdk = openai.OpenAI(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="fake", max_retries=0)
+    kwargs.setdefault("base_delay", 0.01)
+    return RateLimitedClient(sdk, requests_per_minute=6000, tokens_per_minute=10_000_000, **kwargs)
+
+
+# ------------------------------ TokenBucket ------------------------------
+def test_estimate_larger_than_capacity_is_charged_in_full():
+    bucket = TokenBucket(rate=1.0, capacity=16.7)
+    assert bucket.acquire(30)  # bigger than the bucket: admitted once full...
+    bucket.adjust(30 - 10)     # ...and the refund is of what was actually charged
+    bucket._refill()
+    # Net charge is the 10 tokens used, not ~0.
+    assert bucket._level == pytest.approx(16.7 - 10, abs=0.05)
+
+
+def test_oversized_charge_makes_later_callers_wait():
+    bucket = TokenBucket(rate=100.0, capacity=10.0)
+    assert bucket.acquire(30)
+    start = time.monotonic()
+    assert bucket.acquire(10)
+    # Level went to -20: refilling to 10 takes 0.3 s.
+    assert time.monotonic() - start >= 0.25
+
+
+def test_refund_from_usage_keeps_tokens_per_minute_enforced():
+    # Stub provider reporting 10 tokens used; estimate is 1024 + prompt.
+    usage = types.SimpleNamespace(total_tokens=10)
+    response = types.SimpleNamespace(usage=usage, choices=[])
+    stub = types.SimpleNamespace(chat=types.SimpleNamespace(
+        completions=types.SimpleNamespace(create=lambda **kw: response)))
+    client = RateLimitedClient(stub, requests_per_minute=60_000, tokens_per_minute=1000)
+    client.create(model="m", messages=MESSAGES)
+    client.tokens._refill()
+    assert client.tokens._level <= client.tokens.capacity - 10 + 1
+
+
+def test_request_unit_is_refunded_when_tokens_run_out():
+    calls = []
+    stub = types.SimpleNamespace(chat=types.SimpleNamespace(
+        completions=types.SimpleNamespace(create=lambda **kw: calls.append(kw))))
+    client = RateLimitedClient(stub, requests_per_minute=60, tokens_per_minute=600)
+    client.tokens.adjust(-10_000)  # token budget exhausted for minutes
+    client.requests._refill()
+    before = client.requests._level
+    with pytest.raises(DeadlineExceeded):
+        client.create(model="m", messages=MESSAGES, deadline=0.2)
+    client.requests._refill()
+    assert not calls
+    assert client.requests._level == pytest.approx(before, abs=0.05)
+
+
+def test_background_sound_generator_wraps_its_own_api_key():
+    from backgound_sound_generator import BackgroundSoundGenerator
+
+    client = BackgroundSoundGenerator(api_key="sk-test").client
+    assert isinstance(client, RateLimitedClient)
+    assert client.client.api_key == "sk-test"
+    assert client.client.max_retries == 0
+
+
+# ------------------------------ Against the fake server ------------------------------
+def test_retries_injected_429_and_500(server):
+    client = make_client(server)
+    server.inject(429, times=2)
+    server.inject(500)
+    response = client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+
+    assert response.choices[0].message.content == "Fake completion."
+    stats = client.stats()
+    assert stats["attempts"] == 4
+    assert stats["retries"] == 3
+    assert stats["throttled"] == 2
+    assert stats["server_errors"] == 1
+    assert server.limits.counts["ok"] == 1
+
+
+def test_retry_after_is_honoured(server):
+    client = make_client(server, base_delay=0.001)
+    server.inject(429, retry_after=0.6)
+    start = time.monotonic()
+    client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    # Jittered backoff alone would be ~1 ms.
+    assert time.monotonic() - start >= 0.6
+
+
+def test_deadline_exceeded_when_retry_after_is_too_long(server):
+    client = make_client(server)
+    server.inject(429, retry_after=5.0)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, deadline=1.0)
+    # Fails fast rather than sleeping past the deadline.
+    assert time.monotonic() - start < 1.0
+    assert client.stats()["deadline_exceeded"] == 1
+
+
+def test_deadline_exceeded_on_slow_server():
+    srv = fake_openai_server.serve(port=0, latency_s=3.0, error_rate=0.0, throttle_rate=0.0)
+    try:
+        client = make_client(srv)
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, deadline=0.5)
+        assert time.monotonic() - start < 1.5
+    finally:
+        srv.shutdown()
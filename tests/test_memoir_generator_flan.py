@@ -0,0 +1,113 @@
+import types
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from memoir_generator_flan import HEADING_PREFIX, MemoirGenerator  # noqa: E402
+
+TRANSCRIPT = "Interviewer: Where did you grow up?\nParticipant: I grew up in Hilo."
+BODY = "I grew up by the sea."
+
+
+# ------------------------------ transformers seq2seq ------------------------------
+class StubTokenizer:
+    """Whitespace 'tokenizer' with a growing vocabulary; id 0 is the decoder start token."""
+
+    def __init__(self):
+        self.vocab = ["<s>"]
+
+    def ids(self, text):
+        out = []
+        for word in text.split():
+            if word not in self.vocab:
+                self.vocab.append(word)
+            out.append(self.vocab.index(word))
+        return out
+
+    def __call__(self, text, return_tensors=None, add_special_tokens=True):
+        import torch
+
+        ids = self.ids(text)
+        if return_tensors != "pt":
+            return types.SimpleNamespace(input_ids=ids)
+
+        class Encoding(dict):
+            def to(self, device):
+                return self
+
+        return Encoding(input_ids=torch.tensor([ids]), attention_mask=torch.ones(1, len(ids), dtype=torch.long))
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(self.vocab[int(i)] for i in ids if int(i) != 0)
+
+
+class StubSeq2Seq:
+    """Counts encoder passes; generate() only ever sees precomputed encoder states."""
+
+    config = types.SimpleNamespace(is_encoder_decoder=True, decoder_start_token_id=0)
+    device = "cpu"
+
+    def __init__(self, tokenizer, heading):
+        self.tokenizer = tokenizer
+        self.heading = heading
+        self.encoder_calls = 0
+
+    def get_encoder(self):
+        import torch
+
+        def encoder(input_ids, attention_mask):
+            self.encoder_calls += 1
+            return types.SimpleNamespace(last_hidden_state=torch.zeros(1, input_ids.shape[1], 2))
+        return encoder
+
+    def generate(self, encoder_outputs, attention_mask, decoder_input_ids=None, **kwargs):
+        import torch
+
+        assert "input_ids" not in kwargs
+        if decoder_input_ids is None:
+            ids = [0] + self.tokenizer.ids(BODY)
+        else:
+            ids = decoder_input_ids[0].tolist() + self.tokenizer.ids(self.heading)
+        return torch.tensor([ids])
+
+
+@pytest.mark.parametrize("heading", ['"A Life by the Sea"', 'Title: "A Life by the Sea"'])
+def test_seq2seq_encodes_once_and_strips_title_prefix(heading):
+    pytest.importorskip("torch")
+    tokenizer = StubTokenizer()
+    model = StubSeq2Seq(tokenizer, heading)
+    mg = MemoirGenerator(generator=types.SimpleNamespace(model=model, tokenizer=tokenizer))
+
+    memoir = mg.generate_memoir(TRANSCRIPT)
+
+    assert model.encoder_calls == 1
+    assert memoir == f"**A Life by the Sea**\n\n{BODY}"
+
+
+# ------------------------------ CTranslate2 ------------------------------
+class StubCT2:
+    supports_prefix = True
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompts, prefixes=None, **kwargs):
+        self.calls.append((list(prompts), prefixes))
+        return [[{"generated_text": BODY if p is None else "Title: A Life by the Sea"}] for p in prefixes]
+
+
+def test_ct2_decodes_heading_and_body_in_one_call():
+    ct2 = StubCT2()
+    memoir = MemoirGenerator(generator=ct2).generate_memoir(TRANSCRIPT)
+
+    assert len(ct2.calls) == 1
+    prompts, prefixes = ct2.calls[0]
+    assert prompts[0] == prompts[1] and prefixes == [None, HEADING_PREFIX]
+    assert memoir == f"**A Life by the Sea**\n\n{BODY}"
+
+
+def test_ct2_chapter_with_given_title_decodes_only_the_body():
+    ct2 = StubCT2()
+    assert MemoirGenerator(generator=ct2).generate_chapter(TRANSCRIPT, "Early Life") == BODY
+    assert [prefixes for _, prefixes in ct2.calls] == [[None]]
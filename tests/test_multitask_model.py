@@ -0,0 +1,84 @@
+import json
+import types
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+import multitask_model  # noqa: E402
+from multitask_model import (  # noqa: E402
+    CONFIG_FILE, HEADS_FILE, MultiTaskEmotionModel, MultiTaskPredictor,
+)
+
+CONFIG = {
+    "encoder_name": "tiny",
+    "emotion_labels": ["joy", "sadness"],
+    "life_stage_labels": ["childhood", "adulthood"],
+    "event_type_labels": ["move", "loss"],
+    "entity_tags": ["O", "B-LOC", "I-LOC", "B-PER", "I-PER"],
+}
+
+
+class TinyEncoder(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.config = types.SimpleNamespace(hidden_size=4)
+        self.proj = torch.nn.Linear(4, 4)
+
+
+@pytest.fixture
+def checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(multitask_model.AutoModel, "from_pretrained", lambda name: TinyEncoder())
+    model = MultiTaskEmotionModel(
+        "tiny", CONFIG["emotion_labels"], CONFIG["life_stage_labels"], CONFIG["event_type_labels"],
+        entity_tags=CONFIG["entity_tags"],
+    )
+    with (tmp_path / CONFIG_FILE).open("w", encoding="utf-8") as f:
+        json.dump(CONFIG, f)
+    heads = {k: v for k, v in model.state_dict().items() if not k.startswith("encoder.")}
+    return tmp_path, heads
+
+
+def test_from_pretrained_loads_complete_heads(checkpoint):
+    save_dir, heads = checkpoint
+    torch.save(heads, save_dir / HEADS_FILE)
+    model = MultiTaskEmotionModel.from_pretrained(save_dir)
+    assert torch.equal(model.emotion_head.weight, heads["emotion_head.weight"])
+
+
+def test_from_pretrained_rejects_missing_head(checkpoint):
+    save_dir, heads = checkpoint
+    del heads["entity_head.weight"]
+    torch.save(heads, save_dir / HEADS_FILE)
+    with pytest.raises(RuntimeError, match="entity_head.weight"):
+        MultiTaskEmotionModel.from_pretrained(save_dir)
+
+
+def test_from_pretrained_rejects_renamed_head(checkpoint):
+    save_dir, heads = checkpoint
+    heads["emotions_head.weight"] = heads.pop("emotion_head.weight")
+    torch.save(heads, save_dir / HEADS_FILE)
+    with pytest.raises(RuntimeError, match="emotions_head.weight"):
+        MultiTaskEmotionModel.from_pretrained(save_dir)
+
+
+def decode(tags, text, offsets):
+    predictor = MultiTaskPredictor.__new__(MultiTaskPredictor)
+    predictor.model = types.SimpleNamespace(entity_tags=CONFIG["entity_tags"])
+    tag_ids = [CONFIG["entity_tags"].index(t) for t in tags]
+    return predictor._decode_entities(text, tag_ids, offsets, [1] * len(tags))
+
+
+def test_i_tag_after_o_starts_a_new_span():
+    text = "Hilo and then Kona"
+    offsets = [(0, 4), (5, 8), (9, 13), (14, 18)]
+    spans = decode(["B-LOC", "O", "O", "I-LOC"], text, offsets)
+    assert spans == [{"text": "Hilo", "label": "LOC"}, {"text": "Kona", "label": "LOC"}]
+
+
+def test_i_tag_continues_only_the_same_kind():
+    text = "Aunty Mele Hilo Bay"
+    offsets = [(0, 5), (6, 10), (11, 15), (16, 19)]
+    spans = decode(["B-PER", "I-PER", "I-LOC", "I-LOC"], text, offsets)
+    assert spans == [{"text": "Aunty Mele", "label": "PER"}, {"text": "Hilo Bay", "label": "LOC"}]
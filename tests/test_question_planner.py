@@ -0,0 +1,37 @@
+from question_planner import QuestionPlanner
+
+TEMPLATES = {
+    "stages": ["context", "people"],
+    "stage_templates": {"context": ["C1", "C2"], "people": ["P1"]},
+    "category_templates": {"Early Life": {"context": ["E1", "E2", "E3"]}},
+    "emotion_templates": {"joy": ["J1"]},
+    "fallback": ["F1"],
+}
+
+
+def ask_until_done(planner, category, emotion="neutral", limit=20):
+    state = planner.new_state(seed=1)
+    asked = []
+    while not planner.category_done(state, category):
+        assert len(asked) < limit
+        asked.append(planner.next_question(state, category, emotion))
+    return asked
+
+
+def test_category_done_after_stages_and_its_own_questions():
+    planner = QuestionPlanner(TEMPLATES)
+    asked = ask_until_done(planner, "2. Early Life")
+    # One stage question per stage, then the rest of the category's table.
+    assert sorted(asked) == ["E1", "E2", "E3", "P1"]
+
+
+def test_emotion_questions_come_before_the_category_runs_out():
+    planner = QuestionPlanner(TEMPLATES)
+    asked = ask_until_done(planner, "2. Early Life", emotion="joy")
+    assert "J1" in asked
+    assert set(asked) >= {"E1", "E2", "E3"}
+
+
+def test_category_without_templates_is_done_after_the_stages():
+    planner = QuestionPlanner(TEMPLATES)
+    assert len(ask_until_done(planner, "5. Career")) == len(TEMPLATES["stages"])
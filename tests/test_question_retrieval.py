@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+from question_retrieval import META_FILE, QuestionRetriever, build_index, load_retriever
+
+QUESTIONS = [
+    {"text": "Who taught you to swim?", "category": "2. Early Life", "emotion": "joy"},
+    {"text": "What did your first job teach you?", "category": "career"},
+    {"text": "What do you miss most about home?", "emotion": "nostalgia"},
+]
+
+
+class StubEmbedder:
+    """Bag-of-words vectors over a fixed vocabulary, L2-normalised like SentenceTransformer."""
+
+    VOCAB = ["swim", "job", "home", "sea", "work", "miss"]
+
+    def encode(self, texts, normalize_embeddings=True, convert_to_numpy=True, **kwargs):
+        vectors = np.array(
+            [[float(w in t.lower()) for w in self.VOCAB] for t in texts], dtype=np.float32
+        ) + 1e-3
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    build_index(QUESTIONS, tmp_path, "stub-embedder", embedder=StubEmbedder())
+    return tmp_path
+
+
+def test_index_records_the_given_embedder_name(index_dir):
+    with (index_dir / META_FILE).open("r", encoding="utf-8") as f:
+        assert json.load(f)["embedder"] == "stub-embedder"
+
+
+def test_matching_embedder_retrieves_nearest_question(index_dir):
+    retriever = QuestionRetriever(index_dir, embedder=StubEmbedder(), embedder_name="stub-embedder")
+    state = retriever.new_state()
+    assert retriever.next_question("We would swim in the sea", state) == "Who taught you to swim?"
+    assert retriever.next_question("We would swim in the sea", state) != "Who taught you to swim?"
+
+
+def test_mismatched_embedder_is_rejected(index_dir):
+    with pytest.raises(ValueError, match="stub-embedder"):
+        QuestionRetriever(index_dir, embedder=StubEmbedder(), embedder_name="all-MiniLM-L6-v2")
+
+
+def test_custom_embedder_requires_its_name(index_dir):
+    with pytest.raises(ValueError):
+        QuestionRetriever(index_dir, embedder=StubEmbedder())
+
+
+def test_load_retriever_without_an_index_keeps_templates(tmp_path, monkeypatch):
+    monkeypatch.delenv("MELO_QUESTION_INDEX", raising=False)
+    assert load_retriever(tmp_path / "missing") is None
+    monkeypatch.setenv("MELO_QUESTION_INDEX", "off")
+    assert load_retriever() is None
+
+
+def test_generator_asks_retrieved_questions(index_dir, monkeypatch):
+    import question_retrieval
+    from question_generator import DialogueState, EmotionAwareQuestionGenerator
+
+    monkeypatch.setattr(question_retrieval, "QuestionRetriever",
+                        lambda d: QuestionRetriever(d, embedder=StubEmbedder(), embedder_name="stub-embedder"))
+    qg = EmotionAwareQuestionGenerator(retriever=load_retriever(index_dir))
+    state = DialogueState(history=["We used to swim every day."])
+    state.asked_about_context = True
+    assert qg.generate("joy", [], state) == "Who taught you to swim?"
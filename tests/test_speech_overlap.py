@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+import asr
+from conftest import FIXTURES
+from streaming_analyzer import BackgroundAnalyzer, StreamingAnalyzer
+
+UTTERANCE = FIXTURES / "utterance_16k.wav"
+SEGMENT_TEXTS = [
+    "I grew up by the sea in Kailua. We swam every morning.",
+    "My brother Kai taught me to surf there.",
+]
+
+
+class SlowBackend:
+    """Stub ASR: canned text per segment, with a transcription delay."""
+
+    name = "stub"
+
+    def __init__(self, texts, delay_s):
+        self.texts = list(texts)
+        self.delay_s = delay_s
+        self.spans = []  # (start, end) perf_counter of each transcription
+
+    def transcribe(self, pcm, sample_rate=asr.SAMPLE_RATE, prompt=None):
+        start = time.perf_counter()
+        time.sleep(self.delay_s)
+        self.spans.append((start, time.perf_counter()))
+        return self.texts.pop(0) if self.texts else ""
+
+
+class StubNLP:
+    """Deterministic stand-in for NLPPipeline.analyze_batch; records when each text finished."""
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.finished = {}
+        self._lock = threading.Lock()
+
+    def _analyze(self, text):
+        joy = (sum(map(ord, text)) % 100) / 100
+        emo_vec = {"joy": joy, "sadness": (1 - joy) / 2, "neutral": (1 - joy) / 2}
+        entities = [{"text": w.strip(".,"), "label": "MISC"} for w in text.split()[1:] if w[0].isupper()]
+        return max(emo_vec, key=emo_vec.get), emo_vec, entities
+
+    def analyze_batch(self, texts, batch_size=None):
+        time.sleep(self.delay_s)
+        out = [self._analyze(t) for t in texts]
+        with self._lock:
+            for t in texts:
+                self.finished[t] = time.perf_counter()
+        return out
+
+
+def test_earlier_segments_are_analysed_while_later_ones_are_transcribed():
+    backend = SlowBackend(SEGMENT_TEXTS, delay_s=0.3)
+    nlp = StubNLP(delay_s=0.02)
+    transcriber = asr.StreamingTranscriber(backend)
+
+    with BackgroundAnalyzer(StreamingAnalyzer(nlp)) as background:
+        for seg in transcriber.iter_segments(asr.WavFileSource(UTTERANCE)):
+            background.submit(seg.text)
+        background.finish()
+
+    assert len(backend.spans) == 2
+    first_sentences = [s for s in nlp.finished if s in SEGMENT_TEXTS[0]]
+    assert first_sentences
+    _, second_end = backend.spans[1]
+    # Every sentence of segment 0 was analysed before segment 1's transcript existed.
+    assert all(nlp.finished[s] < second_end for s in first_sentences)
+
+
+def test_merged_result_matches_full_utterance():
+    nlp = StubNLP()
+    sa = StreamingAnalyzer(nlp)
+
+    texts = []
+    with BackgroundAnalyzer(sa) as background:
+        transcriber = asr.StreamingTranscriber(SlowBackend(SEGMENT_TEXTS, delay_s=0.0))
+        for seg in transcriber.iter_segments(asr.WavFileSource(UTTERANCE)):
+            texts.append(seg.text)
+            background.submit(seg.text)
+        merged = background.finish()
+
+    full = sa.analyze(" ".join(texts))
+    assert merged[0] == full[0]
+    assert merged[1] == pytest.approx(full[1])
+    assert merged[2] == full[2]
+    assert [e["text"] for e in merged[2]] == ["Kailua", "Kai"]
@@ -0,0 +1,45 @@
+from transcript_compactor import TranscriptCompactor
+
+TRANSCRIPT = """
+Melo: [Category: 2. Early Life] Where did you grow up?
+Participant: We lived in a small house near the harbour in Hilo. My mother sang every single morning while she cooked.
+Melo: Who was important to you?
+Participant: It was fine.
+"""
+
+
+class StubNLP:
+    """Salience from a fixed emotion per sentence: the singing mother is the most emotional."""
+
+    def analyze_batch(self, texts, batch_size=None):
+        out = []
+        for t in texts:
+            neutral = 0.1 if "sang" in t else 0.9
+            out.append(("joy", {"joy": 1 - neutral, "neutral": neutral}, []))
+        return out
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_keeps_most_salient_sentences_in_order():
+    compactor = TranscriptCompactor(token_budget=16, nlp=StubNLP(), count_tokens=word_count)
+    text = compactor.compact(TRANSCRIPT)
+    assert "Melo" not in text and "[Category" not in text
+    assert "My mother sang every single morning while she cooked." in text
+    assert word_count(text) <= 16
+
+
+def test_budget_below_every_sentence_keeps_the_top_one_truncated():
+    compactor = TranscriptCompactor(token_budget=3, nlp=StubNLP(), count_tokens=word_count)
+    text = compactor.compact(TRANSCRIPT)
+    assert text == "My mother sang"
+    assert compactor.last_stats["tokens_out"] == 3
+    assert compactor.last_stats["sentences_dropped"] == 2
+
+
+def test_budget_below_one_word_truncates_characters():
+    # One token per character: even "My" is over budget.
+    compactor = TranscriptCompactor(token_budget=1, nlp=StubNLP(), count_tokens=len)
+    assert compactor.compact(TRANSCRIPT) == "M"
@@ -1,8 +1,27 @@
+"""
+Fine-tune distilroberta-base on data/emotion_dataset.jsonl.
+
+    python training/train_emotion_classifier.py                 # session holdout, saves the model
+    python training/train_emotion_classifier.py --kfold 5       # 5-fold CV, folds trained in parallel
+
+Both modes split by session, so a persona's sentences are never on both
+sides of a split. In k-fold mode each fold trains in its own worker process;
+accuracy and macro-F1 are reported per fold (with wall-clock time) and as a
+mean with a t-distribution confidence interval, in
+models/emotion_classifier/kfold.json.
+"""
+import argparse
 import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import numpy as np
 from datasets import Dataset
+from scipy import stats
 from sklearn.metrics import accuracy_score, f1_score
 from transformers import (
     AutoTokenizer,
@@ -24,16 +43,21 @@ CANONICAL_EMOTIONS = [
 label2id = {lbl: i for i, lbl in enumerate(CANONICAL_EMOTIONS)}
 id2label = {i: lbl for lbl, i in label2id.items()}
 
+MODEL_NAME = "distilroberta-base"
+OUTPUT_DIR = Path("models/emotion_classifier")
+
 
 def load_jsonl(path: Path):
     texts = []
     labels = []
+    sessions = []
     with path.open("r", encoding="utf-8") as f:
         for line in f:
             obj = json.loads(line)
             texts.append(obj["text"])
             labels.append(label2id[obj["label"]])
-    return texts, labels
+            sessions.append(obj.get("session_id"))
+    return texts, labels, sessions
 
 
 def compute_metrics(p):
@@ -44,27 +68,50 @@ def compute_metrics(p):
     return {"accuracy": acc, "f1_macro": f1}
 
 
-def main():
-    data_path = Path("data/emotion_dataset.jsonl")
-    if not data_path.exists():
-        raise FileNotFoundError(
-            f"{data_path} not found. Run scripts/build_emotion_dataset.py first."
-        )
+# ------------------------------ Splits ------------------------------
+def session_folds(sessions, k, seed=42):
+    """
+    k (train_idx, val_idx) pairs with every session's sentences in exactly
+    one validation fold. Sessions are shuffled, then placed largest first
+    into the currently smallest fold, so folds have similar sentence counts.
+    """
+    if k < 2:
+        raise ValueError(f"k-fold needs k >= 2, got {k}")
+    by_session = {}
+    for i, s in enumerate(sessions):
+        by_session.setdefault(s, []).append(i)
+    if len(by_session) < k:
+        raise ValueError(f"{len(by_session)} sessions cannot make {k} folds")
 
-    texts, labels = load_jsonl(data_path)
-    n = len(texts)
-    if n < 100:
-        print(f"WARNING: only {n} samples detected, training may be unstable.")
+    order = sorted(by_session)
+    random.Random(seed).shuffle(order)
+    order.sort(key=lambda s: -len(by_session[s]))  # stable: shuffled among equal sizes
+
+    folds = [[] for _ in range(k)]
+    for s in order:
+        min(folds, key=len).extend(by_session[s])
 
-    split = int(n * 0.8)
-    train_texts, val_texts = texts[:split], texts[split:]
-    train_labels, val_labels = labels[:split], labels[split:]
+    all_idx = np.arange(len(sessions))
+    out = []
+    for fold in folds:
+        val = np.sort(np.array(fold, dtype=np.int64))
+        out.append((np.setdiff1d(all_idx, val), val))
+    return out
 
-    train_ds = Dataset.from_dict({"text": train_texts, "label": train_labels})
-    val_ds = Dataset.from_dict({"text": val_texts, "label": val_labels})
 
-    model_name = "distilroberta-base"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
+def split_by_session(sessions, val_fraction=0.2, seed=42):
+    """Hold out whole sessions (train_idx, val_idx), as in train_multitask_classifier."""
+    names = sorted(set(sessions))
+    random.Random(seed).shuffle(names)
+    val_sessions = set(names[:max(1, int(len(names) * val_fraction))])
+    train = [i for i, s in enumerate(sessions) if s not in val_sessions]
+    val = [i for i, s in enumerate(sessions) if s in val_sessions]
+    return train, val
+
+
+# ------------------------------ Training ------------------------------
+def build_dataset(tokenizer, texts, labels):
+    ds = Dataset.from_dict({"text": texts, "label": labels})
 
     def tokenize_fn(batch):
         return tokenizer(
@@ -74,37 +121,35 @@ def main():
             max_length=128,
         )
 
-    train_ds = train_ds.map(tokenize_fn, batched=True)
-    val_ds = val_ds.map(tokenize_fn, batched=True)
-
-    train_ds = train_ds.rename_column("label", "labels")
-    train_ds.set_format(
-        type="torch", columns=["input_ids", "attention_mask", "labels"]
-    )
-    val_ds = val_ds.rename_column("label", "labels")
-    val_ds.set_format(
+    ds = ds.map(tokenize_fn, batched=True)
+    ds = ds.rename_column("label", "labels")
+    ds.set_format(
         type="torch", columns=["input_ids", "attention_mask", "labels"]
     )
+    return ds
+
 
+def make_trainer(tokenizer, train_ds, val_ds, output_dir, epochs=3, seed=42, **extra_args):
     model = AutoModelForSequenceClassification.from_pretrained(
-        model_name,
+        MODEL_NAME,
         num_labels=len(CANONICAL_EMOTIONS),
         id2label=id2label,
         label2id=label2id,
     )
 
     args = TrainingArguments(
-        output_dir="models/emotion_classifier",
-        num_train_epochs=3,
+        output_dir=str(output_dir),
+        num_train_epochs=epochs,
         per_device_train_batch_size=8,
         per_device_eval_batch_size=8,
         learning_rate=5e-5,
         weight_decay=0.01,
         logging_steps=50,
+        seed=seed,
+        **extra_args,
     )
 
-
-    trainer = Trainer(
+    return Trainer(
         model=model,
         args=args,
         train_dataset=train_ds,
@@ -113,8 +158,143 @@ def main():
         compute_metrics=compute_metrics,
     )
 
+
+def train_fold(fold, train_idx, val_idx, texts, labels, epochs, seed, threads, gpus):
+    """Train and evaluate one fold. Runs in a worker process; returns its metrics."""
+    start = time.perf_counter()
+    if gpus:
+        # Before the first CUDA call in this (single-use) worker process.
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(fold % gpus)
+    import torch
+    torch.set_num_threads(threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    train_ds = build_dataset(tokenizer, [texts[i] for i in train_idx], [labels[i] for i in train_idx])
+    val_ds = build_dataset(tokenizer, [texts[i] for i in val_idx], [labels[i] for i in val_idx])
+    trainer = make_trainer(
+        tokenizer, train_ds, val_ds, OUTPUT_DIR / "kfold" / f"fold_{fold}", epochs=epochs, seed=seed,
+        save_strategy="no", report_to=[], disable_tqdm=True,
+    )
+    trainer.train()
+    metrics = trainer.evaluate()
+    return {
+        "fold": fold,
+        "n_train": len(train_idx),
+        "n_val": len(val_idx),
+        "accuracy": float(metrics["eval_accuracy"]),
+        "f1_macro": float(metrics["eval_f1_macro"]),
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+
+
+def summarize(values, confidence=0.95):
+    """Mean, sample std and a t-distribution confidence interval over folds."""
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return {"mean": mean, "std": 0.0, "ci_low": mean, "ci_high": mean, "confidence": confidence}
+    std = float(values.std(ddof=1))
+    half = float(stats.t.ppf((1 + confidence) / 2, len(values) - 1) * std / np.sqrt(len(values)))
+    return {"mean": mean, "std": std, "ci_low": mean - half, "ci_high": mean + half, "confidence": confidence}
+
+
+def run_kfold(texts, labels, sessions, k, workers, epochs, seed):
+    import torch
+
+    folds = session_folds(sessions, k, seed)
+    gpus = torch.cuda.device_count()
+    if workers is None:
+        # One fold per GPU; more would just queue on the same devices.
+        workers = gpus or os.cpu_count() or 1
+    workers = max(1, min(workers, k))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"{k} session-grouped folds, {workers} worker processes, {threads} threads each, {gpus} GPUs")
+
+    results = []
+    start = time.perf_counter()
+    # spawn: CUDA and tokenizer threads do not survive fork; one fold per
+    # process so every fold starts with a fresh CUDA context.
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1
+    ) as pool:
+        futures = [
+            pool.submit(train_fold, i, train_idx, val_idx, texts, labels, epochs, seed, threads, gpus)
+            for i, (train_idx, val_idx) in enumerate(folds)
+        ]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            print(
+                f"fold {r['fold']}: accuracy={r['accuracy']:.4f} f1_macro={r['f1_macro']:.4f} "
+                f"(train {r['n_train']}, val {r['n_val']}) in {r['seconds']:.1f}s"
+            )
+    wall = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["fold"])
+    report = {
+        "k": k,
+        "workers": workers,
+        "epochs": epochs,
+        "seed": seed,
+        "folds": results,
+        "accuracy": summarize([r["accuracy"] for r in results]),
+        "f1_macro": summarize([r["f1_macro"] for r in results]),
+        "wall_seconds": round(wall, 1),
+        "fold_seconds_total": round(sum(r["seconds"] for r in results), 1),
+    }
+    for name in ("accuracy", "f1_macro"):
+        s = report[name]
+        print(f"{name}: {s['mean']:.4f} ± {s['std']:.4f}  ({s['confidence']:.0%} CI {s['ci_low']:.4f}-{s['ci_high']:.4f})")
+    print(f"Wall clock {report['wall_seconds']}s for {report['fold_seconds_total']}s of fold training")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    with (OUTPUT_DIR / "kfold.json").open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved k-fold report to {OUTPUT_DIR / 'kfold.json'}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fine-tune the emotion classifier.")
+    parser.add_argument("--kfold", type=int, default=0, help="k-fold cross-validation instead of training (k >= 2, 0 = off)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel fold processes (default: one per GPU, or one per CPU without CUDA)")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.kfold < 0 or args.kfold == 1:
+        parser.error("--kfold must be 0 (off) or at least 2")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    data_path = Path("data/emotion_dataset.jsonl")
+    if not data_path.exists():
+        raise FileNotFoundError(
+            f"{data_path} not found. Run scripts/build_emotion_dataset.py first."
+        )
+
+    texts, labels, sessions = load_jsonl(data_path)
+    n = len(texts)
+    if n < 100:
+        print(f"WARNING: only {n} samples detected, training may be unstable.")
+    if any(s is None for s in sessions):
+        raise ValueError(f"{data_path} has no session_id. Re-run scripts/build_emotion_dataset.py.")
+
+    if args.kfold:
+        run_kfold(texts, labels, sessions, args.kfold, args.workers, args.epochs, args.seed)
+        return
+
+    train_idx, val_idx = split_by_session(sessions, seed=args.seed)
+    print(f"Train sentences: {len(train_idx)}  Val sentences: {len(val_idx)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    train_ds = build_dataset(tokenizer, [texts[i] for i in train_idx], [labels[i] for i in train_idx])
+    val_ds = build_dataset(tokenizer, [texts[i] for i in val_idx], [labels[i] for i in val_idx])
+
+    trainer = make_trainer(tokenizer, train_ds, val_ds, OUTPUT_DIR, epochs=args.epochs, seed=args.seed)
     trainer.train()
-    save_dir = Path("models/emotion_classifier/best")
+    print(trainer.evaluate())
+    save_dir = OUTPUT_DIR / "best"
     save_dir.mkdir(parents=True, exist_ok=True)
     trainer.save_model(save_dir)
     print(f"Saved best model to {save_dir}")
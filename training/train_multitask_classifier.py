@@ -0,0 +1,214 @@
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+from datasets import Dataset
+from sklearn.metrics import accuracy_score, f1_score
+from transformers import AutoTokenizer, TrainingArguments, Trainer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from multitask_model import ENTITY_TAGS, MultiTaskEmotionModel  # noqa: E402
+
+IGNORE_INDEX = -100
+
+
+def load_parquet(path: Path):
+    table = pq.read_table(path)
+    meta = table.schema.metadata or {}
+    vocabs = {
+        "emotions": json.loads(meta[b"emotions"]),
+        "life_stages": json.loads(meta[b"life_stages"]),
+        "event_types": json.loads(meta[b"event_types"]),
+    }
+    return table.to_pylist(), vocabs
+
+
+def to_features(rows, vocabs):
+    stage2id = {s: i for i, s in enumerate(vocabs["life_stages"])}
+    event2id = {e: i for i, e in enumerate(vocabs["event_types"])}
+    return {
+        "text": [r["text"] for r in rows],
+        "emotion_labels": [r["emotion_vector"] for r in rows],
+        "emotion_mask": [float(any(r["emotion_vector"])) for r in rows],
+        "life_stage_labels": [stage2id.get(r["life_stage"], IGNORE_INDEX) for r in rows],
+        "event_type_labels": [event2id.get(r["event_type"], IGNORE_INDEX) for r in rows],
+        "entities": [r["entities"] or [] for r in rows],
+    }
+
+
+def entity_char_spans(text, entities):
+    """
+    Locate annotated entity strings in the sentence (case-insensitive, whole
+    words). Annotations that do not occur verbatim are skipped.
+    """
+    spans = []
+    for ent in entities:
+        ent = ent.strip()
+        if not ent:
+            continue
+        pattern = r"(?<!\w)" + re.escape(ent) + r"(?!\w)"
+        for m in re.finditer(pattern, text, flags=re.IGNORECASE):
+            spans.append((m.start(), m.end()))
+    return sorted(spans)
+
+
+def bio_tags(offsets, spans):
+    """Per-token BIO tag ids; special and padding tokens get IGNORE_INDEX."""
+    tag2id = {t: i for i, t in enumerate(ENTITY_TAGS)}
+    tags = []
+    prev_span = None
+    for start, end in offsets:
+        if start == end:
+            tags.append(IGNORE_INDEX)
+            prev_span = None
+            continue
+        span = next((s for s in spans if start < s[1] and end > s[0]), None)
+        if span is None:
+            tags.append(tag2id["O"])
+        elif span == prev_span:
+            tags.append(tag2id["I-ENT"])
+        else:
+            tags.append(tag2id["B-ENT"])
+        prev_span = span
+    return tags
+
+
+def split_by_session(rows, val_fraction=0.2, seed=42):
+    """
+    Hold out whole sessions, so validation personas are never seen in
+    training (and are not just the last files in sort order).
+    """
+    sessions = sorted({r["session_id"] for r in rows})
+    random.Random(seed).shuffle(sessions)
+    n_val = max(1, int(len(sessions) * val_fraction))
+    val_sessions = set(sessions[:n_val])
+    train = [r for r in rows if r["session_id"] not in val_sessions]
+    val = [r for r in rows if r["session_id"] in val_sessions]
+    return train, val
+
+
+def compute_metrics(p):
+    emo_logits, stage_logits, event_logits, entity_logits = p.predictions
+    emo_labels, emo_mask, stage_labels, event_labels, entity_labels = p.label_ids
+
+    metrics = {}
+
+    keep = emo_mask > 0
+    if keep.any():
+        emo_pred = (emo_logits[keep] > 0).astype(int)
+        emo_true = emo_labels[keep].astype(int)
+        metrics["emotion_f1_micro"] = f1_score(emo_true, emo_pred, average="micro", zero_division=0)
+        metrics["emotion_f1_macro"] = f1_score(emo_true, emo_pred, average="macro", zero_division=0)
+
+    for name, logits, labels in (
+        ("life_stage", stage_logits, stage_labels),
+        ("event_type", event_logits, event_labels),
+    ):
+        keep = labels != IGNORE_INDEX
+        if not keep.any():
+            continue
+        preds = np.argmax(logits[keep], axis=1)
+        metrics[f"{name}_accuracy"] = accuracy_score(labels[keep], preds)
+        metrics[f"{name}_f1_macro"] = f1_score(labels[keep], preds, average="macro", zero_division=0)
+
+    keep = entity_labels != IGNORE_INDEX
+    if keep.any():
+        preds = np.argmax(entity_logits, axis=-1)[keep]
+        entity_ids = list(range(1, len(ENTITY_TAGS)))
+        metrics["entity_token_f1"] = f1_score(
+            entity_labels[keep], preds, labels=entity_ids, average="micro", zero_division=0
+        )
+
+    return metrics
+
+
+def main():
+    data_path = Path("data/multitask_dataset.parquet")
+    if not data_path.exists():
+        raise FileNotFoundError(
+            f"{data_path} not found. Run scripts/build_emotion_dataset.py first."
+        )
+
+    rows, vocabs = load_parquet(data_path)
+    train_rows, val_rows = split_by_session(rows)
+    print(f"Train sentences: {len(train_rows)}  Val sentences: {len(val_rows)}")
+
+    train_ds = Dataset.from_dict(to_features(train_rows, vocabs))
+    val_ds = Dataset.from_dict(to_features(val_rows, vocabs))
+
+    model_name = "distilroberta-base"
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def tokenize_fn(batch):
+        enc = tokenizer(
+            batch["text"],
+            truncation=True,
+            padding="max_length",
+            max_length=128,
+            return_offsets_mapping=True,
+        )
+        enc["entity_tag_labels"] = [
+            bio_tags(offsets, entity_char_spans(text, ents))
+            for text, ents, offsets in zip(
+                batch["text"], batch["entities"], enc["offset_mapping"]
+            )
+        ]
+        enc.pop("offset_mapping")
+        return enc
+
+    label_names = [
+        "emotion_labels",
+        "emotion_mask",
+        "life_stage_labels",
+        "event_type_labels",
+        "entity_tag_labels",
+    ]
+    columns = ["input_ids", "attention_mask"] + label_names
+
+    train_ds = train_ds.map(tokenize_fn, batched=True)
+    val_ds = val_ds.map(tokenize_fn, batched=True)
+    train_ds.set_format(type="torch", columns=columns)
+    val_ds.set_format(type="torch", columns=columns)
+
+    model = MultiTaskEmotionModel(
+        model_name,
+        emotion_labels=vocabs["emotions"],
+        life_stage_labels=vocabs["life_stages"],
+        event_type_labels=vocabs["event_types"],
+        entity_tags=ENTITY_TAGS,
+    )
+
+    args = TrainingArguments(
+        output_dir="models/multitask_classifier",
+        num_train_epochs=5,
+        per_device_train_batch_size=8,
+        per_device_eval_batch_size=8,
+        learning_rate=5e-5,
+        weight_decay=0.01,
+        logging_steps=50,
+        label_names=label_names,
+    )
+
+    trainer = Trainer(
+        model=model,
+        args=args,
+        train_dataset=train_ds,
+        eval_dataset=val_ds,
+        compute_metrics=compute_metrics,
+    )
+
+    trainer.train()
+    print(trainer.evaluate())
+
+    save_dir = Path("models/multitask_classifier/best")
+    model.save_pretrained(save_dir)
+    tokenizer.save_pretrained(save_dir)
+    print(f"Saved multi-task model to {save_dir}")
+
+
+if __name__ == "__main__":
+    main()